@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import httpx
+import jwt
+
+from logger import get_logger
+from metrics import track_upstream
+
+logger = get_logger("auth")
+
+# Auth verification mode:
+# - "local": verify JWT signature/expiry/audience/issuer in-process (default)
+# - "remote": call supabase.auth.get_user(token) on every request (old behavior)
+AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "local").lower()
+
+# Legacy Supabase projects sign tokens with a shared HS256 secret
+# (Project Settings > API > JWT Secret). Projects using asymmetric signing
+# keys publish them at /auth/v1/.well-known/jwks.json instead.
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+
+JWKS_REFRESH_SECONDS = int(os.getenv("JWKS_REFRESH_SECONDS", "3600"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+# Don't hammer the JWKS endpoint when tokens arrive with a bogus kid
+JWKS_MIN_REFRESH_INTERVAL_SECONDS = 30
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+SYMMETRIC_ALGORITHMS = ["HS256"]
+
+
+class TokenVerificationError(Exception):
+    """Token is invalid (bad signature, expired, wrong audience/issuer, malformed)."""
+
+
+class SigningKeyUnavailable(Exception):
+    """No local key can verify this token - caller should fall back to remote check."""
+
+
+class LocalTokenVerifier:
+    """
+    Verifies Supabase access tokens in-process.
+
+    Signing keys come from the project's JWKS endpoint (fetched once, refreshed
+    every `jwks_refresh_seconds` or when a token arrives with an unknown `kid`)
+    or from the shared HS256 secret. Verified claims are cached by token hash
+    so repeat requests with the same token skip signature verification entirely.
+
+    `fetch_jwks` is a blocking call (httpx.get by default); it runs in a
+    thread so a slow JWKS endpoint never stalls the event loop, and one
+    refresh at a time is made while other requests wait for it.
+    """
+
+    def __init__(
+        self,
+        issuer: str,
+        jwks_url: Optional[str] = None,
+        secret: Optional[str] = None,
+        audience: str = "authenticated",
+        jwks_refresh_seconds: int = 3600,
+        cache_size: int = 1024,
+        cache_ttl_seconds: int = 300,
+        fetch_jwks: Optional[Callable[[str], Dict]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.issuer = issuer
+        self.jwks_url = jwks_url
+        self.secret = secret
+        self.audience = audience
+        self.jwks_refresh_seconds = jwks_refresh_seconds
+        self.cache_size = cache_size
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._fetch_jwks = fetch_jwks or _http_fetch_jwks
+        self._clock = clock
+
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._keys_fetched_at: Optional[float] = None
+        self._keys_lock = asyncio.Lock()
+
+        # token hash -> (claims, cache expiry)
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    async def verify(self, token: str) -> Dict:
+        """
+        Verify a token and return its claims.
+
+        Raises:
+            TokenVerificationError: token is invalid
+            SigningKeyUnavailable: no local key for this token's algorithm/kid
+        """
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+        now = self._clock()
+
+        cached = self._cache_get(cache_key, now)
+        if cached is not None:
+            return cached
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"Malformed token: {e}")
+
+        alg = header.get("alg")
+        if alg in SYMMETRIC_ALGORITHMS:
+            if not self.secret:
+                raise SigningKeyUnavailable("HS256 token but no JWT secret configured")
+            key = self.secret
+        elif alg in ASYMMETRIC_ALGORITHMS:
+            key = (await self._get_signing_key(header.get("kid"), now)).key
+        else:
+            raise TokenVerificationError(f"Unsupported token algorithm: {alg}")
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[alg],
+                audience=self.audience,
+                issuer=self.issuer,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(str(e))
+
+        # Never cache past the token's own expiry
+        expires_at = min(claims["exp"], now + self.cache_ttl_seconds)
+        self._cache_put(cache_key, claims, expires_at)
+        return claims
+
+    async def prefetch_keys(self) -> None:
+        """Load the JWKS ahead of the first request (worker startup)."""
+        if self.jwks_url:
+            async with self._keys_lock:
+                await self._refresh_keys(self._clock())
+
+    async def _get_signing_key(self, kid: Optional[str], now: float) -> jwt.PyJWK:
+        if self.jwks_url and self._needs_refresh(kid, now):
+            async with self._keys_lock:
+                # Another request may have refreshed while this one waited
+                if self._needs_refresh(kid, now):
+                    await self._refresh_keys(now)
+
+        key = self._keys.get(kid)
+        if key is None and kid is None and len(self._keys) == 1:
+            key = next(iter(self._keys.values()))
+
+        if key is None:
+            raise SigningKeyUnavailable(f"No signing key found for kid={kid}")
+        return key
+
+    def _needs_refresh(self, kid: Optional[str], now: float) -> bool:
+        if self._keys_fetched_at is None:
+            return True
+        age = now - self._keys_fetched_at
+        if age >= self.jwks_refresh_seconds:
+            return True
+        return kid not in self._keys and age >= JWKS_MIN_REFRESH_INTERVAL_SECONDS
+
+    async def _refresh_keys(self, now: float) -> None:
+        try:
+            jwks = await asyncio.to_thread(self._fetch_jwks, self.jwks_url)
+        except Exception as e:
+            # Keep serving with the keys we already have
+            logger.warning("Failed to refresh JWKS: %s", e)
+            self._keys_fetched_at = now
+            return
+
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            try:
+                keys[jwk.get("kid")] = jwt.PyJWK(jwk)
+            except jwt.PyJWTError as e:
+                logger.warning("Skipping unusable signing key %s: %s", jwk.get("kid"), e)
+        self._keys = keys
+        self._keys_fetched_at = now
+        logger.info("Loaded %d signing key(s)", len(keys))
+
+    def _cache_get(self, cache_key: str, now: float) -> Optional[Dict]:
+        with self._cache_lock:
+            entry = self._cache.get(cache_key)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if now >= expires_at:
+                del self._cache[cache_key]
+                return None
+            self._cache.move_to_end(cache_key)
+            return claims
+
+    def _cache_put(self, cache_key: str, claims: Dict, expires_at: float) -> None:
+        with self._cache_lock:
+            self._cache[cache_key] = (claims, expires_at)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+def _http_fetch_jwks(url: str) -> Dict:
+    with track_upstream("auth", "GET jwks"):
+        response = httpx.get(url, timeout=5.0)
+    response.raise_for_status()
+    return response.json()
+
+
+def build_verifier(supabase_url: str) -> LocalTokenVerifier:
+    """Create the verifier for a Supabase project using environment config."""
+    auth_url = f"{supabase_url.rstrip('/')}/auth/v1"
+    return LocalTokenVerifier(
+        issuer=auth_url,
+        jwks_url=f"{auth_url}/.well-known/jwks.json",
+        secret=SUPABASE_JWT_SECRET,
+        audience=SUPABASE_JWT_AUDIENCE,
+        jwks_refresh_seconds=JWKS_REFRESH_SECONDS,
+        cache_size=TOKEN_CACHE_SIZE,
+        cache_ttl_seconds=TOKEN_CACHE_TTL_SECONDS,
+    )
@@ -0,0 +1,242 @@
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from repository import ItemStorage
+
+# Read-through cache of each list (personal or shared) (see CachedItemRepository)
+LIST_CACHE_ENABLED = os.getenv("LIST_CACHE_ENABLED", "true").lower() == "true"
+# Bounds staleness from edits made outside this process (other workers,
+# Supabase dashboard). Mutations through this API invalidate immediately.
+LIST_CACHE_TTL_SECONDS = float(os.getenv("LIST_CACHE_TTL_SECONDS", "60"))
+LIST_CACHE_MAX_ENTRIES = int(os.getenv("LIST_CACHE_MAX_ENTRIES", "10000"))
+# Optional Redis-compatible store shared by all workers, e.g. redis://localhost:6379/0
+LIST_CACHE_REDIS_URL = os.getenv("LIST_CACHE_REDIS_URL")
+
+# Cache slots per list: one per list type, the combined GET /api/lists payload
+# and its ETag validator
+LIST_KEYS = ("to_buy", "items", "all", "version")
+
+
+class CacheBackend(ABC):
+    """Key/value store with per-entry TTL."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, keys: List[str]) -> None:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU with TTL. Size-bounded: least recently used entries go first."""
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        # key -> (value, expires_at)
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if self._clock() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._entries[key] = (value, self._clock() + ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, keys: List[str]) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-compatible store (values JSON-encoded). Requires the `redis` package."""
+
+    def __init__(self, url: str, prefix: str = "grocery:lists:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value), px=int(ttl_seconds * 1000))
+
+    async def delete(self, keys: List[str]) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+
+class ListCache:
+    """
+    Per-list cache keyed by (list_id, list_type) with hit/miss counters.
+
+    A list with loads in flight has a generation number that invalidate()
+    bumps. A load that started before an invalidation doesn't store its
+    (possibly stale) result. Generations are dropped with the list's last
+    load in flight, so they're bounded by concurrent loads, not by the
+    number of lists ever seen.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float = 60):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # list_id -> generation / loads in flight, only while a load is in flight
+        self._generations: Dict[str, int] = {}
+        self._loads: Dict[str, int] = {}
+
+    async def get_or_load(self, list_id: str, list_key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        key = f"{list_id}:{list_key}"
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        generation = self._generations.setdefault(list_id, 0)
+        self._loads[list_id] = self._loads.get(list_id, 0) + 1
+        try:
+            value = await loader()
+            if self._generations[list_id] == generation:
+                await self.backend.set(key, value, self.ttl_seconds)
+        finally:
+            self._loads[list_id] -= 1
+            if not self._loads[list_id]:
+                del self._loads[list_id]
+                del self._generations[list_id]
+        return value
+
+    async def invalidate(self, list_id: str) -> None:
+        """Drop all of a list's cached entries (called after every mutation)."""
+        self.invalidations += 1
+        if list_id in self._generations:
+            self._generations[list_id] += 1
+        await self.backend.delete([f"{list_id}:{list_key}" for list_key in LIST_KEYS])
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "invalidations": self.invalidations,
+        }
+
+
+class CachedItemRepository:
+    """
+    ItemStorage wrapper: list reads go through the ListCache, every
+    mutation invalidates the list's cache entries after it completes.
+    """
+
+    def __init__(self, repo: ItemStorage, cache: ListCache):
+        self.repo = repo
+        self.cache = cache
+
+    async def list_items(self, list_id: str, list_type: str) -> List[Dict]:
+        return await self.cache.get_or_load(
+            list_id, list_type, lambda: self.repo.list_items(list_id, list_type)
+        )
+
+    async def list_items_page(
+        self,
+        list_id: str,
+        list_type: str,
+        limit: int,
+        after: Optional[Dict] = None,
+        columns: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        # Pages are keyed by cursor and cheap to fetch - not cached
+        return await self.repo.list_items_page(list_id, list_type, limit, after, columns)
+
+    async def list_all_items(self, list_id: str) -> Tuple[List[Dict], str]:
+        rows, version = await self.cache.get_or_load(
+            list_id, "all", lambda: self.repo.list_all_items(list_id)
+        )
+        return rows, version
+
+    async def list_version(self, list_id: str) -> str:
+        return await self.cache.get_or_load(list_id, "version", lambda: self.repo.list_version(list_id))
+
+    async def list_changes(self, list_id: str, since: str) -> Tuple[List[Dict], List[Dict]]:
+        # Deltas are already small - not cached
+        return await self.repo.list_changes(list_id, since)
+
+    async def insert_item(self, item_data: Dict) -> Optional[Dict]:
+        try:
+            return await self.repo.insert_item(item_data)
+        finally:
+            await self.cache.invalidate(item_data["list_id"])
+
+    async def insert_items(self, list_id: str, user_id: str, items: List[Dict]) -> List[Dict]:
+        return await self._mutate(list_id, self.repo.insert_items(list_id, user_id, items))
+
+    async def toggle_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        return await self._mutate(list_id, self.repo.toggle_item(list_id, item_id))
+
+    async def toggle_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        return await self._mutate(list_id, self.repo.toggle_items(list_id, item_ids))
+
+    async def move_item(self, list_id: str, item_id: str, to_list: str) -> Dict:
+        return await self._mutate(list_id, self.repo.move_item(list_id, item_id, to_list))
+
+    async def move_items(self, list_id: str, item_ids: List[str], to_list: str) -> List[Dict]:
+        return await self._mutate(list_id, self.repo.move_items(list_id, item_ids, to_list))
+
+    async def delete_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        return await self._mutate(list_id, self.repo.delete_item(list_id, item_id))
+
+    async def delete_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        return await self._mutate(list_id, self.repo.delete_items(list_id, item_ids))
+
+    async def list_purchase_stats(self, list_id: str) -> List[Dict]:
+        # Changes with every toggle - not cached
+        return await self.repo.list_purchase_stats(list_id)
+
+    async def _mutate(self, list_id: str, operation: Awaitable[Any]) -> Any:
+        # Invalidate even on failure - the write may have reached the database
+        try:
+            return await operation
+        finally:
+            await self.cache.invalidate(list_id)
+
+
+def build_list_cache() -> Optional[ListCache]:
+    """Create the process-wide list cache from environment config (None if disabled)."""
+    if not LIST_CACHE_ENABLED:
+        return None
+    if LIST_CACHE_REDIS_URL:
+        backend: CacheBackend = RedisCacheBackend(LIST_CACHE_REDIS_URL)
+    else:
+        backend = MemoryCacheBackend(max_entries=LIST_CACHE_MAX_ENTRIES)
+    return ListCache(backend, ttl_seconds=LIST_CACHE_TTL_SECONDS)
@@ -1,9 +1,21 @@
 import os
-from supabase import create_client, Client
+import hashlib
+import threading
+import time
+import httpx
+import jwt
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Generic, Optional, TypeVar
 from dotenv import load_dotenv
+from logger import get_logger
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 load_dotenv()
 
+logger = get_logger("database")
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 # Support both SUPABASE_ANON_KEY (preferred) and SUPABASE_KEY (legacy) for backward compatibility
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY") or os.getenv("SUPABASE_KEY")
@@ -11,20 +23,63 @@ SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY") or os.getenv("SUPABASE_KEY")
 if not SUPABASE_URL or not SUPABASE_ANON_KEY:
     raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY (or SUPABASE_KEY) must be set in environment variables")
 
-# Global anon client (current approach - will be replaced)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+SUPABASE_REST_URL = f"{SUPABASE_URL.rstrip('/')}/rest/v1"
+SUPABASE_AUTH_URL = f"{SUPABASE_URL.rstrip('/')}/auth/v1"
+
+# Connection pool limits for the shared async HTTP client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+
+# Max number of per-token client handles kept alive (one per active session)
+TOKEN_CLIENT_CACHE_SIZE = int(os.getenv("TOKEN_CLIENT_CACHE_SIZE", "1024"))
+
+# Item storage engine:
+# - "postgrest" (default): Supabase REST API over HTTP
+# - "postgres": direct asyncpg pool on DATABASE_URL (requires `pip install asyncpg`)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "postgrest").lower()
+DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# Prepared statements cached per connection. Set to 0 behind a transaction-mode
+# pooler (Supabase port 6543 / PgBouncer), which can't keep them
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+T = TypeVar("T")
 
+# Anon supabase-py client, created by get_supabase() on first use
+_supabase: Optional["Client"] = None
+_supabase_lock = threading.Lock()
 
-def get_supabase() -> Client:
+# Shared async HTTP client - one connection pool for all PostgREST/Auth calls
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_supabase() -> "Client":
     """
-    Dependency to get Supabase client.
-    Currently returns anon client.
-    Will be replaced with authenticated client.
+    Dependency to get the anon Supabase client, created on first use.
+
+    Importing supabase-py (gotrue, postgrest, realtime, storage3) is the
+    biggest part of startup and the request path talks to PostgREST over
+    the shared HTTP client instead, so it's only loaded when a client is
+    actually asked for.
     """
-    return supabase
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                from supabase import create_client
+
+                _supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    return _supabase
+
 
+def supabase_client_loaded() -> bool:
+    """True once get_supabase() has created the anon client."""
+    return _supabase is not None
 
-def get_authenticated_supabase(access_token: str) -> Client:
+
+def get_authenticated_supabase(access_token: str) -> "Client":
     """
     Create a Supabase client authenticated with user's access token.
     This allows RLS policies to work correctly.
@@ -34,17 +89,115 @@ def get_authenticated_supabase(access_token: str) -> Client:
         
     Returns:
         Authenticated Supabase client with auth.uid() context
+
+    Clients are cached per token (see TokenClientCache), so a session only
+    pays for client creation once instead of on every request.
     """
-    print(f"\n[AUTH CLIENT] Creating authenticated Supabase client")
-    print(f"[AUTH CLIENT] Token length: {len(access_token)}")
-    
+    return _authenticated_clients.get(access_token)
+
+
+def _create_authenticated_supabase(access_token: str) -> "Client":
+    from supabase import create_client
+
     # Create new client with user's token
     client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
     
     # Set the session with user's token - this sets auth.uid() context
     client.auth.set_session(access_token, access_token)  # Both access and refresh
     
-    print(f"[AUTH CLIENT] ✅ Authenticated client created")
-    print(f"[AUTH CLIENT] Client type: {type(client)}")
-    
-    return client
\ No newline at end of file
+    logger.debug("Created authenticated Supabase client")
+    return client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared async HTTP client, creating it on first use.
+    Reusing one client keeps TCP/TLS connections to Supabase alive across requests.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared async HTTP client (called on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+class TokenClientCache(Generic[T]):
+    """
+    LRU of per-token client handles.
+
+    Each access token maps to one handle built by `factory` on first use.
+    Handles are evicted when the token's `exp` passes or when the cache is
+    full (least recently used first). Tokens are stored hashed.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], T],
+        max_size: int = 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.factory = factory
+        self.max_size = max_size
+        self._clock = clock
+        # token hash -> (handle, expires_at)
+        self._handles: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, access_token: str) -> T:
+        key = hashlib.sha256(access_token.encode()).hexdigest()
+        now = self._clock()
+
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is not None and now < entry[1]:
+                self._handles.move_to_end(key)
+                return entry[0]
+
+        handle = self.factory(access_token)
+        expires_at = _token_expiry(access_token, default=now + 300)
+
+        with self._lock:
+            self._handles[key] = (handle, expires_at)
+            self._handles.move_to_end(key)
+            self._evict(now)
+        return handle
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def _evict(self, now: float) -> None:
+        expired = [key for key, (_, expires_at) in self._handles.items() if now >= expires_at]
+        for key in expired:
+            del self._handles[key]
+        while len(self._handles) > self.max_size:
+            self._handles.popitem(last=False)
+
+
+def _token_expiry(access_token: str, default: float) -> float:
+    """
+    Read `exp` from a token without verifying it. Only used to bound how long
+    a handle is cached - the token itself is verified by get_current_user.
+    """
+    try:
+        claims = jwt.decode(access_token, options={"verify_signature": False})
+        return float(claims.get("exp", default))
+    except (jwt.PyJWTError, TypeError, ValueError):
+        return default
+
+
+_authenticated_clients: "TokenClientCache[Client]" = TokenClientCache(
+    _create_authenticated_supabase, max_size=TOKEN_CLIENT_CACHE_SIZE
+)
@@ -1,72 +1,166 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import Client
-from database import get_supabase, get_authenticated_supabase
-import traceback
+from database import (
+    get_supabase,
+    get_authenticated_supabase,
+    get_http_client,
+    TokenClientCache,
+    TOKEN_CLIENT_CACHE_SIZE,
+    SUPABASE_URL,
+    SUPABASE_ANON_KEY,
+    SUPABASE_AUTH_URL,
+    SUPABASE_REST_URL,
+    STORAGE_BACKEND,
+    DATABASE_URL,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_STATEMENT_CACHE_SIZE,
+)
+from repository import ItemRepository, ItemStorage
+from postgres_repository import PostgresItemRepository
+from cache import CachedItemRepository, build_list_cache
+from events import PublishingItemRepository, build_event_broker
+from suggest import SuggestIndexCache
+from sharing import build_list_access_cache
+from auth import (
+    AUTH_VERIFY_MODE,
+    SigningKeyUnavailable,
+    TokenVerificationError,
+    build_verifier,
+)
+from logger import get_logger
+from metrics import auth_duration, record_timing, track_upstream
+import importlib.util
+import os
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+from uuid import UUID
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = get_logger("auth")
 
 security = HTTPBearer()
 
 # TOGGLE: Set to True to use authenticated client, False for anon client
-USE_AUTHENTICATED_CLIENT = False
+# (env USE_AUTHENTICATED_CLIENT=true turns on RLS mode without a code change)
+USE_AUTHENTICATED_CLIENT = os.getenv("USE_AUTHENTICATED_CLIENT", "false").lower() == "true"
+
+# Shared in-process verifier (JWKS + verified-token cache live for the process lifetime)
+token_verifier = build_verifier(SUPABASE_URL)
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    supabase: Client = Depends(get_supabase)
 ) -> str:
     """
     Extract and verify user from Supabase JWT token.
     Returns the user's UUID.
-    
-    LOGGING STRATEGY:
-    - Step 1: Log token extraction
-    - Step 2: Log Supabase client type (anon vs authenticated)
-    - Step 3: Log auth verification result
-    - Step 4: Log user ID extraction
+
+    In local mode the token is verified in-process (signature, expiry,
+    audience, issuer) with no network call. Falls back to the remote
+    Supabase Auth check when AUTH_VERIFY_MODE=remote or when no local
+    signing key matches the token.
     """
-    token = credentials.credentials
-    
+    return await verify_request_token(request.scope, credentials.credentials)
+
+
+async def get_stream_user(
+    request: Request,
+    access_token: str = Query(..., description="Supabase access token"),
+) -> str:
+    """
+    Verify the user for GET /api/stream. EventSource can't set an
+    Authorization header, so the token comes in the query string.
+    """
+    return await verify_request_token(request.scope, access_token)
+
+
+async def verify_request_token(scope: Dict, token: str) -> str:
+    """
+    verify_access_token at most once per request. The rate limiter, the
+    idempotency middleware and the endpoint all need the user; the first to
+    ask verifies (and is timed), the others reuse the outcome - rejection
+    included - from scope["state"].
+    """
+    state = scope.setdefault("state", {})
+    verified = state.get("verified_token")
+    if verified is None or verified[0] != token:
+        try:
+            verified = (token, await verify_access_token(token), None)
+        except HTTPException as e:
+            verified = (token, None, e)
+        state["verified_token"] = verified
+    if verified[2] is not None:
+        raise verified[2]
+    return verified[1]
+
+
+async def verify_access_token(token: str) -> str:
+    """
+    Verify a Supabase access token and return the user's UUID.
+    Timed into auth_verification_duration_seconds and the "auth" Server-Timing phase.
+    """
+    start = time.perf_counter()
+    result = "rejected"
     try:
-        print(f"\n{'='*60}")
-        print(f"[AUTH STEP 1] Token extracted from request")
-        print(f"[AUTH STEP 1] Token length: {len(token)}")
-        print(f"[AUTH STEP 1] Token prefix: {token[:20]}...")
-        print(f"[AUTH STEP 1] Token suffix: ...{token[-20:]}")
-        
-        print(f"\n[AUTH STEP 2] Using Supabase client")
-        print(f"[AUTH STEP 2] USE_AUTHENTICATED_CLIENT: {USE_AUTHENTICATED_CLIENT}")
-        print(f"[AUTH STEP 2] Client type: {type(supabase)}")
-        print(f"[AUTH STEP 2] Client URL: {supabase.supabase_url}")
-        
-        print(f"\n[AUTH STEP 3] Verifying token with Supabase")
-        # Verify token and get user
-        response = supabase.auth.get_user(token)
-        
-        print(f"[AUTH STEP 3] Response type: {type(response)}")
-        print(f"[AUTH STEP 3] Response user: {response.user}")
-        
-        if not response.user:
-            print("[AUTH STEP 3] ❌ No user in response")
+        user_id = await _verify_access_token(token)
+        result = "ok"
+        return user_id
+    finally:
+        elapsed = time.perf_counter() - start
+        auth_duration.observe(AUTH_VERIFY_MODE, result, value=elapsed)
+        record_timing("auth", elapsed)
+
+
+async def _verify_access_token(token: str) -> str:
+    if AUTH_VERIFY_MODE == "local":
+        try:
+            claims = await token_verifier.verify(token)
+            return claims["sub"]
+        except TokenVerificationError as e:
+            logger.info("Local token verification failed: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication token"
+            )
+        except SigningKeyUnavailable as e:
+            logger.warning("%s - falling back to remote verification", e)
+
+    return await _verify_token_remote(token)
+
+
+async def _verify_token_remote(token: str) -> str:
+    """
+    Verify token by asking Supabase Auth (one network round trip per call).
+    Used when AUTH_VERIFY_MODE=remote or no local signing key is available.
+    """
+    try:
+        # Verify token and get user (same endpoint supabase.auth.get_user calls)
+        with track_upstream("auth", "GET /user"):
+            response = await get_http_client().get(
+                f"{SUPABASE_AUTH_URL}/user",
+                headers={"apikey": SUPABASE_ANON_KEY, "Authorization": f"Bearer {token}"},
+            )
+        user = response.json() if response.is_success else None
+
+        logger.debug("Remote token verification: HTTP %d", response.status_code)
+
+        if not user or not user.get("id"):
+            logger.info("Remote token verification failed: no user in response")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication token"
             )
-        
-        print(f"\n[AUTH STEP 4] ✅ User verified successfully")
-        print(f"[AUTH STEP 4] User ID: {response.user.id}")
-        print(f"[AUTH STEP 4] User email: {response.user.email}")
-        print(f"{'='*60}\n")
-        
-        return response.user.id
+
+        return user["id"]
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"\n[AUTH ERROR] ❌ Authentication failed")
-        print(f"[AUTH ERROR] Error type: {type(e)}")
-        print(f"[AUTH ERROR] Error message: {str(e)}")
-        print(f"[AUTH ERROR] Traceback:\n{traceback.format_exc()}")
-        print(f"{'='*60}\n")
+        logger.exception("Authentication failed")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Authentication failed: {str(e)}"
@@ -75,7 +169,7 @@ async def get_current_user(
 
 async def get_user_supabase_client(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> Client:
+) -> "Client":
     """
     Get authenticated Supabase client for the current user.
     This client will have proper auth.uid() context for RLS.
@@ -86,16 +180,157 @@ async def get_user_supabase_client(
     """
     token = credentials.credentials
     
-    print(f"\n[CLIENT FACTORY] Getting Supabase client")
-    print(f"[CLIENT FACTORY] USE_AUTHENTICATED_CLIENT: {USE_AUTHENTICATED_CLIENT}")
-    
     if USE_AUTHENTICATED_CLIENT:
-        print(f"[CLIENT FACTORY] Creating authenticated client with user token")
-        client = get_authenticated_supabase(token)
-        print(f"[CLIENT FACTORY] ✅ Returning authenticated client")
-        return client
+        return get_authenticated_supabase(token)
     else:
-        print(f"[CLIENT FACTORY] Using anon client (old behavior)")
-        client = get_supabase()
-        print(f"[CLIENT FACTORY] ✅ Returning anon client")
-        return client
\ No newline at end of file
+        return get_supabase()
+
+
+async def get_item_repository(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user_id: str = Depends(get_current_user),
+) -> ItemStorage:
+    """
+    Get the async grocery_items repository for the current request.
+
+    With STORAGE_BACKEND=postgres, queries go straight to Postgres over the
+    process-wide asyncpg pool (RLS context set per transaction). Otherwise
+    uses the user's token as the PostgREST bearer when USE_AUTHENTICATED_CLIENT
+    is True (RLS context), otherwise the anon key. Per-token handles are cached
+    until the token expires, and all of them share the process-wide HTTP
+    connection pool, so RLS mode costs the same as the anon client.
+
+    List reads go through the per-list cache (LIST_CACHE_* settings) and
+    mutations invalidate it. Successful mutations are published to the
+    list's connected /api/stream sessions.
+    """
+    if postgres_repository is not None:
+        repo = postgres_repository.for_user(user_id)
+    elif USE_AUTHENTICATED_CLIENT:
+        repo = _user_repositories.get(credentials.credentials)
+    else:
+        repo = _anon_repository
+
+    if list_cache is not None:
+        repo = CachedItemRepository(repo, list_cache)
+    return PublishingItemRepository(repo, event_broker)
+
+
+async def get_user_storage(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user_id: str = Depends(get_current_user),
+) -> ItemStorage:
+    """
+    Storage acting as the signed-in user, for membership checks and the
+    sharing endpoints. Always uses the user's own credentials - whatever
+    USE_AUTHENTICATED_CLIENT says - because the sharing functions act as
+    auth.uid() and list_members is only readable by its own members.
+    """
+    return _user_storage(credentials.credentials, user_id)
+
+
+async def get_list_id(
+    request: Request,
+    user_id: str = Depends(get_current_user),
+    storage: ItemStorage = Depends(get_user_storage),
+) -> str:
+    """
+    The list a request works on: the X-List-Id header, or the user's
+    personal list (list_id = user_id) when it's absent.
+
+    Any other list must have the user as a member - checked once per
+    LIST_ACCESS_CACHE_TTL_SECONDS through the membership cache (a
+    list_members primary key lookup on a miss). Unknown lists and lists the
+    user isn't in are both 404, so list ids can't be probed.
+    """
+    return await _check_list_access(request.headers.get("x-list-id"), user_id, storage)
+
+
+async def get_stream_list_id(
+    list_id: Optional[str] = Query(None, description="List to follow (default: personal list)"),
+    access_token: str = Query(..., description="Supabase access token"),
+    user_id: str = Depends(get_stream_user),
+) -> str:
+    """get_list_id() for GET /api/stream, which takes everything in the query string."""
+    return await _check_list_access(list_id, user_id, _user_storage(access_token, user_id))
+
+
+async def _check_list_access(list_id: Optional[str], user_id: str, storage: ItemStorage) -> str:
+    if not list_id or list_id == user_id:
+        return user_id
+    try:
+        list_id = str(UUID(list_id))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid list id")
+    if list_id == user_id:
+        return user_id
+
+    role = await list_access.get_role(user_id, list_id, lambda: storage.get_list_role(user_id, list_id))
+    if role is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="List not found")
+    return list_id
+
+
+async def still_list_member(list_id: str, user_id: str, access_token: str) -> bool:
+    """
+    Re-check an open /api/stream's membership (through the membership cache,
+    so another worker's removal is seen within LIST_ACCESS_CACHE_TTL_SECONDS).
+    """
+    if list_id == user_id:
+        return True
+    storage = _user_storage(access_token, user_id)
+    role = await list_access.get_role(user_id, list_id, lambda: storage.get_list_role(user_id, list_id))
+    return role is not None
+
+
+def _user_storage(access_token: str, user_id: str) -> ItemStorage:
+    if postgres_repository is not None:
+        return postgres_repository.for_user(user_id)
+    return _user_repositories.get(access_token)
+
+
+def _create_user_repository(access_token: str) -> ItemRepository:
+    return ItemRepository(
+        get_http_client,
+        SUPABASE_REST_URL,
+        SUPABASE_ANON_KEY,
+        access_token=access_token,
+    )
+
+
+def build_postgres_repository() -> Optional[PostgresItemRepository]:
+    if STORAGE_BACKEND != "postgres":
+        return None
+    if not DATABASE_URL:
+        raise ValueError("STORAGE_BACKEND=postgres requires DATABASE_URL")
+    # Fail at startup, not on the first request (asyncpg is imported on first use)
+    if importlib.util.find_spec("asyncpg") is None:
+        raise ImportError("STORAGE_BACKEND=postgres requires asyncpg: pip install asyncpg")
+    return PostgresItemRepository(
+        DATABASE_URL,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+    )
+
+
+# Repository handles only hold headers - the connection pool is shared
+_anon_repository = ItemRepository(get_http_client, SUPABASE_REST_URL, SUPABASE_ANON_KEY)
+_user_repositories: TokenClientCache[ItemRepository] = TokenClientCache(
+    _create_user_repository, max_size=TOKEN_CLIENT_CACHE_SIZE
+)
+
+# Process-wide direct Postgres storage (None unless STORAGE_BACKEND=postgres)
+postgres_repository = build_postgres_repository()
+
+# Process-wide per-user list cache (None when LIST_CACHE_ENABLED=false)
+list_cache = build_list_cache()
+
+# Process-wide change event pub/sub for /api/stream (EVENTS_BACKEND settings)
+event_broker = build_event_broker()
+
+# Process-wide per-list name indexes for GET /api/items/suggest
+suggest_indexes = SuggestIndexCache()
+
+# Process-wide cache of confirmed shared-list memberships (LIST_ACCESS_CACHE_* settings)
+list_access = build_list_access_cache()
@@ -0,0 +1,313 @@
+import asyncio
+import importlib.util
+import json
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+from logger import get_logger
+
+logger = get_logger("events")
+
+# Change events pushed to connected sessions over GET /api/stream.
+# "memory": in-process fan-out (single instance)
+# "postgres": LISTEN/NOTIFY through DATABASE_URL so every instance sees every
+#             change (requires `pip install asyncpg`)
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory").lower()
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Events buffered per connection before it's considered too slow to keep up
+SUBSCRIBER_QUEUE_SIZE = 100
+
+NOTIFY_CHANNEL = "grocery_item_events"
+
+
+class Subscription:
+    """One connected session's event queue."""
+
+    def __init__(self, broker: "EventBroker", list_id: str, user_id: Optional[str] = None):
+        self.broker = broker
+        self.list_id = list_id
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+        self.ended: Optional[str] = None
+
+    def deliver(self, event: Dict) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog - the client does a full resync instead
+            self.overflowed = True
+
+    def end(self, reason: str = "reconnect") -> None:
+        """
+        Ask the connection to close; get() returns a `reason` event from now on:
+        "reconnect" (server shutdown, LISTEN failed) or "removed" (user left the list).
+        """
+        self.ended = reason
+        try:
+            self.queue.put_nowait({"type": reason})
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self) -> Dict:
+        if self.ended:
+            return {"type": self.ended}
+        if self.overflowed and self.queue.empty():
+            self.overflowed = False
+            return {"type": "resync"}
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """In-process pub/sub: publish(list_id, event) fans out to the sessions open on that list."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, list_id: str, user_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(self, list_id, user_id)
+        self._subscribers.setdefault(list_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.list_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.list_id]
+
+    async def publish(self, list_id: str, event: Dict) -> None:
+        self._fan_out(list_id, event)
+
+    def _fan_out(self, list_id: str, event: Dict) -> None:
+        for subscription in list(self._subscribers.get(list_id, ())):
+            subscription.deliver(event)
+
+    def disconnect_member(self, list_id: str, user_id: str) -> None:
+        """End a user's subscriptions on a list they were removed from (this instance)."""
+        for subscription in list(self._subscribers.get(list_id, ())):
+            if subscription.user_id == user_id:
+                subscription.end("removed")
+
+    def disconnect_all(self) -> None:
+        """End every open subscription on this instance (worker draining)."""
+        for subscriptions in list(self._subscribers.values()):
+            for subscription in list(subscriptions):
+                subscription.end()
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict:
+        return {
+            "backend": type(self).__name__,
+            "lists": len(self._subscribers),
+            "connections": sum(len(subs) for subs in self._subscribers.values()),
+        }
+
+
+class PostgresEventBroker(EventBroker):
+    """
+    Multi-instance broker over Postgres LISTEN/NOTIFY.
+
+    publish() sends NOTIFY; every instance (this one included) receives it on
+    its LISTEN connection and fans out to its own local sessions.
+
+    NOTIFY goes over a second connection: an asyncpg connection runs one
+    query at a time, so sharing the LISTEN one made concurrent publishes fail
+    with "another operation is in progress". Publishes on it are serialized
+    (pg_notify is a sub-millisecond call).
+    """
+
+    def __init__(self, database_url: str):
+        super().__init__()
+        self.database_url = database_url
+        self._connection = None
+        self._connect_lock = asyncio.Lock()
+        self._publish_connection = None
+        self._publish_lock = asyncio.Lock()
+        # LISTEN (re)connects started by subscribe(), referenced until done
+        self._listen_tasks: Set[asyncio.Task] = set()
+
+    async def _get_connection(self):
+        async with self._connect_lock:
+            if self._connection is None or self._connection.is_closed():
+                import asyncpg
+
+                self._connection = await asyncpg.connect(self.database_url)
+                await self._connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+            return self._connection
+
+    async def start(self) -> None:
+        await self._get_connection()
+
+    def subscribe(self, list_id: str, user_id: Optional[str] = None) -> Subscription:
+        subscription = super().subscribe(list_id, user_id)
+        # Start listening on first use (reconnects if the connection dropped)
+        task = asyncio.ensure_future(self._get_connection())
+        self._listen_tasks.add(task)
+        task.add_done_callback(lambda done: self._on_listen_done(done, subscription))
+        return subscription
+
+    def _on_listen_done(self, task: asyncio.Task, subscription: Subscription) -> None:
+        self._listen_tasks.discard(task)
+        error = None if task.cancelled() else task.exception()
+        if task.cancelled() or error is not None:
+            # Without LISTEN this subscriber would never get an event - the
+            # client reconnects (and retries LISTEN) after the stream's `retry`
+            logger.warning("LISTEN connection failed: %s", error or "cancelled")
+            subscription.end()
+
+    async def publish(self, list_id: str, event: Dict) -> None:
+        payload = json.dumps({"list_id": list_id, "event": event})
+        async with self._publish_lock:
+            if self._publish_connection is None or self._publish_connection.is_closed():
+                import asyncpg
+
+                self._publish_connection = await asyncpg.connect(self.database_url)
+            await self._publish_connection.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, payload)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        message = json.loads(payload)
+        self._fan_out(message["list_id"], message["event"])
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+        if self._publish_connection is not None:
+            await self._publish_connection.close()
+            self._publish_connection = None
+
+
+class PublishingItemRepository:
+    """
+    Repository wrapper that publishes an item-level event for every
+    successful mutation:
+
+    - {"type": "upsert", "item": {...}}
+    - {"type": "delete", "item_id": "...", "list_type": "..."}
+    """
+
+    def __init__(self, repo, broker: EventBroker):
+        self.repo = repo
+        self.broker = broker
+
+    async def list_items(self, list_id: str, list_type: str) -> List[Dict]:
+        return await self.repo.list_items(list_id, list_type)
+
+    async def list_items_page(
+        self,
+        list_id: str,
+        list_type: str,
+        limit: int,
+        after: Optional[Dict] = None,
+        columns: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        return await self.repo.list_items_page(list_id, list_type, limit, after, columns)
+
+    async def list_all_items(self, list_id: str) -> Tuple[List[Dict], str]:
+        return await self.repo.list_all_items(list_id)
+
+    async def list_version(self, list_id: str) -> str:
+        return await self.repo.list_version(list_id)
+
+    async def list_changes(self, list_id: str, since: str) -> Tuple[List[Dict], List[Dict]]:
+        return await self.repo.list_changes(list_id, since)
+
+    async def insert_item(self, item_data: Dict) -> Optional[Dict]:
+        item = await self.repo.insert_item(item_data)
+        if item:
+            await self._publish(item_data["list_id"], [_upsert(item)])
+        return item
+
+    async def insert_items(self, list_id: str, user_id: str, items: List[Dict]) -> List[Dict]:
+        rows = await self.repo.insert_items(list_id, user_id, items)
+        await self._publish(list_id, [_upsert(row) for row in rows])
+        return rows
+
+    async def toggle_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        item = await self.repo.toggle_item(list_id, item_id)
+        if item:
+            await self._publish(list_id, [_upsert(item)])
+        return item
+
+    async def toggle_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        rows = await self.repo.toggle_items(list_id, item_ids)
+        await self._publish(list_id, [_upsert(row) for row in rows])
+        return rows
+
+    async def move_item(self, list_id: str, item_id: str, to_list: str) -> Dict:
+        result = await self.repo.move_item(list_id, item_id, to_list)
+        await self._publish(list_id, _move_events(result, item_id))
+        return result
+
+    async def move_items(self, list_id: str, item_ids: List[str], to_list: str) -> List[Dict]:
+        results = await self.repo.move_items(list_id, item_ids, to_list)
+        events = []
+        for result in results:
+            events.extend(_move_events(result, result["item_id"]))
+        await self._publish(list_id, events)
+        return results
+
+    async def delete_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        item = await self.repo.delete_item(list_id, item_id)
+        if item:
+            await self._publish(list_id, [_delete(item)])
+        return item
+
+    async def delete_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        rows = await self.repo.delete_items(list_id, item_ids)
+        await self._publish(list_id, [_delete(row) for row in rows])
+        return rows
+
+    async def list_purchase_stats(self, list_id: str) -> List[Dict]:
+        return await self.repo.list_purchase_stats(list_id)
+
+    async def _publish(self, list_id: str, events: List[Dict]) -> None:
+        # Never fail a mutation that already succeeded because a push failed
+        for event in events:
+            try:
+                await self.broker.publish(list_id, event)
+            except Exception as e:
+                logger.warning("Failed to publish %s event: %s", event["type"], e)
+
+
+def _upsert(item: Dict) -> Dict:
+    return {"type": "upsert", "item": item}
+
+
+def _delete(item: Dict) -> Dict:
+    return {"type": "delete", "item_id": item["item_id"], "list_type": item["list_type"]}
+
+
+def _move_events(result: Dict, source_item_id: str) -> List[Dict]:
+    if result["status"] != "moved":
+        return []
+    # Source list is the opposite of the new row's list
+    source_list = "items" if result["item"]["list_type"] == "to_buy" else "to_buy"
+    return [
+        {"type": "delete", "item_id": source_item_id, "list_type": source_list},
+        _upsert(result["item"]),
+    ]
+
+
+def build_event_broker() -> EventBroker:
+    """Create the process-wide event broker from environment config."""
+    if EVENTS_BACKEND == "postgres":
+        if not DATABASE_URL:
+            raise ValueError("EVENTS_BACKEND=postgres requires DATABASE_URL")
+        # Fail at startup, not on the first stream (asyncpg is imported on first use)
+        if importlib.util.find_spec("asyncpg") is None:
+            raise ImportError("EVENTS_BACKEND=postgres requires asyncpg: pip install asyncpg")
+        return PostgresEventBroker(DATABASE_URL)
+    return EventBroker()
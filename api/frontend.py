@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import html
+import json
+import os
+import threading
+from typing import Dict, Optional, Set
+
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+
+from database import SUPABASE_URL, SUPABASE_ANON_KEY
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+INDEX_HTML = os.path.join(STATIC_DIR, "index.html")
+SERVICE_WORKER_JS = os.path.join(STATIC_DIR, "sw.js")
+
+# Replaced in index.html with the inline config script + preconnect hint
+CONFIG_PLACEHOLDER = "<!--APP_CONFIG-->"
+
+# The HTML and service worker change on every deploy: always revalidate, the
+# ETag makes that a 304
+PAGE_CACHE_CONTROL = "no-cache"
+
+# API responses smaller than this go out uncompressed (not worth the CPU)
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+# Paths the compression middleware leaves alone: the page picks its own
+# precompressed variant, and each SSE event has to reach the client as soon
+# as it's written
+UNCOMPRESSED_PATHS = {"/", "/sw.js", "/api/stream"}
+
+_page: Optional["FrontendPage"] = None
+_service_worker: Optional["FrontendPage"] = None
+_page_lock = threading.Lock()
+
+
+class FrontendPage:
+    """
+    A static frontend file (index.html with the frontend config inlined, or
+    the service worker), held in memory with its gzip (and brotli, when the
+    `brotli` package is installed) variants compressed once at maximum level.
+    """
+
+    def __init__(self, page: str, media_type: str = "text/html; charset=utf-8"):
+        self.media_type = media_type
+        body = page.encode()
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # encoding -> (body, strong ETag); each encoding is its own representation
+        self.variants: Dict[str, tuple] = {
+            "identity": (body, f'"{digest}"'),
+            "gzip": (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gzip"'),
+        }
+        try:
+            import brotli
+
+            self.variants["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+        except ImportError:
+            pass
+        self._etags = {etag for _, etag in self.variants.values()}
+
+    @classmethod
+    def load(cls, path: str, config: Optional[Dict] = None, media_type: str = "text/html; charset=utf-8") -> "FrontendPage":
+        with open(path, encoding="utf-8") as f:
+            template = f.read()
+        if config is not None:
+            template = template.replace(CONFIG_PLACEHOLDER, _config_tags(config), 1)
+        return cls(template, media_type)
+
+    def response(self, if_none_match: Optional[str], accept_encoding: Optional[str]) -> Response:
+        encoding = _choose_encoding(accept_encoding, self.variants)
+        body, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        if if_none_match and (if_none_match.strip() == "*" or self._etags & _parse_etags(if_none_match)):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=self.media_type, headers=headers)
+
+
+def get_frontend_page() -> FrontendPage:
+    """The page for this process, built on first use (worker startup warms it)."""
+    global _page
+    with _page_lock:
+        if _page is None:
+            _page = FrontendPage.load(INDEX_HTML, {
+                "supabase_url": SUPABASE_URL,
+                "supabase_anon_key": SUPABASE_ANON_KEY,
+            })
+        return _page
+
+
+def get_service_worker() -> FrontendPage:
+    """sw.js for this process, built on first use like the page."""
+    global _service_worker
+    with _page_lock:
+        if _service_worker is None:
+            _service_worker = FrontendPage.load(SERVICE_WORKER_JS, media_type="text/javascript; charset=utf-8")
+        return _service_worker
+
+
+class ApiGZipMiddleware(GZipMiddleware):
+    """GZip for responses of at least GZIP_MIN_SIZE bytes, except UNCOMPRESSED_PATHS."""
+
+    def __init__(self, app):
+        super().__init__(app, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+def _config_tags(config: Dict) -> str:
+    # "<" escaped so a value can never close the script element
+    payload = json.dumps(config).replace("<", "\\u003c")
+    return (
+        f'<link rel="preconnect" href="{html.escape(config["supabase_url"])}" crossorigin>\n'
+        f"    <script>window.APP_CONFIG = {payload};</script>"
+    )
+
+
+def _choose_encoding(accept_encoding: Optional[str], variants: Dict) -> str:
+    accepted = _accepted_encodings(accept_encoding or "")
+    for encoding in ("br", "gzip"):
+        if encoding in variants and encoding in accepted:
+            return encoding
+    return "identity"
+
+
+def _accepted_encodings(header: str) -> Set[str]:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                pass
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _parse_etags(header: str) -> Set[str]:
+    # Weak validators (W/"...") match too - If-None-Match uses weak comparison
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
@@ -0,0 +1,79 @@
+"""
+Production server config: gunicorn managing uvicorn worker processes.
+
+    cd api && gunicorn main:app -c gunicorn.conf.py
+
+Each worker runs the app's lifespan, so it opens (and on shutdown closes) its
+own HTTP/Postgres pools. uvicorn uses uvloop and httptools when installed
+(`uvicorn[standard]`) and falls back to asyncio/h11 otherwise.
+"""
+import logging
+import os
+
+logger = logging.getLogger("gunicorn.error")
+
+
+def _cpu_count() -> int:
+    # CPUs this process may run on (container CPU sets), not the host total
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _worker_count() -> int:
+    """
+    WEB_CONCURRENCY if set, otherwise one async worker per CPU (capped by
+    WEB_MAX_WORKERS).
+
+    The in-memory list cache and event fan-out are per process: with several
+    workers, a change made through one worker leaves the others serving a
+    stale list (up to LIST_CACHE_TTL_SECONDS) and misses their /api/stream
+    sessions. The CPU-derived default therefore only applies once both are
+    shared (LIST_CACHE_REDIS_URL or LIST_CACHE_ENABLED=false, and
+    EVENTS_BACKEND=postgres); until then it stays at one worker.
+    """
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(int(configured), 1)
+
+    cache_shared = (
+        os.getenv("LIST_CACHE_ENABLED", "true").lower() != "true"
+        or bool(os.getenv("LIST_CACHE_REDIS_URL"))
+    )
+    events_shared = os.getenv("EVENTS_BACKEND", "memory").lower() == "postgres"
+    if not (cache_shared and events_shared):
+        return 1
+    return max(min(_cpu_count(), int(os.getenv("WEB_MAX_WORKERS", "8"))), 1)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = _worker_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers import the app themselves (no preload): pools, locks and caches are
+# created inside each worker's own event loop
+preload_app = False
+
+# On SIGTERM a worker stops accepting connections and drains (see
+# lifecycle.py); after this many seconds the master kills it
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30"))
+# A worker that doesn't heartbeat for this long is restarted
+timeout = int(os.getenv("WORKER_TIMEOUT_SECONDS", "60"))
+# Idle keep-alive connections (Railway's proxy reuses them)
+keepalive = int(os.getenv("KEEPALIVE_SECONDS", "5"))
+
+# The app writes its own structured access log (logger.RequestLogMiddleware)
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "INFO").lower()
+
+
+def when_ready(server):
+    logger.info("Starting %d worker(s)", workers)
+    if workers > 1 and not os.getenv("LIST_CACHE_REDIS_URL") and os.getenv("LIST_CACHE_ENABLED", "true").lower() == "true":
+        logger.warning("Multiple workers with the in-memory list cache: lists can be stale across workers")
+    if workers > 1 and os.getenv("EVENTS_BACKEND", "memory").lower() != "postgres":
+        logger.warning("Multiple workers with EVENTS_BACKEND=memory: /api/stream misses changes from other workers")
+    if workers > 1 and not (os.getenv("RATE_LIMIT_REDIS_URL") or os.getenv("LIST_CACHE_REDIS_URL")):
+        logger.warning("Multiple workers with in-memory rate limits: each worker allows the full rate")
@@ -0,0 +1,204 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from cache import CacheBackend, MemoryCacheBackend, RedisCacheBackend, LIST_CACHE_REDIS_URL
+from metrics import idempotency_requests
+
+# How long a stored result answers retries carrying the same Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+# Share stored results across workers (defaults to the list cache's Redis)
+IDEMPOTENCY_REDIS_URL = os.getenv("IDEMPOTENCY_REDIS_URL") or LIST_CACHE_REDIS_URL
+
+MUTATION_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+KEY_PATTERN = re.compile(r"^[\x21-\x7e]{1,255}$")
+REPLAY_HEADER = b"idempotent-replayed"
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware honoring the `Idempotency-Key` header on mutation
+    requests (POST/PUT/PATCH/DELETE under /api/).
+
+    The first request with a key runs normally; its response (anything but
+    a 5xx) is stored for IDEMPOTENCY_TTL_SECONDS and replayed, with an
+    `Idempotent-Replayed: true` header, to later requests with the same key.
+    Identical requests arriving while the first is still running wait for
+    it instead of reaching the database. Reusing a key for a different
+    method, path or body is a 422.
+
+    Keys are scoped per user: the bearer token is verified (once per request,
+    shared with the endpoint - see verify_request_token) so a refreshed token still matches
+    earlier attempts. Requests without a valid token pass through untouched
+    and get the endpoint's own 401.
+    """
+
+    def __init__(self, app, store: CacheBackend, resolve_user: Callable[[Dict, str], Awaitable[str]]):
+        self.app = app
+        self.store = store
+        self.resolve_user = resolve_user
+        # cache key -> (request fingerprint, future resolved with the stored record or None)
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATION_METHODS or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        key = headers.get(b"idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        key = key.decode("latin-1")
+        if not KEY_PATTERN.match(key):
+            await _send_json(send, 400, {"detail": "Idempotency-Key must be 1-255 visible ASCII characters"})
+            return
+
+        user_id = await self._user_id(scope, headers.get(b"authorization", b"").decode("latin-1"))
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        fingerprint = _fingerprint(scope, body)
+        cache_key = f"{user_id}:{key}"
+
+        while True:
+            record = await self.store.get(cache_key)
+            if record is not None:
+                if record["fingerprint"] != fingerprint:
+                    await self._reject_reuse(send)
+                    return
+                idempotency_requests.inc("replayed")
+                await _replay(send, record)
+                return
+
+            inflight = self._inflight.get(cache_key)
+            if inflight is None:
+                break
+            if inflight[0] != fingerprint:
+                await self._reject_reuse(send)
+                return
+            # Same request already running: wait for its result
+            record = await asyncio.shield(inflight[1])
+            if record is not None:
+                idempotency_requests.inc("coalesced")
+                await _replay(send, record)
+                return
+            # The first attempt failed (5xx) - loop round and run it ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = (fingerprint, future)
+        record = None
+        try:
+            record = await self._execute(scope, _replay_receive(body, receive), send, fingerprint)
+            if record is not None:
+                await self.store.set(cache_key, record, IDEMPOTENCY_TTL_SECONDS)
+            idempotency_requests.inc("executed")
+        finally:
+            del self._inflight[cache_key]
+            future.set_result(record)
+
+    async def _user_id(self, scope, authorization: str) -> Optional[str]:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            return await self.resolve_user(scope, token)
+        except HTTPException:
+            return None
+
+    async def _execute(self, scope, receive, send, fingerprint: str) -> Optional[Dict]:
+        """Run the request, forwarding the response and returning it as a storable record."""
+        start: Dict = {}
+        chunks: List[bytes] = []
+
+        async def send_and_capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
+
+        if not start or start["status"] >= 500:
+            return None
+        return {
+            "fingerprint": fingerprint,
+            "status": start["status"],
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in start.get("headers", [])],
+            "body": base64.b64encode(b"".join(chunks)).decode(),
+        }
+
+    async def _reject_reuse(self, send) -> None:
+        idempotency_requests.inc("conflict")
+        await _send_json(send, 422, {"detail": "Idempotency-Key was already used for a different request"})
+
+
+def build_idempotency_store() -> CacheBackend:
+    """Create the process-wide result store from environment config."""
+    if IDEMPOTENCY_REDIS_URL:
+        return RedisCacheBackend(IDEMPOTENCY_REDIS_URL, prefix="grocery:idempotency:")
+    return MemoryCacheBackend(max_entries=IDEMPOTENCY_MAX_ENTRIES)
+
+
+def _fingerprint(scope, body: bytes) -> str:
+    # The same key reused on another list (X-List-Id) is a different request
+    list_id = dict(scope["headers"]).get(b"x-list-id", b"")
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), list_id, body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_receive(body: bytes, receive):
+    """receive() that hands the app the already-read body, then defers to the server."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+async def _replay(send, record: Dict) -> None:
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]]
+    headers.append((REPLAY_HEADER, b"true"))
+    await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": base64.b64decode(record["body"])})
+
+
+async def _send_json(send, status_code: int, payload: Dict) -> None:
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
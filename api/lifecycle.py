@@ -0,0 +1,134 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from logger import get_logger
+
+logger = get_logger("lifecycle")
+
+# Signals that start a graceful shutdown (gunicorn sends SIGTERM to each
+# worker, uvicorn on its own stops on either)
+DRAIN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+# /api/ready re-checks backend reachability at most this often, and gives
+# each backend this long to answer
+READINESS_CHECK_INTERVAL_SECONDS = float(os.getenv("READINESS_CHECK_INTERVAL_SECONDS", "5"))
+READINESS_CHECK_TIMEOUT_SECONDS = float(os.getenv("READINESS_CHECK_TIMEOUT_SECONDS", "2"))
+
+_ready = False
+_draining = False
+_drain_callbacks: List[Callable[[], None]] = []
+
+
+def is_ready() -> bool:
+    """True once startup warm-up finished, until draining starts."""
+    return _ready and not _draining
+
+
+def is_draining() -> bool:
+    return _draining
+
+
+def mark_ready() -> None:
+    global _ready
+    _ready = True
+
+
+def on_drain(callback: Callable[[], None]) -> None:
+    """Run `callback` (on the event loop) when this worker starts draining."""
+    _drain_callbacks.append(callback)
+
+
+def start_draining() -> None:
+    """
+    Stop reporting ready and let long-lived work wind down (idempotent).
+
+    The server finishes in-flight requests on its own, but /api/stream
+    connections never finish by themselves - the drain callbacks end them so
+    clients reconnect to another worker instead of being cut off at the
+    graceful timeout.
+    """
+    global _draining
+    if _draining:
+        return
+    _draining = True
+    logger.info("Draining")
+    for callback in _drain_callbacks:
+        try:
+            callback()
+        except Exception:
+            logger.exception("Drain callback failed")
+
+
+def install_drain_handlers(loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Start draining as soon as a shutdown signal arrives, before the server
+    waits for open connections to close.
+
+    Chains to the handler already installed (uvicorn's), so the server's own
+    shutdown runs unchanged. Only possible from the main thread; elsewhere
+    (e.g. TestClient) draining starts at lifespan shutdown instead.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    for sig in DRAIN_SIGNALS:
+        previous = signal.getsignal(sig)
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(start_draining)
+            if callable(previous):
+                previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+class BackendCheck:
+    """
+    Cached reachability check of the backends requests depend on.
+
+    `checks` maps a backend name to a coroutine function that raises when the
+    backend can't be reached. Results are reused for `interval_seconds` and
+    concurrent callers share one round of checks, so probes hitting several
+    workers every second don't each cost a round trip to Supabase.
+    """
+
+    def __init__(
+        self,
+        checks: Dict[str, Callable[[], Awaitable[None]]],
+        interval_seconds: float = 5,
+        timeout_seconds: float = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.checks = checks
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self._results: Optional[Dict[str, str]] = None
+        self._checked_at = 0.0
+
+    async def results(self) -> Dict[str, str]:
+        """Backend name -> "ok", "timeout" or the error type, checked in parallel."""
+        async with self._lock:
+            if self._results is None or self._clock() - self._checked_at >= self.interval_seconds:
+                names = list(self.checks)
+                outcomes = await asyncio.gather(*(self._run(name) for name in names))
+                self._results = dict(zip(names, outcomes))
+                self._checked_at = self._clock()
+            return self._results
+
+    async def _run(self, name: str) -> str:
+        try:
+            await asyncio.wait_for(self.checks[name](), self.timeout_seconds)
+            return "ok"
+        except asyncio.TimeoutError:
+            logger.warning("Readiness check timed out", extra={"backend": name})
+            return "timeout"
+        except Exception as e:
+            # Only the error type is reported - /api/ready is public
+            logger.warning("Readiness check failed", extra={"backend": name, "error": str(e)})
+            return type(e).__name__
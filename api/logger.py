@@ -0,0 +1,200 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+# DEBUG adds per-step detail (request payloads, auth steps); off by default
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" (default): one JSON object per line; "text": human-readable for local dev
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Records buffered for the writer thread; beyond this they're dropped, never waited on
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# All application loggers live under this name (grocery.main, grocery.auth, ...)
+ROOT_LOGGER = "grocery"
+
+# Correlation id of the request being handled ("-" outside a request)
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Incoming X-Request-ID values are reused only if they look like an id
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attributes every LogRecord has - anything else came in through extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+_handler: Optional["NonBlockingQueueHandler"] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, request_id, message + extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """`time LEVEL logger [request_id] message key=value ...` for local development."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", "-")
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without formatting or blocking.
+
+    Only the request id (a contextvar, gone once we leave this context) is
+    captured on the calling side; formatting and the stdout write happen on
+    the QueueListener thread. A full queue drops the record and counts it.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+def setup_logging() -> None:
+    """Attach the queue handler + background writer to the app's root logger (once)."""
+    global _handler, _listener
+    if _handler is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    # Flush what's still queued on interpreter exit
+    atexit.register(shutdown_logging)
+
+    _handler = NonBlockingQueueHandler(log_queue)
+    app_logger = logging.getLogger(ROOT_LOGGER)
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.addHandler(_handler)
+    app_logger.propagate = False
+
+
+def shutdown_logging() -> None:
+    """
+    Write out queued records and stop the writer thread. Records logged after
+    this (late stream closes, atexit) are written directly instead of being
+    queued with nothing left to write them.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        app_logger = logging.getLogger(ROOT_LOGGER)
+        app_logger.removeHandler(_handler)
+        for output in _listener.handlers:
+            app_logger.addHandler(output)
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for one module, e.g. get_logger("auth") -> "grocery.auth"."""
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def dropped_records() -> int:
+    """Records dropped because the writer thread fell behind."""
+    return _handler.dropped if _handler is not None else 0
+
+
+class RequestLogMiddleware:
+    """
+    ASGI middleware: assigns each request a correlation id (the incoming
+    X-Request-ID if it looks like one, otherwise a new one), returns it in the
+    X-Request-ID response header and logs one access line per request.
+
+    Paths are logged without the query string (/api/stream carries the
+    access token there).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = get_logger("access")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _incoming_request_id(scope) or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            self.logger.info(
+                "%s %s %s", scope["method"], scope["path"], status_code,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                },
+            )
+            request_id_var.reset(token)
+
+
+def _incoming_request_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"x-request-id":
+            request_id = value.decode("latin-1")
+            return request_id if _REQUEST_ID_PATTERN.match(request_id) else None
+    return None
@@ -1,27 +1,211 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
-from supabase import Client
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from uuid import UUID
-from typing import List, Dict
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional
+import asyncio
+import base64
+import httpx
+import json
 import os
 
-from database import get_supabase, SUPABASE_URL, SUPABASE_ANON_KEY
-from dependencies import get_current_user
-from models import ItemCreateRequest, ItemMoveRequest, ItemResponse, ErrorResponse
+import metrics
+from metrics import MetricsMiddleware
+from logger import RequestLogMiddleware, dropped_records, get_logger, shutdown_logging
+from database import (
+    get_http_client,
+    close_http_client,
+    supabase_client_loaded,
+    SUPABASE_URL,
+    SUPABASE_ANON_KEY,
+    SUPABASE_AUTH_URL,
+)
+from dependencies import (
+    AUTH_VERIFY_MODE,
+    get_current_user,
+    get_item_repository,
+    get_list_id,
+    get_stream_list_id,
+    get_stream_user,
+    still_list_member,
+    get_user_storage,
+    list_access,
+    list_cache,
+    event_broker,
+    postgres_repository,
+    suggest_indexes,
+    token_verifier,
+    verify_request_token,
+)
+from frontend import ApiGZipMiddleware, get_frontend_page, get_service_worker
+from idempotency import IdempotencyMiddleware, build_idempotency_store
+from ratelimit import RATE_LIMIT_ENABLED, RateLimitMiddleware, build_rate_limit_store
+import lifecycle
+from repository import ItemStorage, DuplicateItemError, PAGE_KEYS
+from sharing import LIST_INVITE_TTL_SECONDS
+from suggest import SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT, normalize_name
+from models import (
+    ItemCreateRequest,
+    ItemMoveRequest,
+    ItemResponse,
+    ListsResponse,
+    ChangesResponse,
+    SuggestResponse,
+    InsightsResponse,
+    SharedList,
+    SharedListsResponse,
+    SharedListCreateRequest,
+    ListInviteResponse,
+    ListJoinRequest,
+    ListJoinResponse,
+    ItemBatchCreateRequest,
+    ItemBatchRequest,
+    ItemBatchMoveRequest,
+    BatchItemResult,
+    BatchResponse,
+    ErrorResponse,
+)
+
+logger = get_logger("main")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per-worker startup and shutdown. Each worker process opens its own HTTP
+    and Postgres pools here and reports ready (GET /api/ready) only once
+    they're warm. On SIGTERM it stops reporting ready, ends /api/stream
+    connections, lets in-flight requests finish, then closes the pools.
+    """
+    lifecycle.on_drain(event_broker.disconnect_all)
+    lifecycle.install_drain_handlers(asyncio.get_running_loop())
+    await warm_up()
+    lifecycle.mark_ready()
+    logger.info("Worker ready", extra={"pid": os.getpid(), "loop": type(asyncio.get_running_loop()).__module__})
+    try:
+        yield
+    finally:
+        try:
+            lifecycle.start_draining()
+            await close_http_client()
+            if postgres_repository is not None:
+                await postgres_repository.close()
+            await event_broker.close()
+            logger.info("Worker stopped", extra={"pid": os.getpid()})
+        finally:
+            # Last, even if a close failed, so everything above is written out
+            shutdown_logging()
+
+
+async def warm_up() -> None:
+    """
+    Open connections before the first request instead of during it: the
+    shared HTTP pool (TCP + TLS to Supabase), the Postgres pool and LISTEN
+    connection when configured, and the JWKS signing keys.
+
+    Supabase being briefly unreachable only costs the warm-up (logged); a
+    Postgres pool that can't be created fails startup.
+    """
+    async def warm_http() -> None:
+        try:
+            # Any response leaves a kept-alive connection in the pool
+            await ping_supabase()
+        except httpx.HTTPError as e:
+            logger.warning("HTTP pool warm-up failed: %s", e)
+
+    tasks = [
+        warm_http(),
+        event_broker.start(),
+        asyncio.to_thread(get_frontend_page),
+        asyncio.to_thread(get_service_worker),
+    ]
+    if AUTH_VERIFY_MODE == "local":
+        tasks.append(token_verifier.prefetch_keys())
+    if postgres_repository is not None:
+        tasks.append(postgres_repository.get_pool())
+    await asyncio.gather(*tasks)
+    # First /api/ready answers from this instead of waiting on its own round trip
+    await backend_check.results()
+
+
+async def ping_supabase() -> None:
+    """Supabase Auth health endpoint over the shared pool (raises on 5xx or no answer)."""
+    response = await get_http_client().get(f"{SUPABASE_AUTH_URL}/health", headers={"apikey": SUPABASE_ANON_KEY})
+    if response.status_code >= 500:
+        response.raise_for_status()
+
+
+# Backends /api/ready requires to be reachable
+backend_checks = {"supabase": ping_supabase}
+if postgres_repository is not None:
+    backend_checks["postgres"] = postgres_repository.ping
+backend_check = lifecycle.BackendCheck(
+    backend_checks,
+    interval_seconds=lifecycle.READINESS_CHECK_INTERVAL_SECONDS,
+    timeout_seconds=lifecycle.READINESS_CHECK_TIMEOUT_SECONDS,
+)
+
 
 app = FastAPI(
     title="Grocery List MVP",
     description="Zero-friction grocery list management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+
 # Serve static files
 @app.get("/")
-async def serve_frontend():
-    """Serve the frontend HTML"""
-    return FileResponse("static/index.html")
+async def serve_frontend(request: Request):
+    """
+    Serve the frontend HTML from memory, with the /api/config values inlined
+    so the page can start auth without another request. Precompressed
+    (brotli/gzip), with a strong ETag so repeat visits get a 304.
+    """
+    return get_frontend_page().response(
+        request.headers.get("if-none-match"),
+        request.headers.get("accept-encoding"),
+    )
+
+
+@app.get("/sw.js")
+async def serve_service_worker(request: Request):
+    """
+    Serve the service worker that keeps the app shell available offline.
+    Revalidated on every check like the page, so browsers pick up a new
+    version on the next launch.
+    """
+    return get_service_worker().response(
+        request.headers.get("if-none-match"),
+        request.headers.get("accept-encoding"),
+    )
+
+# User-facing list names for conflict messages
+LIST_NAMES = {
+    'items': 'inventory',
+    'to_buy': 'shopping list'
+}
+
+# Delta sync: re-send changes this close to the cursor in case a transaction
+# committed after a later-stamped one was already returned
+SYNC_OVERLAP_SECONDS = 5
+# Cursors older than this get a full snapshot (tombstones are pruned after it)
+TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+
+# GET /api/insights: items returned per section by default, and the cap on ?limit=
+INSIGHTS_DEFAULT_LIMIT = 20
+INSIGHTS_MAX_LIMIT = 200
+
+# GET /api/items pagination: page size when only ?cursor= is given, and the cap on ?limit=
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Columns accepted by ?fields=
+ITEM_FIELDS = list(ItemResponse.model_fields)
+
+# Comment line sent on idle /api/stream connections so proxies keep them open
+STREAM_KEEPALIVE_SECONDS = 15
 
 # CORS middleware
 # In production (Railway), restrict to the specific domain
@@ -33,59 +217,118 @@ if railway_domain:
         f"https://{railway_domain}",
         f"http://{railway_domain}",  # In case HTTP is used
     ]
-    print(f"[CORS] Production mode - Allowing origins: {allowed_origins}")
+    logger.info("CORS production mode", extra={"allowed_origins": allowed_origins})
 else:
     # Development: allow all origins
     allowed_origins = ["*"]
-    print("[CORS] Development mode - Allowing all origins")
+    logger.info("CORS development mode - allowing all origins")
 
+# Idempotency-Key on mutations: replay stored results, coalesce concurrent
+# duplicates (innermost, so replays still get fresh CORS/compression/metrics)
+app.add_middleware(IdempotencyMiddleware, store=build_idempotency_store(), resolve_user=verify_request_token)
+# Per-user/per-IP token buckets + concurrent mutation cap, ahead of auth and
+# the database (inside CORS so browsers can read the 429)
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=build_rate_limit_store(),
+        resolve_user=verify_request_token if AUTH_VERIFY_MODE == "local" else None,
+    )
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Request-ID", "Idempotent-Replayed", "Retry-After"],
 )
+# Compress API responses above GZIP_MIN_SIZE (not /api/stream)
+app.add_middleware(ApiGZipMiddleware)
+# Per-route latency/status metrics + Server-Timing header
+app.add_middleware(MetricsMiddleware)
+# Request correlation ids + one access log line per request (outermost)
+app.add_middleware(RequestLogMiddleware)
 
 
 @app.get("/api/health")
-async def health_check(
-    supabase: Client = Depends(get_supabase)
-) -> Dict:
+async def health_check() -> Dict:
     """
-    Health check endpoint - verify auth and Supabase connection.
-    No authentication required.
+    Health check endpoint - configuration and cache/stream stats.
+    No authentication required. Makes no backend calls (see /api/ready).
     """
-    print(f"\n{'='*60}")
-    print(f"[HEALTH CHECK] Starting health check")
-    
     health_status = {
         "status": "healthy",
-        "supabase_connected": False,
-        "supabase_url": None,
-        "supabase_client_type": str(type(supabase)),
+        "ready": lifecycle.is_ready(),
+        "supabase_url": SUPABASE_URL,
+        "supabase_client_loaded": supabase_client_loaded(),
         "environment_vars": {
             "SUPABASE_URL": bool(os.getenv("SUPABASE_URL")),
             "SUPABASE_KEY": bool(os.getenv("SUPABASE_KEY"))
-        }
+        },
+        "list_cache": list_cache.stats() if list_cache else {"enabled": False},
+        "event_stream": event_broker.stats(),
+        "suggest_index": suggest_indexes.stats(),
+        "list_access_cache": list_access.stats(),
+        "log_records_dropped": dropped_records()
     }
-    
-    try:
-        health_status["supabase_url"] = supabase.supabase_url
-        health_status["supabase_connected"] = True
-        print(f"[HEALTH CHECK] ✅ Supabase client initialized")
-        print(f"[HEALTH CHECK] URL: {supabase.supabase_url}")
-    except Exception as e:
-        health_status["status"] = "unhealthy"
-        health_status["error"] = str(e)
-        print(f"[HEALTH CHECK] ❌ Supabase connection failed: {str(e)}")
-    
-    print(f"[HEALTH CHECK] Complete: {health_status}")
-    print(f"{'='*60}\n")
+
+    logger.debug("Health check complete", extra={"health": health_status})
 
     return health_status
 
 
+@app.get("/api/live")
+async def liveness_check() -> Dict:
+    """
+    Liveness probe: 200 whenever this worker's event loop answers, including
+    while starting up or draining. No backend calls, so a Supabase outage
+    doesn't get healthy workers restarted. No authentication required.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/api/ready")
+async def readiness_check() -> JSONResponse:
+    """
+    Readiness probe: 200 once this worker's connection pools are warm and
+    Supabase (and Postgres, when configured) answer; 503 while starting up,
+    draining for shutdown, or with a backend unreachable.
+    Backend checks are cached for READINESS_CHECK_INTERVAL_SECONDS.
+    No authentication required.
+    """
+    if not lifecycle.is_ready():
+        state = "draining" if lifecycle.is_draining() else "starting"
+        return JSONResponse({"status": state}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    backends = await backend_check.results()
+    if all(result == "ok" for result in backends.values()):
+        return JSONResponse({"status": "ready", "backends": backends})
+    return JSONResponse({"status": "unavailable", "backends": backends}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+@app.get("/api/metrics")
+async def get_metrics(request: Request) -> PlainTextResponse:
+    """
+    Prometheus metrics for this worker process: per-route request counts and
+    latency, in-flight requests, Supabase call latency, auth verification
+    time, list cache and event stream gauges.
+    Requires `Authorization: Bearer <METRICS_TOKEN>` when METRICS_TOKEN is set.
+    """
+    if metrics.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {metrics.METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+    cache_stats = list_cache.stats() if list_cache else {"hits": 0, "misses": 0, "invalidations": 0}
+    cache_lookups = metrics.Counter("list_cache_lookups_total", "List cache lookups by result.", ("result",))
+    cache_lookups.inc("hit", amount=cache_stats["hits"])
+    cache_lookups.inc("miss", amount=cache_stats["misses"])
+    stream_connections = metrics.Gauge("stream_connections", "Open /api/stream connections on this worker.")
+    stream_connections.set(value=event_broker.stats()["connections"])
+
+    return PlainTextResponse(
+        metrics.render([cache_lookups, stream_connections]),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 @app.get("/api/config")
 async def get_config() -> Dict:
     """
@@ -98,20 +341,95 @@ async def get_config() -> Dict:
     }
 
 
+@app.get("/api/stream")
+async def stream_events(
+    request: Request,
+    access_token: str = Query(..., description="Supabase access token"),
+    user_id: str = Depends(get_stream_user),
+    list_id: str = Depends(get_stream_list_id)
+):
+    """
+    Server-Sent Events stream of item changes in one list, from every session
+    working on it (the user's own and, on a shared list, other members').
+
+    Authenticate with ?access_token=<jwt> (EventSource can't send headers);
+    ?list_id= selects a shared list instead of the personal one.
+    Events:
+    - upsert: {"type": "upsert", "item": ItemResponse}
+    - delete: {"type": "delete", "item_id": "...", "list_type": "..."}
+    - resync: connection fell behind - fetch GET /api/items/changes instead
+    - removed: the user is no longer a member of the list; the stream ends
+
+    Membership is re-checked on every keepalive, so a removed member's stream
+    ends even when the removal happened on another worker.
+    """
+    if lifecycle.is_draining():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Server is shutting down")
+
+    subscription = event_broker.subscribe(list_id, user_id)
+    logger.info("Stream connected", extra={"list_id": list_id, "connections": event_broker.stats()["connections"]})
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    try:
+                        member = await still_list_member(list_id, user_id, access_token)
+                    except Exception as e:
+                        # e.g. the token expired - the client reconnects with a fresh one
+                        logger.warning("Stream membership check failed: %s", e)
+                        break
+                    if not member:
+                        yield "event: removed\ndata: {}\n\n"
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if event["type"] == "reconnect":
+                    # Worker shutting down or LISTEN failed - EventSource reconnects after `retry`
+                    break
+                if event["type"] == "removed":
+                    yield "event: removed\ndata: {}\n\n"
+                    break
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+            logger.info("Stream disconnected", extra={"list_id": list_id})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/api/items", response_model=List[ItemResponse])
 async def get_items(
     list_type: str,
-    user_id: str = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
 ):
     """
-    Get grocery items for the authenticated user filtered by list type.
+    Get grocery items of one list type in the current list (X-List-Id header;
+    the user's personal list by default).
 
     - list_type='to_buy': Returns shopping list (sorted by is_bought ASC, created_at DESC)
     - list_type='items': Returns pantry inventory (sorted alphabetically by name)
+
+    Optional:
+    - limit / cursor: keyset pagination. Returns at most `limit` items; if there
+      are more, the X-Next-Cursor response header holds the cursor for the next page.
+    - fields: comma-separated columns to return (e.g. fields=item_id,name,is_bought).
+      Paginated and projected responses are passed through as the database
+      returned them, without per-row model validation.
     """
     try:
-        print(f"\n[GET ITEMS] Starting for user_id: {user_id}, list_type: {list_type}")
+        logger.debug("Get items", extra={"list_id": list_id, "list_type": list_type})
 
         # Validate list_type
         if list_type not in ["to_buy", "items"]:
@@ -120,158 +438,600 @@ async def get_items(
                 detail="list_type must be 'to_buy' or 'items'"
             )
 
-        # Build query with list_type filter
-        query = supabase.table("grocery_items") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .eq("list_type", list_type)
+        columns = _parse_fields(fields) if fields else None
+
+        if limit is None and cursor is None:
+            # Sorting is list-specific (see ItemRepository.list_items)
+            items = await repo.list_items(list_id, list_type)
+            logger.debug("Retrieved %d items", len(items))
+            if columns is None:
+                return items
+            return JSONResponse(content=_project(items, columns))
+
+        page_size = limit or DEFAULT_PAGE_SIZE
+        keys = PAGE_KEYS[list_type]
+        after = _decode_page_cursor(cursor, list_type) if cursor else None
+        # The sort keys are always selected so the next cursor can be built
+        select = columns + [key for key in keys if key not in columns] if columns else None
+
+        # One extra row tells us whether there is a next page
+        items = await repo.list_items_page(list_id, list_type, page_size + 1, after, select)
+
+        headers = {}
+        if len(items) > page_size:
+            items = items[:page_size]
+            headers["X-Next-Cursor"] = _encode_page_cursor(items[-1], keys)
+        if columns is not None:
+            items = _project(items, columns)
+
+        logger.debug("Retrieved page of %d items", len(items))
+        return JSONResponse(content=items, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed to fetch items")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch items: {str(e)}"
+        )
+
 
-        # Apply sorting based on list type
+def _parse_fields(fields: str) -> List[str]:
+    """?fields= as a list of known columns, request order kept."""
+    columns = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [column for column in columns if column not in ITEM_FIELDS]
+    if not columns or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fields must be a comma-separated subset of: {', '.join(ITEM_FIELDS)}"
+        )
+    return columns
+
+
+def _project(rows: List[Dict], columns: List[str]) -> List[Dict]:
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+
+def _encode_page_cursor(row: Dict, keys) -> str:
+    """Opaque cursor: the row's sort keys, JSON encoded, base64url."""
+    raw = json.dumps([row[key] for key in keys], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_page_cursor(cursor: str, list_type: str) -> Dict:
+    keys = PAGE_KEYS[list_type]
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("wrong number of keys")
+        after = dict(zip(keys, values))
+        # Type-check every key before it goes into a filter
+        after["item_id"] = str(UUID(after["item_id"]))
         if list_type == "to_buy":
-            # To Buy: unbought items first (newest first), then bought items (newest first)
-            response = query.order("is_bought", desc=False) \
-                           .order("created_at", desc=True) \
-                           .execute()
+            if not isinstance(after["is_bought"], bool):
+                raise ValueError("is_bought must be a boolean")
+            datetime.fromisoformat(after["created_at"])
+        elif not isinstance(after["name"], str):
+            raise ValueError("name must be a string")
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor must be an X-Next-Cursor value returned for this list"
+        )
+    return after
+
+
+@app.get("/api/lists", response_model=ListsResponse)
+async def get_lists(
+    request: Request,
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
+):
+    """
+    Get both lists (to_buy and items) with counts in one query.
+
+    Responses carry an ETag from repo.list_version() (row count and latest
+    updated_at - one indexed query, or a cache hit). Send it back in
+    If-None-Match and an unchanged list returns 304 Not Modified with no
+    body, without the rows being fetched. Sorting matches GET /api/items for
+    each list.
+    """
+    try:
+        logger.debug("Get lists", extra={"list_id": list_id})
+
+        # Before the rows, so the ETag is never newer than the body it's sent with
+        version = await repo.list_version(list_id)
+        etag = f'"{version}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            logger.debug("Lists not modified")
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        rows, _ = await repo.list_all_items(list_id)
+
+        lists = _split_lists(rows)
+        logger.debug("Retrieved %d to_buy, %d items", len(lists["to_buy"]), len(lists["items"]))
+
+        # Rows come straight from PostgREST in ItemResponse shape - skip re-validation
+        return JSONResponse(
+            {
+                **lists,
+                "counts": {list_type: len(items) for list_type, items in lists.items()},
+            },
+            headers=headers,
+        )
+
+    except Exception as e:
+        logger.exception("Failed to fetch lists")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch lists: {str(e)}"
+        )
+
+
+def _split_lists(rows: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Split name-ordered rows into the two lists with list-specific sorting:
+    to_buy unbought first then bought (each newest first), items alphabetical.
+    """
+    lists = {"to_buy": [], "items": []}
+    for row in rows:
+        if row["list_type"] in lists:
+            lists[row["list_type"]].append(row)
+
+    # Two stable sorts: newest first, then unbought before bought
+    lists["to_buy"].sort(key=lambda row: datetime.fromisoformat(row["created_at"]), reverse=True)
+    lists["to_buy"].sort(key=lambda row: row["is_bought"])
+    return lists
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in if_none_match.split(",")]
+    return etag in candidates or "*" in candidates
+
+
+@app.get("/api/items/changes", response_model=ChangesResponse)
+async def get_item_changes(
+    since: Optional[str] = None,
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
+):
+    """
+    Get items changed since a sync cursor, for clients that keep a local copy.
+
+    - No `since` (or a cursor older than the tombstone retention window):
+      full snapshot of both lists with reset=true
+    - Otherwise: upserts (created/updated items) and deletes (tombstones)
+      after the cursor. Apply deletes, then upserts; both are idempotent.
+
+    Always pass the returned `cursor` as `since` on the next call.
+    """
+    try:
+        logger.debug("Get item changes", extra={"list_id": list_id, "since": since})
+
+        now = datetime.now(timezone.utc)
+        since_at = _parse_cursor(since) if since else None
+        reset = since_at is None or since_at < now - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+
+        if reset:
+            upserts, _ = await repo.list_all_items(list_id)
+            deletes = []
+            last_seen = now - timedelta(seconds=SYNC_OVERLAP_SECONDS)
         else:
-            # Items: alphabetical order
-            response = query.order("name", desc=False) \
-                           .execute()
+            window_start = since_at - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            upserts, deletes = await repo.list_changes(list_id, window_start.isoformat())
+            last_seen = since_at
+
+        change_times = [
+            datetime.fromisoformat(row.get("updated_at") or row["created_at"]) for row in upserts
+        ] + [datetime.fromisoformat(row["deleted_at"]) for row in deletes]
+        cursor = max(change_times + [last_seen])
 
-        print(f"[GET ITEMS] ✅ Retrieved {len(response.data)} items from {list_type} list")
-        return response.data
+        logger.debug("%d upserts, %d deletes, reset: %s", len(upserts), len(deletes), reset)
+        return {
+            "upserts": upserts,
+            "deletes": deletes,
+            "cursor": cursor.isoformat(),
+            "reset": reset,
+        }
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[GET ITEMS] ❌ Error: {str(e)}")
+        logger.exception("Failed to fetch changes")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch items: {str(e)}"
+            detail=f"Failed to fetch changes: {str(e)}"
+        )
+
+
+@app.get("/api/items/suggest", response_model=SuggestResponse)
+async def suggest_items(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(SUGGEST_DEFAULT_LIMIT, ge=1, le=SUGGEST_MAX_LIMIT),
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
+):
+    """
+    Autocomplete item names from both lists (e.g. re-adding a pantry item
+    to the shopping list without retyping it).
+
+    Matches names starting with `q`, or with a word starting with it
+    ("mi" finds "Milk" and "Oat milk"), case-insensitively. Each suggestion
+    lists the item_id in every list that already has the name, so the
+    client can tell a would-be duplicate before adding it.
+
+    Served from an in-memory prefix index over the list's cached rows;
+    the index is rebuilt only when the list changes.
+    """
+    try:
+        rows, version = await repo.list_all_items(list_id)
+        index = suggest_indexes.get(list_id, rows, version)
+        suggestions = index.search(q, limit)
+        logger.debug("Suggest: %d matches", len(suggestions))
+        return {"suggestions": suggestions}
+
+    except Exception as e:
+        logger.exception("Failed to suggest items")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to suggest items: {str(e)}"
+        )
+
+
+@app.get("/api/insights", response_model=InsightsResponse)
+async def get_insights(
+    limit: int = Query(INSIGHTS_DEFAULT_LIMIT, ge=1, le=INSIGHTS_MAX_LIMIT),
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
+):
+    """
+    Purchase history per item name: how often it's bought, when last, and
+    the average interval between purchases.
+
+    A purchase is ticking an item on the shopping list; the counts survive
+    moves and deletes. `buy_again` holds the items whose usual interval has
+    passed since the last purchase and that aren't waiting (unticked) on
+    the shopping list right now, most overdue first.
+
+    Reads the aggregates the purchase_history.sql triggers keep up to date,
+    so the cost doesn't grow with the length of the history.
+    """
+    try:
+        stats, (rows, _) = await asyncio.gather(
+            repo.list_purchase_stats(list_id),
+            repo.list_all_items(list_id),
+        )
+        now = datetime.now(timezone.utc)
+        items = [_purchase_insight(row) for row in stats]
+
+        waiting = {
+            normalize_name(row["name"]) for row in rows
+            if row["list_type"] == "to_buy" and not row["is_bought"]
+        }
+        buy_again = sorted(
+            (
+                item for item in items
+                if item["next_expected_at"] and item["next_expected_at"] <= now
+                and normalize_name(item["name"]) not in waiting
+            ),
+            key=lambda item: item["next_expected_at"],
         )
 
+        logger.debug("Insights: %d items, %d to buy again", len(items), len(buy_again))
+        return {"items": items[:limit], "buy_again": buy_again[:limit]}
+
+    except Exception as e:
+        logger.exception("Failed to fetch insights")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch insights: {str(e)}"
+        )
+
+
+def _purchase_insight(row: Dict) -> Dict:
+    """Stats row -> PurchaseStats fields; the average needs two purchases."""
+    first = datetime.fromisoformat(row["first_bought_at"])
+    last = datetime.fromisoformat(row["last_bought_at"])
+    insight = {**row, "first_bought_at": first, "last_bought_at": last,
+               "average_interval_days": None, "next_expected_at": None}
+    if row["purchase_count"] >= 2 and last > first:
+        interval = (last - first) / (row["purchase_count"] - 1)
+        insight["average_interval_days"] = round(interval / timedelta(days=1), 2)
+        insight["next_expected_at"] = last + interval
+    return insight
+
+
+def _parse_cursor(cursor: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="since must be a cursor returned by this endpoint"
+        )
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
 
 @app.post("/api/items", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_item(
     item: ItemCreateRequest,
     user_id: str = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
 ):
     """
     Create a new grocery item in the specified list.
 
-    Performs case-insensitive duplicate check before insertion.
+    Single insert - the unique (list_id, list_type, lower(name)) index does the
+    case-insensitive duplicate check atomically, so concurrent duplicate creates
+    yield exactly one row.
     Returns 409 Conflict if item with same name already exists in the target list.
+    The name is trimmed first, like the batch endpoint, so " Milk" and "milk"
+    are the same item here as in suggest (suggest.normalize_name).
     """
+    name = item.name.strip()
+    if not name:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item name is required")
     try:
-        print(f"\n[CREATE ITEM] Starting")
-        print(f"[CREATE ITEM] Item name: {item.name}")
-        print(f"[CREATE ITEM] List type: {item.list_type}")
-        print(f"[CREATE ITEM] User ID: {user_id}")
-
-        # Check for case-insensitive duplicates in the target list
-        # Using ilike for case-insensitive comparison
-        duplicate_check = supabase.table("grocery_items") \
-            .select("item_id, name") \
-            .eq("user_id", user_id) \
-            .eq("list_type", item.list_type) \
-            .ilike("name", item.name) \
-            .execute()
-
-        if duplicate_check.data:
-            print(f"[CREATE ITEM] ❌ Duplicate found: {duplicate_check.data[0]['name']}")
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f'"{item.name}" already exists in this list'
-            )
+        logger.debug("Create item", extra={"list_id": list_id, "list_type": item.list_type})
 
         item_data = {
+            "list_id": list_id,
             "user_id": user_id,
-            "name": item.name,
+            "name": name,
             "list_type": item.list_type,
             "is_bought": False
         }
-        print(f"[CREATE ITEM] Data to insert: {item_data}")
 
-        response = supabase.table("grocery_items") \
-            .insert(item_data) \
-            .execute()
-
-        print(f"[CREATE ITEM] Response data: {response.data}")
+        try:
+            created_item = await repo.insert_item(item_data)
+        except DuplicateItemError:
+            logger.info("Create item: duplicate name in target list", extra={"list_type": item.list_type})
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f'"{name}" already exists in this list'
+            )
 
-        if not response.data:
-            print("[CREATE ITEM] ❌ No data returned from insert")
+        if not created_item:
+            logger.error("Create item: no row returned from insert")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create item"
             )
 
-        print(f"[CREATE ITEM] ✅ Item created: {response.data[0]}")
-        return response.data[0]
+        logger.debug("Item created", extra={"item_id": created_item["item_id"]})
+        return created_item
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[CREATE ITEM] ❌ Error: {str(e)}")
-        import traceback
-        print(f"[CREATE ITEM] Traceback:\n{traceback.format_exc()}")
+        logger.exception("Failed to create item")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create item: {str(e)}"
         )
 
+# Batch endpoints must be registered before /api/items/{item_id}/... routes
+@app.post("/api/items/batch", response_model=BatchResponse)
+async def create_items_batch(
+    batch: ItemBatchCreateRequest,
+    user_id: str = Depends(get_current_user),
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
+):
+    """
+    Create many items at once (e.g. from a scanned receipt).
+
+    Names are deduplicated case-insensitively within the request, then
+    inserted in a single statement that skips names already in the target
+    list. One database round trip regardless of batch size.
+    Returns a per-item result: created / skipped_duplicate / error.
+    """
+    try:
+        logger.debug("Batch create %d items", len(batch.items))
+
+        results: List[Optional[BatchItemResult]] = [None] * len(batch.items)
+        first_index = {}  # (list_type, lowercase name) -> first request index
+        to_insert = []
+
+        for index, entry in enumerate(batch.items):
+            name = entry.name.strip()
+            if not name:
+                results[index] = BatchItemResult(
+                    status="error", name=entry.name, detail="Item name is required"
+                )
+                continue
+
+            key = (entry.list_type, normalize_name(name))
+            if key in first_index:
+                results[index] = BatchItemResult(status="skipped_duplicate", name=name)
+                continue
+
+            first_index[key] = index
+            to_insert.append({"name": name, "list_type": entry.list_type})
+
+        created_rows = await repo.insert_items(list_id, user_id, to_insert) if to_insert else []
+        created = {(row["list_type"], normalize_name(row["name"])): row for row in created_rows}
+
+        for key, index in first_index.items():
+            row = created.get(key)
+            if row:
+                results[index] = BatchItemResult(status="created", name=row["name"], item=row)
+            else:
+                # Already in the target list
+                results[index] = BatchItemResult(
+                    status="skipped_duplicate", name=batch.items[index].name.strip()
+                )
+
+        logger.debug("Created %d of %d items", len(created_rows), len(batch.items))
+        return BatchResponse(results=results)
+
+    except Exception as e:
+        logger.exception("Failed to create items")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create items: {str(e)}"
+        )
+
+
+@app.patch("/api/items/batch/toggle", response_model=BatchResponse)
+async def toggle_items_batch(
+    batch: ItemBatchRequest,
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
+):
+    """
+    Toggle is_bought on many items in one statement.
+    Returns a per-item result: toggled / not_found.
+    """
+    try:
+        item_ids = _unique_ids(batch.item_ids)
+        logger.debug("Batch toggle %d items", len(item_ids))
+
+        rows = await repo.toggle_items(list_id, item_ids)
+        toggled = {row["item_id"]: row for row in rows}
+
+        results = [
+            BatchItemResult(status="toggled", item_id=item_id, item=toggled[item_id])
+            if item_id in toggled
+            else BatchItemResult(status="not_found", item_id=item_id, detail="Item not found")
+            for item_id in item_ids
+        ]
+
+        logger.debug("Toggled %d of %d items", len(rows), len(item_ids))
+        return BatchResponse(results=results)
+
+    except Exception as e:
+        logger.exception("Failed to toggle items")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to toggle items: {str(e)}"
+        )
+
+
+@app.patch("/api/items/batch/move", response_model=BatchResponse)
+async def move_items_batch(
+    batch: ItemBatchMoveRequest,
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
+):
+    """
+    Move many items to another list in one transaction.
+    Same rules as the single move; returns a per-item result:
+    moved / not_found / conflict.
+    """
+    try:
+        item_ids = _unique_ids(batch.item_ids)
+        logger.debug("Batch move %d items to %s", len(item_ids), batch.to_list)
+
+        moves = await repo.move_items(list_id, item_ids, batch.to_list)
+
+        results = []
+        for move in moves:
+            if move["status"] == "moved":
+                results.append(BatchItemResult(
+                    status="moved", item_id=move["item_id"], name=move["item"]["name"], item=move["item"]
+                ))
+            elif move["status"] == "conflict":
+                results.append(BatchItemResult(
+                    status="conflict",
+                    item_id=move["item_id"],
+                    name=move["name"],
+                    detail=f'"{move["name"]}" is already in your {LIST_NAMES[batch.to_list]}'
+                ))
+            else:
+                results.append(BatchItemResult(
+                    status="not_found", item_id=move["item_id"], detail="Item not found"
+                ))
+
+        logger.debug("Processed %d moves", len(results))
+        return BatchResponse(results=results)
+
+    except Exception as e:
+        logger.exception("Failed to move items")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to move items: {str(e)}"
+        )
+
+
+@app.post("/api/items/batch/delete", response_model=BatchResponse)
+async def delete_items_batch(
+    batch: ItemBatchRequest,
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
+):
+    """
+    Permanently delete many items in one statement.
+    Returns a per-item result: deleted / not_found.
+    """
+    try:
+        item_ids = _unique_ids(batch.item_ids)
+        logger.debug("Batch delete %d items", len(item_ids))
+
+        rows = await repo.delete_items(list_id, item_ids)
+        deleted = {row["item_id"] for row in rows}
+
+        results = [
+            BatchItemResult(status="deleted", item_id=item_id)
+            if item_id in deleted
+            else BatchItemResult(status="not_found", item_id=item_id, detail="Item not found")
+            for item_id in item_ids
+        ]
+
+        logger.debug("Deleted %d of %d items", len(rows), len(item_ids))
+        return BatchResponse(results=results)
+
+    except Exception as e:
+        logger.exception("Failed to delete items")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete items: {str(e)}"
+        )
+
+
+def _unique_ids(item_ids: List[UUID]) -> List[str]:
+    """Item ids as strings, duplicates removed, request order kept."""
+    return list(dict.fromkeys(str(item_id) for item_id in item_ids))
+
+
 @app.patch("/api/items/{item_id}/toggle", response_model=ItemResponse)
 async def toggle_item(
     item_id: UUID,
-    user_id: str = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
 ):
     """
     Toggle the is_bought status of a grocery item.
-    Flips between bought/unbought state.
+    Flips between bought/unbought state atomically in the database.
     Only meaningful for items in 'to_buy' list.
     """
     try:
-        print(f"\n[TOGGLE ITEM] Starting for item_id: {item_id}")
+        logger.debug("Toggle item", extra={"item_id": str(item_id)})
 
-        # First, get the current item to check ownership and get current state
-        item_response = supabase.table("grocery_items") \
-            .select("*") \
-            .eq("item_id", str(item_id)) \
-            .eq("user_id", user_id) \
-            .execute()
+        # Single UPDATE ... SET is_bought = NOT is_bought RETURNING *
+        # (ownership check is part of the WHERE clause)
+        updated_item = await repo.toggle_item(list_id, str(item_id))
 
-        if not item_response.data:
-            print(f"[TOGGLE ITEM] ❌ Item not found")
+        if not updated_item:
+            logger.info("Toggle item: not found", extra={"item_id": str(item_id)})
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Item not found"
             )
 
-        current_item = item_response.data[0]
-        new_bought_status = not current_item["is_bought"]
-        print(f"[TOGGLE ITEM] Current status: {current_item['is_bought']} → New status: {new_bought_status}")
-
-        # Update the item
-        update_response = supabase.table("grocery_items") \
-            .update({"is_bought": new_bought_status}) \
-            .eq("item_id", str(item_id)) \
-            .eq("user_id", user_id) \
-            .execute()
-
-        if not update_response.data:
-            print(f"[TOGGLE ITEM] ❌ Update failed")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to toggle item"
-            )
-
-        print(f"[TOGGLE ITEM] ✅ Item toggled successfully")
-        return update_response.data[0]
+        return updated_item
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[TOGGLE ITEM] ❌ Error: {str(e)}")
+        logger.exception("Failed to toggle item")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to toggle item: {str(e)}"
@@ -282,106 +1042,48 @@ async def toggle_item(
 async def move_item(
     item_id: UUID,
     move_request: ItemMoveRequest,
-    user_id: str = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
 ):
     """
     Move an item from one list to another (to_buy ↔ items).
 
-    Logic:
-    1. Check if item with same name already exists in target list (case-insensitive)
-    2. If exists, return 409 Conflict error
-    3. If not, create new row in target list with fresh timestamp
-    4. Delete original row from source list
-    5. Reset is_bought to false on new row
+    Runs as a single move_grocery_item RPC (one round trip, one transaction):
+    1. Lock the source item (404 if missing)
+    2. Check if item with same name already exists in target list (case-insensitive)
+    3. If exists, return 409 Conflict error
+    4. If not, create new row in target list with fresh timestamp
+    5. Delete original row from source list
+    6. Reset is_bought to false on new row
     """
     try:
-        print(f"\n[MOVE ITEM] Starting for item_id: {item_id}")
-        print(f"[MOVE ITEM] Target list: {move_request.to_list}")
-
-        # Get the current item
-        item_response = supabase.table("grocery_items") \
-            .select("*") \
-            .eq("item_id", str(item_id)) \
-            .eq("user_id", user_id) \
-            .execute()
-
-        if not item_response.data:
-            print(f"[MOVE ITEM] ❌ Item not found")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Item not found"
-            )
+        logger.debug("Move item", extra={"item_id": str(item_id), "to_list": move_request.to_list})
 
-        current_item = item_response.data[0]
-        item_name = current_item["name"]
-        source_list = current_item["list_type"]
         target_list = move_request.to_list
+        result = await repo.move_item(list_id, str(item_id), target_list)
 
-        print(f"[MOVE ITEM] Moving '{item_name}' from '{source_list}' to '{target_list}'")
-
-        # Check if item already exists in target list (case-insensitive)
-        duplicate_check = supabase.table("grocery_items") \
-            .select("item_id, name") \
-            .eq("user_id", user_id) \
-            .eq("list_type", target_list) \
-            .ilike("name", item_name) \
-            .execute()
-
-        if duplicate_check.data:
-            print(f"[MOVE ITEM] ❌ Duplicate found in target list")
-            list_names = {
-                'items': 'inventory',
-                'to_buy': 'shopping list'
-            }
+        if result["status"] == "not_found":
+            logger.info("Move item: not found", extra={"item_id": str(item_id)})
             raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail=f'"{item_name}" is already in your {list_names[target_list]}'
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item not found"
             )
 
-        # Create new row in target list with fresh timestamp
-        new_item_data = {
-            "user_id": user_id,
-            "name": item_name,
-            "list_type": target_list,
-            "is_bought": False  # Reset bought status
-        }
-
-        insert_response = supabase.table("grocery_items") \
-            .insert(new_item_data) \
-            .execute()
-
-        if not insert_response.data:
-            print(f"[MOVE ITEM] ❌ Failed to insert into target list")
+        if result["status"] == "conflict":
+            logger.info("Move item: duplicate name in target list", extra={"item_id": str(item_id)})
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to move item"
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f'"{result["name"]}" is already in your {LIST_NAMES[target_list]}'
             )
 
-        new_item = insert_response.data[0]
-        print(f"[MOVE ITEM] ✅ Created new item in {target_list} with id: {new_item['item_id']}")
-
-        # Delete original item from source list
-        delete_response = supabase.table("grocery_items") \
-            .delete() \
-            .eq("item_id", str(item_id)) \
-            .eq("user_id", user_id) \
-            .execute()
-
-        if not delete_response.data:
-            print(f"[MOVE ITEM] ⚠️ Warning: Failed to delete original item")
-            # Note: We don't fail the request here because the new item was created
-            # User can manually delete the duplicate if needed
-
-        print(f"[MOVE ITEM] ✅ Move complete: '{item_name}' moved to {target_list}")
+        new_item = result["item"]
+        logger.debug("Item moved", extra={"item_id": new_item["item_id"], "to_list": target_list})
         return new_item
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[MOVE ITEM] ❌ Error: {str(e)}")
-        import traceback
-        print(f"[MOVE ITEM] Traceback:\n{traceback.format_exc()}")
+        logger.exception("Failed to move item")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to move item: {str(e)}"
@@ -391,38 +1093,168 @@ async def move_item(
 @app.delete("/api/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_item(
     item_id: UUID,
-    user_id: str = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase)
+    list_id: str = Depends(get_list_id),
+    repo: ItemStorage = Depends(get_item_repository)
 ):
     """
     Permanently delete a grocery item.
     This is optional for cleanup - users can keep items indefinitely.
     """
     try:
-        print(f"\n[DELETE ITEM] Starting for item_id: {item_id}")
+        logger.debug("Delete item", extra={"item_id": str(item_id)})
         
-        response = supabase.table("grocery_items") \
-            .delete() \
-            .eq("item_id", str(item_id)) \
-            .eq("user_id", user_id) \
-            .execute()
+        deleted_item = await repo.delete_item(list_id, str(item_id))
         
-        # Supabase returns data even on delete, but if nothing matched, data is empty
-        if not response.data:
-            print(f"[DELETE ITEM] ❌ Item not found")
+        # Nothing matched (wrong id or not in this list)
+        if not deleted_item:
+            logger.info("Delete item: not found", extra={"item_id": str(item_id)})
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Item not found"
             )
         
-        print(f"[DELETE ITEM] ✅ Item deleted successfully")
         return None
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[DELETE ITEM] ❌ Error: {str(e)}")
+        logger.exception("Failed to delete item")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete item: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@app.get("/api/shared-lists", response_model=SharedListsResponse)
+async def get_shared_lists(
+    user_id: str = Depends(get_current_user),
+    storage: ItemStorage = Depends(get_user_storage)
+):
+    """
+    Lists the user can open: their personal list first, then every shared
+    list they're a member of. Pass a list_id as X-List-Id on the item
+    endpoints (and ?list_id= on /api/stream) to work on that list.
+    """
+    try:
+        lists = await storage.list_shared_lists(user_id)
+        logger.debug("Shared lists: %d", len(lists))
+        return {"lists": lists}
+
+    except Exception as e:
+        logger.exception("Failed to fetch shared lists")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch shared lists: {str(e)}"
+        )
+
+
+@app.post("/api/shared-lists", response_model=SharedList, status_code=status.HTTP_201_CREATED)
+async def create_shared_list(
+    new_list: SharedListCreateRequest,
+    user_id: str = Depends(get_current_user),
+    storage: ItemStorage = Depends(get_user_storage)
+):
+    """Create a new, empty list owned by the user. Invite others to it with /invites."""
+    try:
+        created = await storage.create_shared_list(user_id, new_list.name.strip())
+        logger.info("Shared list created", extra={"list_id": created["list_id"]})
+        return {**created, "role": "owner", "member_count": 1, "personal": False}
+
+    except Exception as e:
+        logger.exception("Failed to create shared list")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create shared list: {str(e)}"
+        )
+
+
+@app.post(
+    "/api/shared-lists/{list_id}/invites",
+    response_model=ListInviteResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_list_invite(
+    list_id: UUID,
+    user_id: str = Depends(get_current_user),
+    storage: ItemStorage = Depends(get_user_storage)
+):
+    """
+    Invite code for a list the user is in, valid for LIST_INVITE_TTL_SECONDS.
+    Inviting to the personal list (list_id = your user id) shares it.
+    """
+    try:
+        result = await storage.create_list_invite(user_id, str(list_id), LIST_INVITE_TTL_SECONDS)
+        if result["status"] == "not_found":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="List not found")
+
+        logger.info("List invite created", extra={"list_id": str(list_id)})
+        return {"list_id": list_id, "code": result["code"], "expires_at": result["expires_at"]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed to create list invite")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create list invite: {str(e)}"
+        )
+
+
+@app.post("/api/shared-lists/join", response_model=ListJoinResponse)
+async def join_shared_list(
+    invite: ListJoinRequest,
+    user_id: str = Depends(get_current_user),
+    storage: ItemStorage = Depends(get_user_storage)
+):
+    """Join the list an invite code belongs to. Joining twice is a no-op."""
+    try:
+        result = await storage.join_shared_list(user_id, invite.code.strip())
+        if result["status"] == "invalid":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invite not found or expired")
+
+        logger.info("Joined shared list", extra={"list_id": result["list_id"]})
+        return {"list_id": result["list_id"], "name": result["name"]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed to join shared list")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to join shared list: {str(e)}"
+        )
+
+
+@app.delete("/api/shared-lists/{list_id}/members/{member_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_list_member(
+    list_id: UUID,
+    member_id: UUID,
+    user_id: str = Depends(get_current_user),
+    storage: ItemStorage = Depends(get_user_storage)
+):
+    """
+    Leave a list (member_id = your own id) or, as its owner, remove someone.
+    The owner can't be removed. The member's open streams on this worker end
+    now; other workers may keep serving them from their membership cache for
+    up to LIST_ACCESS_CACHE_TTL_SECONDS (streams: plus one keepalive).
+    """
+    try:
+        result = await storage.remove_list_member(user_id, str(list_id), str(member_id))
+        if result["status"] == "not_found":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Member not found")
+        if result["status"] == "forbidden":
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to remove this member")
+
+        list_access.forget(str(member_id), str(list_id))
+        event_broker.disconnect_member(str(list_id), str(member_id))
+        logger.info("List member removed", extra={"list_id": str(list_id)})
+        return None
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Failed to remove list member")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to remove list member: {str(e)}"
+        )
@@ -0,0 +1,263 @@
+import bisect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Optional bearer token required to read /api/metrics (unset: open, like most scrape targets)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+# Send a Server-Timing header (auth / db / app / total) on every API response
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Server-Timing phases recorded during the current request
+# (name -> (start, end) perf_counter spans)
+Spans = Dict[str, List[Tuple[float, float]]]
+_timings: ContextVar[Optional[Spans]] = ContextVar("server_timings", default=None)
+
+LabelValues = Tuple[str, ...]
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *label_values: str, value: float) -> None:
+        self._values[label_values] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, rendered in Prometheus text format."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> (per-bucket counts with a final +Inf slot, sum, count)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, *label_values: str, value: float) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+        counts, totals = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, totals) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = _labels(self.labels + ("le",), label_values + (le,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            series_labels = _labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{series_labels} {_number(totals[0])}")
+            lines.append(f"{self.name}_count{series_labels} {totals[1]}")
+        return lines
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# Process-wide metrics. Each worker process keeps its own; scrape every worker.
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+upstream_duration = Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to Supabase (PostgREST, Auth) by operation.",
+    ("target", "operation"),
+)
+upstream_errors = Counter(
+    "upstream_request_errors_total",
+    "Supabase calls that raised or returned an error status.",
+    ("target", "operation"),
+)
+auth_duration = Histogram(
+    "auth_verification_duration_seconds",
+    "Time to verify the request's access token.",
+    ("mode", "result"),
+)
+idempotency_requests = Counter(
+    "idempotency_requests_total",
+    "Mutations carrying an Idempotency-Key by outcome (executed, replayed, coalesced, conflict).",
+    ("result",),
+)
+rate_limited_requests = Counter(
+    "rate_limited_requests_total",
+    "Requests rejected with 429 by limit (user, ip, concurrency).",
+    ("limit",),
+)
+
+REGISTRY = [
+    http_requests,
+    http_request_duration,
+    http_in_flight,
+    upstream_duration,
+    upstream_errors,
+    auth_duration,
+    idempotency_requests,
+    rate_limited_requests,
+]
+
+
+def render(extra: Optional[List] = None) -> str:
+    """All metrics in Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    for metric in REGISTRY + (extra or []):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """
+    Add a span that ended just now to a Server-Timing phase of the current
+    request (no-op outside one). Overlapping spans - concurrent database
+    calls - count once: a phase reports wall-clock time, not summed time.
+    """
+    timings = _timings.get()
+    if timings is not None:
+        end = time.perf_counter()
+        timings.setdefault(name, []).append((end - seconds, end))
+
+
+@contextmanager
+def track_upstream(target: str, operation: str, timing: Optional[str] = None) -> Iterator[None]:
+    """
+    Time one Supabase call into upstream_request_duration_seconds, and into
+    the request's `timing` Server-Timing phase if given.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        upstream_errors.inc(target, operation)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        upstream_duration.observe(target, operation, value=elapsed)
+        if timing:
+            record_timing(timing, elapsed)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency and in-flight requests
+    per route, and adding a Server-Timing header with the request's auth /
+    db / app / total breakdown.
+
+    Routes are labelled by their path template (/api/items/{item_id}/toggle),
+    never the raw path, so label cardinality stays fixed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings: Spans = {}
+        token = _timings.set(timings)
+        status_code = 500
+        http_in_flight.inc(amount=1)
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", _server_timing(timings, start).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            http_in_flight.inc(amount=-1)
+            route = _route_label(scope)
+            elapsed = time.perf_counter() - start
+            http_requests.inc(scope["method"], route, str(status_code))
+            http_request_duration.observe(scope["method"], route, value=elapsed)
+            _timings.reset(token)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _server_timing(timings: Spans, start: float) -> str:
+    # Headers go out once the handler has returned, so this is the full
+    # handler time; "app" is the time when neither auth nor the database was
+    # running (validation, serialization, our own code)
+    total_ms = (time.perf_counter() - start) * 1000
+    parts = [f"{name};dur={_covered(spans) * 1000:.1f}" for name, spans in timings.items()]
+    busy = _covered([span for spans in timings.values() for span in spans])
+    app_ms = max(total_ms - busy * 1000, 0.0)
+    parts.append(f"app;dur={app_ms:.1f}")
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+def _covered(spans: List[Tuple[float, float]]) -> float:
+    """Seconds covered by the union of the spans."""
+    covered = 0.0
+    reached = float("-inf")
+    for span_start, span_end in sorted(spans):
+        if span_end > reached:
+            covered += span_end - max(span_start, reached)
+            reached = span_end
+    return covered
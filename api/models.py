@@ -1,7 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
-from typing import Optional, Literal
+from typing import Dict, List, Optional, Literal
+
+# Max items per batch request (a long receipt fits comfortably)
+MAX_BATCH_SIZE = 200
 
 
 class ItemCreateRequest(BaseModel):
@@ -15,11 +18,113 @@ class ItemMoveRequest(BaseModel):
 
 class ItemResponse(BaseModel):
     item_id: UUID
-    user_id: UUID
+    list_id: Optional[UUID] = None  # Set once shared_lists.sql is applied
+    user_id: UUID  # Who added the item (to this list_type - a move re-adds it)
     name: str
     is_bought: bool
     list_type: str
     created_at: datetime
+    updated_at: Optional[datetime] = None  # Set once delta_sync.sql is applied
+
+
+class ItemTombstone(BaseModel):
+    item_id: UUID
+    list_type: str
+    deleted_at: datetime
+
+
+class ChangesResponse(BaseModel):
+    upserts: List[ItemResponse]
+    deletes: List[ItemTombstone]
+    cursor: str  # Pass back as ?since= on the next sync
+    reset: bool  # True: full snapshot - replace the local copy instead of patching
+
+
+class ListsResponse(BaseModel):
+    to_buy: List[ItemResponse]
+    items: List[ItemResponse]
+    counts: Dict[str, int]
+
+
+class ItemSuggestion(BaseModel):
+    name: str
+    lists: Dict[str, UUID]  # list_type -> item_id, for each list already holding the name
+
+
+class SuggestResponse(BaseModel):
+    suggestions: List[ItemSuggestion]
+
+
+class PurchaseStats(BaseModel):
+    name: str
+    purchase_count: int
+    first_bought_at: datetime
+    last_bought_at: datetime
+    average_interval_days: Optional[float] = None  # Needs 2+ purchases
+    next_expected_at: Optional[datetime] = None  # last_bought_at + average interval
+
+
+class InsightsResponse(BaseModel):
+    items: List[PurchaseStats]
+    buy_again: List[PurchaseStats]  # Due (next_expected_at passed) and not on the shopping list
+
+
+class SharedList(BaseModel):
+    list_id: UUID
+    name: str
+    role: Literal["owner", "member"]
+    member_count: int
+    personal: bool  # The user's own list (list_id = user_id)
+
+
+class SharedListsResponse(BaseModel):
+    lists: List[SharedList]
+
+
+class SharedListCreateRequest(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+
+
+class ListInviteResponse(BaseModel):
+    list_id: UUID
+    code: str  # Give to the invitee; they POST it to /api/shared-lists/join
+    expires_at: datetime
+
+
+class ListJoinRequest(BaseModel):
+    code: str = Field(min_length=1, max_length=64)
+
+
+class ListJoinResponse(BaseModel):
+    list_id: UUID
+    name: str
+
+
+class ItemBatchCreateRequest(BaseModel):
+    items: List[ItemCreateRequest] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class ItemBatchRequest(BaseModel):
+    item_ids: List[UUID] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class ItemBatchMoveRequest(ItemBatchRequest):
+    to_list: Literal["to_buy", "items"]
+
+
+class BatchItemResult(BaseModel):
+    status: Literal[
+        "created", "skipped_duplicate", "toggled", "moved", "deleted",
+        "not_found", "conflict", "error"
+    ]
+    item_id: Optional[UUID] = None  # Source item for toggle/move/delete
+    name: Optional[str] = None
+    item: Optional[ItemResponse] = None  # Resulting row, if any
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
 
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1,311 @@
+import asyncio
+import copy
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from metrics import track_upstream
+from repository import DuplicateItemError, ItemStorage, RepositoryError, version_tag
+
+# Columns ?fields= may select (the grocery_items columns the API exposes)
+ITEM_COLUMNS = ("item_id", "list_id", "user_id", "name", "is_bought", "list_type", "created_at", "updated_at")
+
+# Same sort orders as repository.LIST_ORDER
+ORDER_BY = {
+    "to_buy": "is_bought ASC, created_at DESC, item_id DESC",
+    "items": "name ASC, item_id ASC",
+}
+
+# Runs first in every transaction: the same request context PostgREST sets,
+# so auth.uid() and the RLS policies apply exactly as they do through the API
+SET_USER_CONTEXT = """
+    SELECT set_config('request.jwt.claims', $1, true),
+           set_config('role', 'authenticated', true)
+"""
+
+LIST_ITEMS = {
+    list_type: f"SELECT * FROM grocery_items WHERE list_id = $1 AND list_type = $2 ORDER BY {order}"
+    for list_type, order in ORDER_BY.items()
+}
+LIST_ALL_ITEMS = "SELECT * FROM grocery_items WHERE list_id = $1 ORDER BY name ASC, item_id ASC"
+LIST_VERSION = "SELECT count(*), max(updated_at) FROM grocery_items WHERE list_id = $1"
+LIST_UPDATED_SINCE = """
+    SELECT * FROM grocery_items WHERE list_id = $1 AND updated_at > $2 ORDER BY updated_at ASC
+"""
+LIST_DELETED_SINCE = """
+    SELECT item_id, list_type, deleted_at FROM grocery_item_tombstones
+    WHERE list_id = $1 AND deleted_at > $2 ORDER BY deleted_at ASC
+"""
+INSERT_ITEM = """
+    INSERT INTO grocery_items (list_id, user_id, name, list_type, is_bought)
+    VALUES ($1, $2, $3, $4, $5)
+    RETURNING *
+"""
+INSERT_ITEMS = "SELECT * FROM insert_grocery_items($1, $2, $3::jsonb)"
+TOGGLE_ITEM = "SELECT * FROM toggle_grocery_item($1, $2)"
+TOGGLE_ITEMS = "SELECT * FROM toggle_grocery_items($1, $2::uuid[])"
+MOVE_ITEM = "SELECT move_grocery_item($1, $2, $3)"
+MOVE_ITEMS = "SELECT move_grocery_items($1, $2::uuid[], $3)"
+DELETE_ITEM = "DELETE FROM grocery_items WHERE item_id = $1 AND list_id = $2 RETURNING *"
+DELETE_ITEMS = "DELETE FROM grocery_items WHERE list_id = $1 AND item_id = ANY($2::uuid[]) RETURNING *"
+LIST_PURCHASE_STATS = """
+    SELECT name, purchase_count, first_bought_at, last_bought_at FROM grocery_item_stats
+    WHERE list_id = $1 AND purchase_count > 0
+    ORDER BY purchase_count DESC, last_bought_at DESC
+"""
+GET_LIST_ROLE = "SELECT role FROM list_members WHERE list_id = $1 AND user_id = $2"
+LIST_SHARED_LISTS = "SELECT * FROM get_shared_lists()"
+CREATE_SHARED_LIST = "SELECT * FROM create_shared_list($1)"
+CREATE_LIST_INVITE = "SELECT create_list_invite($1, $2)"
+JOIN_SHARED_LIST = "SELECT join_shared_list($1)"
+REMOVE_LIST_MEMBER = "SELECT remove_list_member($1, $2)"
+
+
+class PostgresItemRepository(ItemStorage):
+    """
+    Direct Postgres access to grocery_items over an asyncpg connection pool.
+
+    Skips the PostgREST HTTP hop and its JSON encode/decode. Every query is
+    one of a fixed set of statements, prepared once per connection and
+    reused (asyncpg's statement cache). Batch/move/toggle operations call
+    the same SQL functions the PostgREST backend uses.
+
+    Each operation runs in a transaction that first sets the caller's JWT
+    claims and the `authenticated` role, so RLS policies apply per user.
+    The DATABASE_URL role must be allowed to SET ROLE authenticated (the
+    Supabase `postgres` role is). The caller is the handle's user
+    (for_user()); item methods on the process-wide instance act as the
+    list's owner, which is only right for personal lists.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        statement_cache_size: int = 100,
+    ):
+        self._pool = _LazyPool(database_url, min_size, max_size, statement_cache_size)
+        self.acting_user_id: Optional[str] = None
+
+    def for_user(self, user_id: str) -> "PostgresItemRepository":
+        """Handle acting as `user_id`, sharing this repository's pool."""
+        handle = copy.copy(self)
+        handle.acting_user_id = user_id
+        return handle
+
+    async def get_pool(self):
+        """Create the connection pool on first use."""
+        return await self._pool.get()
+
+    async def close(self) -> None:
+        await self._pool.close()
+
+    async def ping(self) -> None:
+        """Round trip on a pooled connection (raises if the database is unreachable)."""
+        pool = await self.get_pool()
+        async with pool.acquire() as conn:
+            await conn.fetchval("SELECT 1")
+
+    async def list_items(self, list_id: str, list_type: str) -> List[Dict]:
+        async with self._transaction(list_id, "list_items") as conn:
+            return _rows(await conn.fetch(LIST_ITEMS[list_type], list_id, list_type))
+
+    async def list_items_page(
+        self,
+        list_id: str,
+        list_type: str,
+        limit: int,
+        after: Optional[Dict] = None,
+        columns: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """
+        Keyset page in list_items() order. Each query is a range scan of the
+        pagination_indexes.sql index: the cursor's sort keys become a row
+        comparison on the index columns.
+        """
+        select = ", ".join(c for c in columns if c in ITEM_COLUMNS) if columns else "*"
+        base = f"SELECT {select} FROM grocery_items WHERE list_id = $1 AND list_type = $2"
+
+        async with self._transaction(list_id, "list_items_page") as conn:
+            if after is None:
+                return _rows(await conn.fetch(
+                    f"{base} ORDER BY {ORDER_BY[list_type]} LIMIT $3", list_id, list_type, limit
+                ))
+
+            if list_type == "items":
+                return _rows(await conn.fetch(
+                    f"{base} AND (name, item_id) > ($3, $4) ORDER BY {ORDER_BY['items']} LIMIT $5",
+                    list_id, list_type, after["name"], after["item_id"], limit,
+                ))
+
+            # to_buy: rest of the cursor's is_bought segment, then the bought items
+            rows = _rows(await conn.fetch(
+                f"{base} AND is_bought = $3 AND (created_at, item_id) < ($4, $5) "
+                f"ORDER BY created_at DESC, item_id DESC LIMIT $6",
+                list_id, list_type, after["is_bought"],
+                datetime.fromisoformat(after["created_at"]), after["item_id"], limit,
+            ))
+            if not after["is_bought"] and len(rows) < limit:
+                rows += _rows(await conn.fetch(
+                    f"{base} AND is_bought ORDER BY created_at DESC, item_id DESC LIMIT $3",
+                    list_id, list_type, limit - len(rows),
+                ))
+            return rows
+
+    async def list_all_items(self, list_id: str) -> Tuple[List[Dict], str]:
+        async with self._transaction(list_id, "list_all_items") as conn:
+            rows = _rows(await conn.fetch(LIST_ALL_ITEMS, list_id))
+        payload = json.dumps(rows, separators=(",", ":")).encode()
+        return rows, hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    async def list_version(self, list_id: str) -> str:
+        async with self._transaction(list_id, "list_version") as conn:
+            count, latest = await conn.fetchrow(LIST_VERSION, list_id)
+        return version_tag(list_id, count, _json_value(latest))
+
+    async def list_changes(self, list_id: str, since: str) -> Tuple[List[Dict], List[Dict]]:
+        # One transaction: both queries see the same snapshot
+        since_at = datetime.fromisoformat(since)
+        async with self._transaction(list_id, "list_changes") as conn:
+            upserts = _rows(await conn.fetch(LIST_UPDATED_SINCE, list_id, since_at))
+            deletes = _rows(await conn.fetch(LIST_DELETED_SINCE, list_id, since_at))
+        return upserts, deletes
+
+    async def insert_item(self, item_data: Dict) -> Optional[Dict]:
+        """
+        Raises:
+            DuplicateItemError: an item with the same name is already in the list
+        """
+        list_id = item_data["list_id"]
+        async with self._transaction(list_id, "insert_item") as conn:
+            row = await conn.fetchrow(
+                INSERT_ITEM, list_id, item_data["user_id"],
+                item_data["name"], item_data["list_type"], item_data["is_bought"],
+            )
+        return _row(row) if row else None
+
+    async def insert_items(self, list_id: str, user_id: str, items: List[Dict]) -> List[Dict]:
+        async with self._transaction(list_id, "insert_items") as conn:
+            return _rows(await conn.fetch(INSERT_ITEMS, list_id, user_id, json.dumps(items)))
+
+    async def toggle_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        async with self._transaction(list_id, "toggle_item") as conn:
+            rows = _rows(await conn.fetch(TOGGLE_ITEM, item_id, list_id))
+        return rows[0] if rows else None
+
+    async def toggle_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        async with self._transaction(list_id, "toggle_items") as conn:
+            return _rows(await conn.fetch(TOGGLE_ITEMS, list_id, item_ids))
+
+    async def move_item(self, list_id: str, item_id: str, to_list: str) -> Dict:
+        async with self._transaction(list_id, "move_item") as conn:
+            return json.loads(await conn.fetchval(MOVE_ITEM, item_id, list_id, to_list))
+
+    async def move_items(self, list_id: str, item_ids: List[str], to_list: str) -> List[Dict]:
+        async with self._transaction(list_id, "move_items") as conn:
+            return json.loads(await conn.fetchval(MOVE_ITEMS, list_id, item_ids, to_list))
+
+    async def delete_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        async with self._transaction(list_id, "delete_item") as conn:
+            row = await conn.fetchrow(DELETE_ITEM, item_id, list_id)
+        return _row(row) if row else None
+
+    async def delete_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        async with self._transaction(list_id, "delete_items") as conn:
+            return _rows(await conn.fetch(DELETE_ITEMS, list_id, item_ids))
+
+    async def list_purchase_stats(self, list_id: str) -> List[Dict]:
+        async with self._transaction(list_id, "list_purchase_stats") as conn:
+            return _rows(await conn.fetch(LIST_PURCHASE_STATS, list_id))
+
+    async def get_list_role(self, user_id: str, list_id: str) -> Optional[str]:
+        async with self._transaction(user_id, "get_list_role") as conn:
+            return await conn.fetchval(GET_LIST_ROLE, list_id, user_id)
+
+    async def list_shared_lists(self, user_id: str) -> List[Dict]:
+        async with self._transaction(user_id, "list_shared_lists") as conn:
+            return _rows(await conn.fetch(LIST_SHARED_LISTS))
+
+    async def create_shared_list(self, user_id: str, name: str) -> Dict:
+        async with self._transaction(user_id, "create_shared_list") as conn:
+            return _row(await conn.fetchrow(CREATE_SHARED_LIST, name))
+
+    async def create_list_invite(self, user_id: str, list_id: str, ttl_seconds: int) -> Dict:
+        async with self._transaction(user_id, "create_list_invite") as conn:
+            return json.loads(await conn.fetchval(CREATE_LIST_INVITE, list_id, ttl_seconds))
+
+    async def join_shared_list(self, user_id: str, code: str) -> Dict:
+        async with self._transaction(user_id, "join_shared_list") as conn:
+            return json.loads(await conn.fetchval(JOIN_SHARED_LIST, code))
+
+    async def remove_list_member(self, user_id: str, list_id: str, member_id: str) -> Dict:
+        async with self._transaction(user_id, "remove_list_member") as conn:
+            return json.loads(await conn.fetchval(REMOVE_LIST_MEMBER, list_id, member_id))
+
+    @asynccontextmanager
+    async def _transaction(self, user_id: str, operation: str) -> AsyncIterator:
+        import asyncpg
+
+        pool = await self.get_pool()
+        claims = json.dumps({"sub": self.acting_user_id or user_id, "role": "authenticated"})
+        with track_upstream("postgres", operation, timing="db"):
+            try:
+                async with pool.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.execute(SET_USER_CONTEXT, claims)
+                        yield conn
+            except asyncpg.UniqueViolationError as e:
+                raise DuplicateItemError(str(e))
+            except asyncpg.PostgresError as e:
+                raise RepositoryError(str(e))
+
+
+class _LazyPool:
+    """asyncpg pool created on first use, shared by every for_user() handle."""
+
+    def __init__(self, database_url: str, min_size: int, max_size: int, statement_cache_size: int):
+        self.database_url = database_url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    async def get(self):
+        async with self._lock:
+            if self._pool is None:
+                import asyncpg
+
+                self._pool = await asyncpg.create_pool(
+                    self.database_url,
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    statement_cache_size=self.statement_cache_size,
+                )
+            return self._pool
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+def _row(record) -> Dict:
+    """asyncpg Record -> dict with the JSON types PostgREST would return."""
+    return {key: _json_value(value) for key, value in record.items()}
+
+
+def _rows(records) -> List[Dict]:
+    return [_row(record) for record in records]
+
+
+def _json_value(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
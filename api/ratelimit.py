@@ -0,0 +1,288 @@
+import hashlib
+import json
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+
+from cache import LIST_CACHE_REDIS_URL
+from metrics import rate_limited_requests
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Token bucket per signed-in user: sustained requests/second and burst size
+RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "10"))
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "40"))
+# Token bucket per client IP for requests without a valid token
+RATE_LIMIT_IP_RATE = float(os.getenv("RATE_LIMIT_IP_RATE", "5"))
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "20"))
+# Mutations one user may have running at once (extra ones get 429 immediately)
+RATE_LIMIT_MAX_CONCURRENT_MUTATIONS = int(os.getenv("RATE_LIMIT_MAX_CONCURRENT_MUTATIONS", "4"))
+# Proxies in front of the app that append to X-Forwarded-For (1 on Railway).
+# 0 uses the socket peer address and ignores the header.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+# Share buckets and concurrency counts across workers (defaults to the list cache's Redis)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL") or LIST_CACHE_REDIS_URL
+
+# Probes and scrapes come from the platform, never from app clients
+EXEMPT_PATHS = {"/api/live", "/api/ready", "/api/metrics"}
+MUTATION_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# A worker that dies mid-request can't release its concurrency slots; they
+# expire after this long in the shared store
+CONCURRENCY_SLOT_TTL_SECONDS = 60
+
+
+class RateLimitStore(ABC):
+    """Token buckets and concurrency counters, keyed by user or IP."""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        """Take one token. Returns (allowed, seconds until a token is available)."""
+        ...
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: int) -> bool:
+        """Take a concurrency slot unless `limit` are already taken."""
+        ...
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        ...
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    In-process buckets (per worker). Size-bounded: the least recently used
+    buckets are dropped first, which only ever refills them.
+    """
+
+    def __init__(self, max_keys: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (tokens, last refill time)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._in_flight: Dict[str, int] = {}
+
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        now = self._clock()
+        tokens, updated_at = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        count = self._in_flight.get(key, 0)
+        if count >= limit:
+            return False
+        self._in_flight[key] = count + 1
+        return True
+
+    async def release(self, key: str) -> None:
+        count = self._in_flight.get(key, 0) - 1
+        if count > 0:
+            self._in_flight[key] = count
+        else:
+            self._in_flight.pop(key, None)
+
+
+# KEYS[1] bucket; ARGV rate, burst. Redis server time, so workers on
+# different hosts share one clock. Returns {allowed, retry_after}.
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(retry_after)}
+"""
+
+# KEYS[1] counter; ARGV limit, ttl ms. Returns 1 if a slot was taken.
+ACQUIRE_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+if count > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+return 1
+"""
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Redis-compatible store shared by all workers. Each check is one atomic
+    script call. Requires the `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "grocery:ratelimit:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(TAKE_SCRIPT)
+        self._acquire = self.client.register_script(ACQUIRE_SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: float) -> Tuple[bool, float]:
+        allowed, retry_after = await self._take(keys=[self.prefix + key], args=[rate, burst])
+        return bool(allowed), float(retry_after)
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        ttl_ms = CONCURRENCY_SLOT_TTL_SECONDS * 1000
+        return bool(await self._acquire(keys=[self.prefix + "inflight:" + key], args=[limit, ttl_ms]))
+
+    async def release(self, key: str) -> None:
+        await self.client.decr(self.prefix + "inflight:" + key)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware limiting /api/ requests before they reach auth or the
+    database:
+
+    - requests with a valid token: token bucket per user
+      (RATE_LIMIT_USER_RATE/s, bursts of RATE_LIMIT_USER_BURST)
+    - everything else (/api/config, /api/health, bad tokens): token bucket
+      per client IP (RATE_LIMIT_IP_RATE/s, RATE_LIMIT_IP_BURST)
+    - mutations: at most RATE_LIMIT_MAX_CONCURRENT_MUTATIONS in flight per
+      user
+
+    Over the limit the request gets 429 with Retry-After and never runs.
+
+    `resolve_user(scope, token)` maps a token to its user id. With local
+    verification it is the endpoints' own per-request check, so the endpoint
+    reuses its result. Without one (remote verification), requests are keyed by a
+    hash of the token instead, so limiting never costs an Auth round trip.
+    An unverified token is also charged to its client IP's bucket - a fresh
+    random token per request would otherwise always find a full bucket while
+    each one still costs the endpoint an Auth round trip.
+    """
+
+    def __init__(
+        self,
+        app,
+        store: RateLimitStore,
+        resolve_user: Optional[Callable[[Dict, str], Awaitable[str]]] = None,
+    ):
+        self.app = app
+        self.store = store
+        self.resolve_user = resolve_user
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or not scope["path"].startswith("/api/")
+            or scope["path"] in EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        user_key = await self._user_key(scope)
+        ip_bucket = (f"ip:{_client_ip(scope)}", RATE_LIMIT_IP_RATE, RATE_LIMIT_IP_BURST, "ip")
+        if user_key is None:
+            buckets = [ip_bucket]
+        elif user_key.startswith("token:"):
+            buckets = [(user_key, RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST, "user"), ip_bucket]
+        else:
+            buckets = [(user_key, RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST, "user")]
+
+        for key, rate, burst, kind in buckets:
+            allowed, retry_after = await self.store.take(key, rate, burst)
+            if not allowed:
+                rate_limited_requests.inc(kind)
+                await _send_429(send, "Too many requests", retry_after)
+                return
+
+        if user_key is None or scope["method"] not in MUTATION_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.store.acquire(user_key, RATE_LIMIT_MAX_CONCURRENT_MUTATIONS):
+            rate_limited_requests.inc("concurrency")
+            await _send_429(send, "Too many changes in progress", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.store.release(user_key)
+
+    async def _user_key(self, scope) -> Optional[str]:
+        token = _bearer_token(scope)
+        if not token:
+            return None
+        if self.resolve_user is None:
+            return "token:" + hashlib.sha256(token.encode()).hexdigest()[:32]
+        try:
+            return "user:" + await self.resolve_user(scope, token)
+        except HTTPException:
+            return None
+
+
+def build_rate_limit_store() -> RateLimitStore:
+    """Create the process-wide limiter store from environment config."""
+    if RATE_LIMIT_REDIS_URL:
+        return RedisRateLimitStore(RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimitStore(max_keys=RATE_LIMIT_MAX_KEYS)
+
+
+def _bearer_token(scope) -> Optional[str]:
+    headers = dict(scope["headers"])
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    # EventSource can't set headers: /api/stream takes the token in the query
+    if scope["path"] == "/api/stream":
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("access_token")
+        return values[0] if values else None
+    return None
+
+
+def _client_ip(scope) -> str:
+    if RATE_LIMIT_TRUSTED_PROXIES > 0:
+        forwarded = dict(scope["headers"]).get(b"x-forwarded-for", b"").decode("latin-1")
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        # Each trusted proxy appends the address it received from; anything
+        # further left was supplied by the client and can be forged
+        if len(hops) >= RATE_LIMIT_TRUSTED_PROXIES:
+            return hops[-RATE_LIMIT_TRUSTED_PROXIES]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def _send_429(send, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(math.ceil(retry_after), 1)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,506 @@
+import asyncio
+import hashlib
+import httpx
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import track_upstream
+
+
+# Postgres error code for unique_violation
+UNIQUE_VIOLATION = "23505"
+
+# Sort order of each list. item_id breaks ties so every row has a unique
+# position - required for keyset pagination (see list_items_page).
+LIST_ORDER = {
+    "to_buy": "is_bought.asc,created_at.desc,item_id.desc",
+    "items": "name.asc,item_id.asc",
+}
+# Columns a page cursor records (the sort keys above, in order)
+PAGE_KEYS = {
+    "to_buy": ("is_bought", "created_at", "item_id"),
+    "items": ("name", "item_id"),
+}
+
+
+class RepositoryError(Exception):
+    """PostgREST returned an error response."""
+
+
+class DuplicateItemError(RepositoryError):
+    """Insert hit the case-insensitive unique name index for the target list."""
+
+
+class ItemStorage(ABC):
+    """
+    Storage interface for grocery items (STORAGE_BACKEND selects the engine):
+
+    - ItemRepository: Supabase PostgREST over HTTP (default)
+    - PostgresItemRepository: direct asyncpg connection pool (postgres_repository.py)
+
+    Rows are returned as JSON-ready dicts (ids and timestamps as strings),
+    exactly as PostgREST returns them, so callers and the cache/event
+    wrappers don't depend on the backend.
+
+    Items belong to a list (shared_lists.sql): item methods are scoped by
+    list_id, which is the user's own id for their personal list. Callers
+    check membership first (get_list_id dependency). The sharing methods
+    act as `user_id` and must be called on a handle carrying that user's
+    credentials (get_user_storage dependency).
+    """
+
+    @abstractmethod
+    async def list_items(self, list_id: str, list_type: str) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def list_items_page(
+        self,
+        list_id: str,
+        list_type: str,
+        limit: int,
+        after: Optional[Dict] = None,
+        columns: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def list_all_items(self, list_id: str) -> Tuple[List[Dict], str]:
+        ...
+
+    @abstractmethod
+    async def list_version(self, list_id: str) -> str:
+        ...
+
+    @abstractmethod
+    async def list_changes(self, list_id: str, since: str) -> Tuple[List[Dict], List[Dict]]:
+        ...
+
+    @abstractmethod
+    async def insert_item(self, item_data: Dict) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def insert_items(self, list_id: str, user_id: str, items: List[Dict]) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def toggle_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def toggle_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def move_item(self, list_id: str, item_id: str, to_list: str) -> Dict:
+        ...
+
+    @abstractmethod
+    async def move_items(self, list_id: str, item_ids: List[str], to_list: str) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def delete_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def delete_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def list_purchase_stats(self, list_id: str) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def get_list_role(self, user_id: str, list_id: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def list_shared_lists(self, user_id: str) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def create_shared_list(self, user_id: str, name: str) -> Dict:
+        ...
+
+    @abstractmethod
+    async def create_list_invite(self, user_id: str, list_id: str, ttl_seconds: int) -> Dict:
+        ...
+
+    @abstractmethod
+    async def join_shared_list(self, user_id: str, code: str) -> Dict:
+        ...
+
+    @abstractmethod
+    async def remove_list_member(self, user_id: str, list_id: str, member_id: str) -> Dict:
+        ...
+
+
+class ItemRepository(ItemStorage):
+    """
+    Async access to the grocery_items table through PostgREST.
+
+    All instances share one httpx.AsyncClient (and its connection pool) - a
+    repository is just a set of request headers, so a handle per user token
+    is cheap. Requests run on the event loop without blocking other in-flight
+    requests on the worker.
+    """
+
+    TABLE = "grocery_items"
+    TOMBSTONES_TABLE = "grocery_item_tombstones"
+    STATS_TABLE = "grocery_item_stats"
+    MEMBERS_TABLE = "list_members"
+
+    def __init__(
+        self,
+        get_http: Callable[[], httpx.AsyncClient],
+        rest_url: str,
+        api_key: str,
+        access_token: Optional[str] = None,
+    ):
+        self.get_http = get_http
+        self.rest_url = rest_url.rstrip('/')
+        self.url = f"{self.rest_url}/{self.TABLE}"
+        self.tombstones_url = f"{self.rest_url}/{self.TOMBSTONES_TABLE}"
+        self.stats_url = f"{self.rest_url}/{self.STATS_TABLE}"
+        self.members_url = f"{self.rest_url}/{self.MEMBERS_TABLE}"
+        self.headers = {
+            "apikey": api_key,
+            # User's token gives PostgREST the auth.uid() context for RLS
+            "Authorization": f"Bearer {access_token or api_key}",
+        }
+        self.returning_headers = {**self.headers, "Prefer": "return=representation"}
+        self.count_headers = {**self.headers, "Prefer": "count=exact"}
+
+    async def list_items(self, list_id: str, list_type: str) -> List[Dict]:
+        """
+        Get a list's items of one type.
+
+        - to_buy: unbought first, then bought (each newest first)
+        - items: alphabetical by name
+        """
+        return await self._request("GET", params={
+            "select": "*",
+            "list_id": f"eq.{list_id}",
+            "list_type": f"eq.{list_type}",
+            "order": LIST_ORDER[list_type],
+        })
+
+    async def list_items_page(
+        self,
+        list_id: str,
+        list_type: str,
+        limit: int,
+        after: Optional[Dict] = None,
+        columns: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """
+        Get up to `limit` items of one list in list_items() order, starting
+        after the row whose sort keys (PAGE_KEYS) are `after`.
+
+        The cursor becomes a bound on the leading index column rather than an
+        OFFSET, so each query is a range scan of the composite indexes in
+        pagination_indexes.sql. `columns` restricts the select list.
+        """
+        params = {
+            "select": ",".join(columns) if columns else "*",
+            "list_id": f"eq.{list_id}",
+            "list_type": f"eq.{list_type}",
+            "order": LIST_ORDER[list_type],
+            "limit": str(limit),
+        }
+        if after is None:
+            return await self._request("GET", params=params)
+
+        if list_type == "items":
+            # Plain filters take the raw value; values inside or=(...) are quoted
+            return await self._request("GET", params={
+                **params,
+                "name": f"gte.{after['name']}",
+                "or": f"(name.gt.{_quote(after['name'])},item_id.gt.{after['item_id']})",
+            })
+
+        # to_buy: continue within the cursor's is_bought segment...
+        rows = await self._request("GET", params={
+            **params,
+            "is_bought": "eq.true" if after["is_bought"] else "eq.false",
+            "created_at": f"lte.{after['created_at']}",
+            "or": f"(created_at.lt.{_quote(after['created_at'])},item_id.lt.{after['item_id']})",
+        })
+        # ...and run on into the bought items once the unbought ones are exhausted
+        if not after["is_bought"] and len(rows) < limit:
+            rows += await self._request("GET", params={
+                **params,
+                "is_bought": "eq.true",
+                "limit": str(limit - len(rows)),
+            })
+        return rows
+
+    async def list_all_items(self, list_id: str) -> Tuple[List[Dict], str]:
+        """
+        Get a list's items of both types in one query, alphabetical by name.
+
+        Also returns a version string - a hash of the raw PostgREST response -
+        that changes whenever any of the list's rows change. Computed from the
+        bytes on the wire, so no re-serialization is needed to compare it.
+        """
+        response = await self._send("GET", params={
+            "select": "*",
+            "list_id": f"eq.{list_id}",
+            "order": "name.asc,item_id.asc",
+        })
+        version = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+        return response.json(), version
+
+    async def list_version(self, list_id: str) -> str:
+        """
+        Cheap validator for a list's contents (GET /api/lists ETag): the row
+        count and latest updated_at, read from the (list_id, updated_at) index
+        without fetching the rows. Inserts, updates and moves raise
+        updated_at; a delete lowers the count.
+        """
+        response = await self._send("GET", params={
+            "select": "updated_at",
+            "list_id": f"eq.{list_id}",
+            "order": "updated_at.desc",
+            "limit": 1,
+        }, count=True)
+        rows = response.json()
+        # Content-Range: 0-0/<total> (*/0 when empty)
+        total = response.headers.get("content-range", "*/0").rsplit("/", 1)[-1]
+        return version_tag(list_id, int(total), rows[0]["updated_at"] if rows else None)
+
+    async def list_changes(self, list_id: str, since: str) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Items updated and items deleted after `since` (ISO timestamp), oldest
+        change first. Both queries run concurrently on the shared pool.
+
+        Returns (upserted rows, tombstones with item_id/list_type/deleted_at).
+        """
+        upserts, deletes = await asyncio.gather(
+            self._request("GET", params={
+                "select": "*",
+                "list_id": f"eq.{list_id}",
+                "updated_at": f"gt.{since}",
+                "order": "updated_at.asc",
+            }),
+            self._request("GET", url=self.tombstones_url, params={
+                "select": "item_id,list_type,deleted_at",
+                "list_id": f"eq.{list_id}",
+                "deleted_at": f"gt.{since}",
+                "order": "deleted_at.asc",
+            }),
+        )
+        return upserts, deletes
+
+    async def insert_item(self, item_data: Dict) -> Optional[Dict]:
+        """
+        Insert an item. The unique (list_id, list_type, lower(name)) index does
+        the duplicate check in the same statement.
+
+        Raises:
+            DuplicateItemError: an item with the same name is already in the list
+        """
+        rows = await self._request("POST", json=item_data, returning=True)
+        return rows[0] if rows else None
+
+    async def toggle_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        """Flip is_bought in one statement (toggle_grocery_item RPC)."""
+        rows = await self._rpc("toggle_grocery_item", {
+            "p_item_id": item_id,
+            "p_list_id": list_id,
+        })
+        return rows[0] if rows else None
+
+    async def delete_item(self, list_id: str, item_id: str) -> Optional[Dict]:
+        """Delete an item. Returns the deleted row, or None if nothing matched."""
+        rows = await self._request(
+            "DELETE",
+            params={"item_id": f"eq.{item_id}", "list_id": f"eq.{list_id}"},
+            returning=True,
+        )
+        return rows[0] if rows else None
+
+    async def insert_items(self, list_id: str, user_id: str, items: List[Dict]) -> List[Dict]:
+        """
+        Bulk insert in one statement (insert_grocery_items RPC), added by
+        `user_id`. Names that already exist in their target list are skipped;
+        only inserted rows are returned.
+        """
+        return await self._rpc("insert_grocery_items", {
+            "p_list_id": list_id,
+            "p_user_id": user_id,
+            "p_items": items,
+        })
+
+    async def toggle_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        """Flip is_bought on several items in one statement. Returns updated rows."""
+        return await self._rpc("toggle_grocery_items", {
+            "p_list_id": list_id,
+            "p_item_ids": item_ids,
+        })
+
+    async def move_items(self, list_id: str, item_ids: List[str], to_list: str) -> List[Dict]:
+        """
+        Move several items in one transaction (move_grocery_items RPC).
+        Returns one move_item() result per id, each with the source item_id.
+        """
+        return await self._rpc("move_grocery_items", {
+            "p_list_id": list_id,
+            "p_item_ids": item_ids,
+            "p_to_list": to_list,
+        })
+
+    async def delete_items(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        """Delete several items in one statement. Returns the deleted rows."""
+        return await self._request(
+            "DELETE",
+            params={"item_id": f"in.({','.join(item_ids)})", "list_id": f"eq.{list_id}"},
+            returning=True,
+        )
+
+    async def move_item(self, list_id: str, item_id: str, to_list: str) -> Dict:
+        """
+        Move an item to another list in one transaction (move_grocery_item RPC).
+
+        Returns {"status": "moved", "item": {...}}, {"status": "not_found"}
+        or {"status": "conflict", "name": ...}.
+        """
+        return await self._rpc("move_grocery_item", {
+            "p_item_id": item_id,
+            "p_list_id": list_id,
+            "p_to_list": to_list,
+        })
+
+    async def list_purchase_stats(self, list_id: str) -> List[Dict]:
+        """
+        Per-name purchase aggregates (purchase_history.sql), most bought
+        first. Maintained by triggers on every toggle - one read, no scan of
+        the event history.
+        """
+        return await self._request("GET", url=self.stats_url, params={
+            "select": "name,purchase_count,first_bought_at,last_bought_at",
+            "list_id": f"eq.{list_id}",
+            "purchase_count": "gt.0",
+            "order": "purchase_count.desc,last_bought_at.desc",
+        })
+
+    # Sharing: this handle must carry the user's own token (RLS and the
+    # sharing functions act as auth.uid()), so `user_id` isn't sent.
+
+    async def get_list_role(self, user_id: str, list_id: str) -> Optional[str]:
+        """The user's role in a list, or None if not a member (primary key lookup)."""
+        rows = await self._request("GET", url=self.members_url, params={
+            "select": "role",
+            "list_id": f"eq.{list_id}",
+            "user_id": f"eq.{user_id}",
+        })
+        return rows[0]["role"] if rows else None
+
+    async def list_shared_lists(self, user_id: str) -> List[Dict]:
+        """Lists the user can open, personal list first (get_shared_lists RPC)."""
+        return await self._rpc("get_shared_lists", {})
+
+    async def create_shared_list(self, user_id: str, name: str) -> Dict:
+        """Create an empty list owned by the user. Returns the lists row."""
+        rows = await self._rpc("create_shared_list", {"p_name": name})
+        return rows[0]
+
+    async def create_list_invite(self, user_id: str, list_id: str, ttl_seconds: int) -> Dict:
+        """
+        Invite code for a list the user is in (sharing their personal list
+        on first use). Returns {"status": "created", "code", "expires_at"}
+        or {"status": "not_found"}.
+        """
+        return await self._rpc("create_list_invite", {
+            "p_list_id": list_id,
+            "p_ttl_seconds": ttl_seconds,
+        })
+
+    async def join_shared_list(self, user_id: str, code: str) -> Dict:
+        """
+        Join the list an invite code belongs to. Returns {"status": "joined",
+        "list_id", "name"} or {"status": "invalid"}.
+        """
+        return await self._rpc("join_shared_list", {"p_code": code})
+
+    async def remove_list_member(self, user_id: str, list_id: str, member_id: str) -> Dict:
+        """
+        Leave a list (member_id = user_id) or, as its owner, remove a member.
+        Returns {"status": "removed" | "not_found" | "forbidden"}.
+        """
+        return await self._rpc("remove_list_member", {
+            "p_list_id": list_id,
+            "p_user_id": member_id,
+        })
+
+    async def _rpc(self, function: str, args: Dict):
+        with track_upstream("postgrest", f"rpc/{function}", timing="db"):
+            response = await self.get_http().post(
+                f"{self.rest_url}/rpc/{function}", json=args, headers=self.headers
+            )
+            if response.is_error:
+                raise _error_for(response)
+        return response.json()
+
+    async def _request(
+        self,
+        method: str,
+        params: Optional[Dict] = None,
+        json: Optional[Dict] = None,
+        returning: bool = False,
+        url: Optional[str] = None,
+    ) -> List[Dict]:
+        response = await self._send(method, params=params, json=json, returning=returning, url=url)
+        return response.json()
+
+    async def _send(
+        self,
+        method: str,
+        params: Optional[Dict] = None,
+        json: Optional[Dict] = None,
+        returning: bool = False,
+        url: Optional[str] = None,
+        count: bool = False,
+    ) -> httpx.Response:
+        headers = self.returning_headers if returning else self.count_headers if count else self.headers
+        url = url or self.url
+        with track_upstream("postgrest", f"{method} {url.rsplit('/', 1)[-1]}", timing="db"):
+            response = await self.get_http().request(
+                method, url, params=params, json=json, headers=headers
+            )
+            if response.is_error:
+                raise _error_for(response)
+        return response
+
+
+def version_tag(list_id: str, count: int, latest_updated_at: Optional[str]) -> str:
+    """list_version() result: a short hash of the list id, row count and latest updated_at."""
+    key = f"{list_id}:{count}:{latest_updated_at}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _quote(value) -> str:
+    """Double-quote a value for a PostgREST or=(...) filter."""
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def _error_for(response: httpx.Response) -> RepositoryError:
+    message = _error_message(response)
+    try:
+        code = response.json().get("code")
+    except (ValueError, AttributeError):
+        code = None
+    if code == UNIQUE_VIOLATION:
+        return DuplicateItemError(message)
+    return RepositoryError(message)
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        body = response.json()
+        return body.get("message") or str(body)
+    except ValueError:
+        return f"HTTP {response.status_code}: {response.text}"
@@ -0,0 +1,83 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# How long a confirmed membership is trusted before it's looked up again.
+# Someone removed from a list keeps access on other workers for at most this long.
+LIST_ACCESS_CACHE_TTL_SECONDS = float(os.getenv("LIST_ACCESS_CACHE_TTL_SECONDS", "60"))
+LIST_ACCESS_CACHE_MAX_ENTRIES = int(os.getenv("LIST_ACCESS_CACHE_MAX_ENTRIES", "10000"))
+# Invite links stay valid this long (default one week)
+LIST_INVITE_TTL_SECONDS = int(os.getenv("LIST_INVITE_TTL_SECONDS", "604800"))
+
+
+class ListAccessCache:
+    """
+    Recent membership checks: (user_id, list_id) -> role.
+
+    Requests on a shared list carry its id (X-List-Id); without this every
+    one of them would cost a list_members lookup before the real query.
+    Personal lists (list_id = user_id) never get here. Only memberships are
+    cached - a miss is looked up every time, so joining takes effect
+    immediately and non-members can't fill the cache.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        # (user_id, list_id) -> (role, expires_at)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+
+    async def get_role(
+        self,
+        user_id: str,
+        list_id: str,
+        load: Callable[[], Awaitable[Optional[str]]],
+    ) -> Optional[str]:
+        """The user's role in the list (None if not a member), calling `load` on a miss."""
+        key = (user_id, list_id)
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() < entry[1]:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        self.misses += 1
+        role = await load()
+        if role is None:
+            self._entries.pop(key, None)
+            return None
+        self._entries[key] = (role, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return role
+
+    def forget(self, user_id: str, list_id: str) -> None:
+        """Drop a cached membership (after leaving or being removed from a list)."""
+        self._entries.pop((user_id, list_id), None)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+def build_list_access_cache() -> ListAccessCache:
+    """Create the process-wide membership cache from environment config."""
+    return ListAccessCache(
+        ttl_seconds=LIST_ACCESS_CACHE_TTL_SECONDS,
+        max_entries=LIST_ACCESS_CACHE_MAX_ENTRIES,
+    )
@@ -0,0 +1,59 @@
+// Service worker: keeps the app shell (the page and supabase-js) on the
+// device so the lists open with no network. Both are served from the cache
+// immediately and refreshed in the background (stale-while-revalidate), so a
+// deploy shows up on the next launch. API calls are never intercepted - the
+// page keeps its own copy of the data in IndexedDB.
+const CACHE_NAME = 'grocery-shell-v1';
+const SUPABASE_JS = 'https://cdn.jsdelivr.net/npm/@supabase/supabase-js@2';
+const SHELL = ['/', SUPABASE_JS];
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(names
+                .filter(name => name !== CACHE_NAME)
+                .map(name => caches.delete(name))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+
+    const url = new URL(request.url);
+    let cacheKey = null;
+    if (request.mode === 'navigate' && url.origin === self.location.origin && url.pathname === '/') {
+        cacheKey = '/';
+    } else if (request.url === SUPABASE_JS) {
+        cacheKey = SUPABASE_JS;
+    }
+    if (!cacheKey) return;
+
+    event.respondWith(staleWhileRevalidate(event, request, cacheKey));
+});
+
+async function staleWhileRevalidate(event, request, cacheKey) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(cacheKey);
+
+    const update = fetch(request).then(response => {
+        if (response.ok) return cache.put(cacheKey, response.clone()).then(() => response);
+        return response;
+    });
+
+    if (cached) {
+        // Answer from the cache now; refresh it for next time
+        event.waitUntil(update.catch(() => {}));
+        return cached;
+    }
+    return update;
+}
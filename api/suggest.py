@@ -0,0 +1,103 @@
+import os
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+# Lists whose name index is kept in memory (least recently used dropped first)
+SUGGEST_INDEX_MAX_USERS = int(os.getenv("SUGGEST_INDEX_MAX_USERS", "1000"))
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+
+def normalize_name(name: str) -> str:
+    """
+    The form item names are compared in: trimmed and lowercased. Both
+    create endpoints store names trimmed, so this matches the lower(name)
+    unique index that enforces one item per name and list.
+    """
+    return name.strip().lower()
+
+
+class NameIndex:
+    """
+    Prefix index over one list's item names (both list types).
+
+    Every name is indexed under its full normalized form and under each word
+    start, so "mi" finds "Milk" and "Oat milk". The keys live in one sorted
+    list: a lookup is a binary search to the first key with the prefix,
+    then a scan over the matching run.
+    """
+
+    def __init__(self, rows: List[Dict]):
+        # normalized name -> {"name": display name, "lists": {list_type: item_id}}
+        self.entries: Dict[str, Dict] = {}
+        for row in rows:
+            normalized = normalize_name(row["name"])
+            entry = self.entries.setdefault(normalized, {"name": row["name"].strip(), "lists": {}})
+            entry["lists"][row["list_type"]] = row["item_id"]
+            if row["list_type"] == "items":
+                # The inventory's spelling wins when the lists differ in case
+                entry["name"] = row["name"].strip()
+
+        # (key, word position, normalized name); position 0 = start of the name
+        self._keys: List[Tuple[str, int, str]] = []
+        for normalized in self.entries:
+            words = normalized.split()
+            for position in range(len(words)):
+                self._keys.append((" ".join(words[position:]), position, normalized))
+        self._keys.sort()
+
+    def search(self, prefix: str, limit: int = SUGGEST_DEFAULT_LIMIT) -> List[Dict]:
+        """
+        Names starting with `prefix` (or with a word starting with it), best
+        first: whole-name matches before word matches, then shorter names,
+        then alphabetical.
+        """
+        prefix = " ".join(normalize_name(prefix).split())
+        if not prefix:
+            return []
+
+        best: Dict[str, int] = {}
+        start = bisect_left(self._keys, (prefix,))
+        for index in range(start, len(self._keys)):
+            key, position, normalized = self._keys[index]
+            if not key.startswith(prefix):
+                break
+            best[normalized] = min(position, best.get(normalized, position))
+
+        ranked = sorted(best, key=lambda normalized: (best[normalized] > 0, len(normalized), normalized))
+        return [self.entries[normalized] for normalized in ranked[:limit]]
+
+
+class SuggestIndexCache:
+    """
+    Per-list NameIndex, rebuilt whenever the list changes.
+
+    Indexes are keyed by the list version from list_all_items() (a hash of
+    the rows), so an index is never older than the (cached) lists it is
+    looked up with: any change to the rows yields a new version and the next
+    lookup rebuilds it.
+    """
+
+    def __init__(self, max_users: int = SUGGEST_INDEX_MAX_USERS):
+        self.max_users = max_users
+        self.builds = 0
+        # list_id -> (list version, index)
+        self._indexes: "OrderedDict[str, Tuple[str, NameIndex]]" = OrderedDict()
+
+    def get(self, list_id: str, rows: List[Dict], version: str) -> NameIndex:
+        cached = self._indexes.get(list_id)
+        if cached is not None and cached[0] == version:
+            self._indexes.move_to_end(list_id)
+            return cached[1]
+
+        index = NameIndex(rows)
+        self.builds += 1
+        self._indexes[list_id] = (version, index)
+        self._indexes.move_to_end(list_id)
+        while len(self._indexes) > self.max_users:
+            self._indexes.popitem(last=False)
+        return index
+
+    def stats(self) -> Dict:
+        return {"lists": len(self._indexes), "builds": self.builds}
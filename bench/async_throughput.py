@@ -0,0 +1,128 @@
+"""
+Concurrent-request throughput: sync supabase-py calls vs. the async repository.
+
+Starts a fake Supabase (with simulated network latency) and two API servers:
+
+- before: GET /api/items as it used to be - `async def` handler calling the
+  synchronous supabase-py client (`auth.get_user` + `.execute()`), which
+  blocks the event loop for every round trip
+- after: the real api/main.py app (local JWT verification + ItemRepository
+  on a shared httpx.AsyncClient), with the anon key and in RLS mode
+  (USE_AUTHENTICATED_CLIENT - per-token repository handles)
+
+Usage (from the repo root):
+    python bench/async_throughput.py --requests 200 --concurrency 50 --latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Tuple
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fake_supabase import FakeSupabase, anon_key, make_token, serve_in_thread, JWT_SECRET
+
+FAKE_PORT = 54321
+BEFORE_PORT = 8101
+AFTER_PORT = 8102
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def build_before_app(supabase_url: str, key: str):
+    from fastapi import FastAPI, Header
+    from supabase import create_client
+
+    client = create_client(supabase_url, key)
+    app = FastAPI()
+
+    @app.get("/api/items")
+    async def get_items(list_type: str, authorization: str = Header()):
+        client.auth.get_user(authorization.removeprefix("Bearer "))
+        return client.table("grocery_items") \
+            .select("*") \
+            .eq("user_id", USER_ID) \
+            .eq("list_type", list_type) \
+            .order("name", desc=False) \
+            .execute().data
+
+    return app
+
+
+def build_after_app(supabase_url: str, key: str):
+    os.environ["SUPABASE_URL"] = supabase_url
+    os.environ["SUPABASE_ANON_KEY"] = key
+    os.environ["SUPABASE_JWT_SECRET"] = JWT_SECRET
+    # One user at full speed is exactly what the limiter stops; measure the handler
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+    import main
+    import dependencies
+    return main.app, dependencies
+
+
+async def run_load(base_url: str, token: str, total: int, concurrency: int) -> Tuple[float, int]:
+    """Seconds to complete `total` requests, and how many of them got 429."""
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    rate_limited = 0
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def one():
+            nonlocal rate_limited
+            async with semaphore:
+                response = await client.get(
+                    "/api/items",
+                    params={"list_type": "items"},
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                if response.status_code == 429:
+                    rate_limited += 1
+                    return
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - start, rate_limited
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated Supabase latency (s)")
+    parser.add_argument("--items", type=int, default=50, help="rows in the list")
+    args = parser.parse_args()
+
+    fake = FakeSupabase(latency=args.latency)
+    fake.seed(USER_ID, "items", args.items)
+    supabase_url = f"http://127.0.0.1:{FAKE_PORT}"
+    key = anon_key()
+    serve_in_thread(fake.app, FAKE_PORT)
+
+    token = make_token(supabase_url, USER_ID)
+    serve_in_thread(build_before_app(supabase_url, key), BEFORE_PORT)
+    after_app, dependencies = build_after_app(supabase_url, key)
+    serve_in_thread(after_app, AFTER_PORT)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"simulated latency {args.latency * 1000:.0f}ms, {args.items} items")
+    runs = (
+        ("before (sync client)", BEFORE_PORT, False),
+        ("after (async repo)", AFTER_PORT, False),
+        ("after (RLS mode)", AFTER_PORT, True),
+    )
+    for label, port, rls_mode in runs:
+        dependencies.USE_AUTHENTICATED_CLIENT = rls_mode
+        elapsed, rate_limited = asyncio.run(
+            run_load(f"http://127.0.0.1:{port}", token, args.requests, args.concurrency)
+        )
+        note = f"  ({rate_limited} rate-limited with 429)" if rate_limited else ""
+        print(f"  {label:22s} {elapsed:6.2f}s  {args.requests / elapsed:8.1f} req/s{note}")
+
+
+if __name__ == "__main__":
+    main()
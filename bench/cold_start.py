@@ -0,0 +1,202 @@
+"""
+Cold-start cost of an API worker: module import time and time from process
+start to the first healthy response, checked against a budget.
+
+- imports: `python -X importtime -c "import main"` in api/, reporting the
+  total and the slowest top-level packages (self time summed per package)
+- startup: launches uvicorn against the fake Supabase and polls until
+  /api/live and then /api/ready answer 200 (connection pools warm, backends
+  reachable), from the moment the process is spawned
+
+Each is measured --runs times and the median is compared with the budget;
+the exit status is 1 when either median is over it, so this can gate a
+change in CI. Save a run with --json.
+
+Usage (from the repo root):
+    python bench/cold_start.py
+    python bench/cold_start.py --runs 10 --ready-budget-ms 1500
+    python bench/cold_start.py --json cold_start.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fake_supabase import anon_key, JWT_SECRET
+
+FAKE_PORT = 54324
+API_PORT = 8105
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, "..", "api")
+
+# Budgets for the medians (ms). Startup is measured against the fake
+# Supabase on this machine, so it excludes the real network round trips
+# warm-up makes to Supabase (a few ms each, in parallel).
+IMPORT_BUDGET_MS = 1000
+READY_BUDGET_MS = 2000
+
+POLL_INTERVAL_SECONDS = 0.01
+
+
+def api_env(supabase_url: str) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "SUPABASE_URL": supabase_url,
+        "SUPABASE_ANON_KEY": anon_key(),
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "LOG_LEVEL": "WARNING",
+    }
+
+
+def measure_imports(env: Dict[str, str]) -> Tuple[float, Dict[str, float]]:
+    """Cumulative import time of `main` and self time per top-level package (ms)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True,
+    )
+    total = 0.0
+    packages: Dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1000
+        if name.strip() == "main" and not name.startswith("  "):
+            total = int(cumulative_us) / 1000
+    return total, packages
+
+
+def measure_startup(env: Dict[str, str], base_url: str) -> Tuple[float, float]:
+    """Ms from spawning uvicorn to the first 200 from /api/live and from /api/ready."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(API_PORT), "--log-level", "warning"],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        # One client for all polls - a new one per poll (SSL context and all)
+        # costs enough CPU to slow down the startup being measured
+        with httpx.Client() as client:
+            live = _wait_for_200(client, f"{base_url}/api/live", start, process)
+            ready = _wait_for_200(client, f"{base_url}/api/ready", start, process)
+        return live, ready
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def _wait_for_200(client: httpx.Client, url: str, start: float, process: subprocess.Popen) -> float:
+    deadline = start + 30
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with status {process.returncode} before {url} answered")
+        try:
+            if client.get(url).status_code == 200:
+                return (time.perf_counter() - start) * 1000
+        except httpx.TransportError:
+            pass
+        time.sleep(POLL_INTERVAL_SECONDS)
+    raise RuntimeError(f"{url} did not answer 200 within 30s")
+
+
+def start_fake(supabase_url: str) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "fake_supabase.py", "--port", str(FAKE_PORT), "--latency", "0"],
+        cwd=BENCH_DIR, stdout=subprocess.DEVNULL,
+    )
+    for _ in range(300):
+        try:
+            httpx.get(f"{supabase_url}/auth/v1/health")
+            return process
+        except httpx.TransportError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("fake_supabase.py did not start")
+
+
+def print_report(results: Dict, budgets: Dict[str, float], top: int) -> List[str]:
+    """Print medians against budgets; returns the names of exceeded budgets."""
+    over = []
+    print(f"{'':<22}{'median':>10}{'min':>10}{'max':>10}{'budget':>10}")
+    for name, samples in results["samples"].items():
+        median = statistics.median(samples)
+        budget = budgets.get(name)
+        flag = ""
+        if budget is not None and median > budget:
+            flag = "  OVER"
+            over.append(name)
+        print(f"{name + ' (ms)':<22}{median:>10.1f}{min(samples):>10.1f}{max(samples):>10.1f}"
+              f"{budget if budget is not None else '-':>10}{flag}")
+
+    print(f"\nslowest packages by import self time (median ms, top {top}):")
+    for package, ms in list(results["packages"].items())[:top]:
+        print(f"  {package:<28}{ms:>8.1f}")
+    return over
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="packages listed in the import breakdown")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--ready-budget-ms", type=float, default=READY_BUDGET_MS,
+                        help="process start to first 200 from /api/ready")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    supabase_url = f"http://127.0.0.1:{FAKE_PORT}"
+    base_url = f"http://127.0.0.1:{API_PORT}"
+    env = api_env(supabase_url)
+
+    samples: Dict[str, List[float]] = {"import main": [], "first /api/live": [], "first /api/ready": []}
+    package_samples: Dict[str, List[float]] = defaultdict(list)
+    # Warm the OS file cache and __pycache__ so every run measures the same thing
+    measure_imports(env)
+    for _ in range(args.runs):
+        total, packages = measure_imports(env)
+        samples["import main"].append(total)
+        for package, ms in packages.items():
+            package_samples[package].append(ms)
+
+    fake = start_fake(supabase_url)
+    try:
+        for _ in range(args.runs):
+            live, ready = measure_startup(env, base_url)
+            samples["first /api/live"].append(live)
+            samples["first /api/ready"].append(ready)
+    finally:
+        fake.terminate()
+        fake.wait()
+
+    packages = {package: statistics.median(values) for package, values in package_samples.items()}
+    results = {
+        "config": {"runs": args.runs, "python": sys.version.split()[0]},
+        "samples": samples,
+        "packages": dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)),
+    }
+    budgets = {"import main": args.import_budget_ms, "first /api/ready": args.ready_budget_ms}
+
+    print(f"config: {results['config']}")
+    over = print_report(results, budgets, args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.json}")
+
+    if over:
+        print(f"\nover budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+"""
+Local in-memory stand-in for the parts of Supabase the API talks to.
+
+- PostgREST: /rest/v1/grocery_items (select/insert/update/delete with
+  eq/gt/gte/lt/lte/ilike and or=(...) filters, order, limit and
+  Prefer: count=exact, updated_at maintained, unique (list_id,
+  list_type, lower(name))),
+  /rest/v1/grocery_item_tombstones (written on delete),
+  /rest/v1/grocery_item_stats (kept like the purchase_history.sql
+  triggers do), /rest/v1/list_members and the RPCs in migrations/
+  (toggle/move/insert_grocery_item(s), the shared_lists.sql functions -
+  those act as the user in the bearer token, like auth.uid())
+- Auth: /auth/v1/user, /auth/v1/health and /auth/v1/.well-known/jwks.json
+
+Row visibility follows the RLS policies, except for service_role_key(),
+which sees every row like Supabase's service_role key. Items added with a
+user's token must be added as that user (the INSERT policy); the anon key
+isn't checked.
+
+Every request sleeps for `latency` seconds to model the network hop to a
+hosted Supabase project. Tokens are HS256 JWTs signed with JWT_SECRET so
+the API can verify them locally (AUTH_VERIFY_MODE=local).
+
+Run standalone with `python bench/fake_supabase.py --port 54321 --latency 0.01`.
+"""
+import asyncio
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import jwt
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+JWT_SECRET = "bench-secret"
+JWT_AUDIENCE = "authenticated"
+# Unticking a purchase this soon undoes it (purchase_history.sql)
+PURCHASE_UNDO_WINDOW = timedelta(minutes=10)
+
+
+def make_token(base_url: str, user_id: str, ttl_seconds: int = 3600) -> str:
+    """Issue an access token the API accepts for `user_id`."""
+    return jwt.encode(
+        {
+            "sub": user_id,
+            "aud": JWT_AUDIENCE,
+            "iss": f"{base_url.rstrip('/')}/auth/v1",
+            "exp": int(time.time()) + ttl_seconds,
+            "role": "authenticated",
+        },
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+def anon_key() -> str:
+    return jwt.encode({"role": "anon"}, JWT_SECRET, algorithm="HS256")
+
+
+def service_role_key() -> str:
+    """Key whose requests skip RLS, like Supabase's service_role key."""
+    return jwt.encode({"role": "service_role"}, JWT_SECRET, algorithm="HS256")
+
+
+class UniqueViolation(Exception):
+    """Insert would duplicate (list_id, list_type, lower(name))."""
+
+
+class FakeSupabase:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        # Rows are kept per list so filtered queries don't scan every list's items
+        self.rows_by_list: Dict[str, List[Dict]] = {}
+        self.tombstones: List[Dict] = []
+        self.events: List[Dict] = []
+        # (list_id, lower(name)) -> grocery_item_stats row
+        self.stats: Dict[tuple, Dict] = {}
+        # shared_lists.sql: list_id -> lists row, (list_id, user_id) -> member, code -> invite
+        self.lists: Dict[str, Dict] = {}
+        self.members: Dict[tuple, Dict] = {}
+        self.invites: Dict[str, Dict] = {}
+        self.request_count = 0
+        self.app = Starlette(routes=[
+            Route("/rest/v1/grocery_items", self.items, methods=["GET", "POST", "PATCH", "DELETE"]),
+            Route("/rest/v1/grocery_item_tombstones", self.tombstone_rows, methods=["GET"]),
+            Route("/rest/v1/grocery_item_stats", self.stats_rows, methods=["GET"]),
+            Route("/rest/v1/list_members", self.member_rows, methods=["GET"]),
+            Route("/rest/v1/rpc/{function}", self.rpc, methods=["POST"]),
+            Route("/auth/v1/user", self.user, methods=["GET"]),
+            Route("/auth/v1/health", self.auth_health, methods=["GET"]),
+            Route("/auth/v1/.well-known/jwks.json", self.jwks, methods=["GET"]),
+        ])
+
+    @property
+    def rows(self) -> List[Dict]:
+        return [row for rows in self.rows_by_list.values() for row in rows]
+
+    async def _delay(self):
+        self.request_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def user(self, request: Request):
+        await self._delay()
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        try:
+            claims = jwt.decode(token, JWT_SECRET, algorithms=["HS256"], audience=JWT_AUDIENCE)
+        except jwt.PyJWTError as e:
+            return JSONResponse({"message": str(e)}, status_code=401)
+        return JSONResponse({
+            "id": claims["sub"],
+            "email": f"{claims['sub']}@bench.local",
+            "aud": JWT_AUDIENCE,
+            "app_metadata": {},
+            "user_metadata": {},
+            "created_at": "2025-01-01T00:00:00+00:00",
+        })
+
+    async def auth_health(self, request: Request):
+        await self._delay()
+        return JSONResponse({"name": "GoTrue", "version": "fake", "description": "fake_supabase"})
+
+    async def jwks(self, request: Request):
+        await self._delay()
+        return JSONResponse({"keys": []})
+
+    async def items(self, request: Request):
+        await self._delay()
+        params = request.query_params
+        matched = [row for row in self._candidates(params) if _matches(row, _filters(params))]
+
+        if request.method == "GET":
+            selected = _select(matched, params)
+            headers = {}
+            if "count=exact" in request.headers.get("prefer", ""):
+                shown = f"0-{len(selected) - 1}" if selected else "*"
+                headers["Content-Range"] = f"{shown}/{len(matched)}"
+            return JSONResponse(selected, headers=headers)
+
+        if request.method == "POST":
+            payload = await request.json()
+            rows = payload if isinstance(payload, list) else [payload]
+            caller = _caller(request)
+            if caller is not None and any(values.get("user_id") != caller for values in rows):
+                return _rls_violation()
+            try:
+                created = [self._insert(values) for values in rows]
+            except UniqueViolation as e:
+                return _unique_violation(e)
+            return JSONResponse(created, status_code=201)
+
+        if request.method == "PATCH":
+            values = await request.json()
+            for row in matched:
+                was_bought = row["is_bought"]
+                row.update(values, updated_at=_now())
+                if row["is_bought"] != was_bought:
+                    self._record_toggle(row)
+            return JSONResponse(matched)
+
+        # DELETE
+        for row in matched:
+            self._delete(row)
+        return JSONResponse(matched)
+
+    async def tombstone_rows(self, request: Request):
+        await self._delay()
+        params = request.query_params
+        matched = [row for row in self.tombstones if _matches(row, _filters(params))]
+        return JSONResponse(_select(matched, params))
+
+    async def stats_rows(self, request: Request):
+        await self._delay()
+        params = request.query_params
+        matched = [row for row in self.stats.values() if _matches(row, _filters(params))]
+        return JSONResponse(_select(matched, params))
+
+    async def member_rows(self, request: Request):
+        await self._delay()
+        params = request.query_params
+        # RLS: only your own memberships are visible (all of them to service_role)
+        caller = _caller(request)
+        bypass_rls = _is_service_role(request)
+        matched = [
+            row for row in self.members.values()
+            if (bypass_rls or row["user_id"] == caller) and _matches(row, _filters(params))
+        ]
+        return JSONResponse(_select(matched, params))
+
+    async def rpc(self, request: Request):
+        """The SQL functions in migrations/, with the same return shapes."""
+        await self._delay()
+        function = request.path_params["function"]
+        args = await request.json()
+        list_id = args.get("p_list_id")
+
+        if function == "toggle_grocery_item":
+            return JSONResponse(self._toggle(list_id, [args["p_item_id"]]))
+        if function == "toggle_grocery_items":
+            return JSONResponse(self._toggle(list_id, args["p_item_ids"]))
+        if function == "move_grocery_item":
+            return JSONResponse(self._move(list_id, args["p_item_id"], args["p_to_list"], _caller(request)))
+        if function == "move_grocery_items":
+            caller = _caller(request)
+            return JSONResponse([
+                {**self._move(list_id, item_id, args["p_to_list"], caller), "item_id": item_id}
+                for item_id in args["p_item_ids"]
+            ])
+        if function == "insert_grocery_items":
+            created = []
+            for item in args["p_items"]:
+                try:
+                    created.append(self._insert({"list_id": list_id, "user_id": args["p_user_id"], **item}))
+                except UniqueViolation:
+                    pass  # ON CONFLICT DO NOTHING
+            return JSONResponse(created)
+        if function in SHARING_FUNCTIONS:
+            caller = _caller(request)
+            if caller is None:
+                return JSONResponse({"code": "28000", "message": "not signed in"}, status_code=403)
+            return JSONResponse(getattr(self, "_" + function)(caller, **args))
+        return JSONResponse({"message": f"function {function} not found"}, status_code=404)
+
+    def _get_shared_lists(self, caller: str) -> List[Dict]:
+        def member_count(list_id: str) -> int:
+            return sum(1 for key in self.members if key[0] == list_id)
+
+        personal = self.lists.get(caller)
+        lists = [{
+            "list_id": caller,
+            "name": personal["name"] if personal else "My list",
+            "role": "owner",
+            "member_count": max(member_count(caller), 1),
+            "personal": True,
+        }]
+        for (list_id, user_id), member in self.members.items():
+            if user_id == caller and list_id != caller:
+                lists.append({
+                    "list_id": list_id,
+                    "name": self.lists[list_id]["name"],
+                    "role": member["role"],
+                    "member_count": member_count(list_id),
+                    "personal": False,
+                })
+        return lists
+
+    def _create_shared_list(self, caller: str, p_name: str) -> List[Dict]:
+        row = self._create_list(str(uuid.uuid4()), p_name, caller)
+        return [row]
+
+    def _create_list_invite(self, caller: str, p_list_id: str, p_ttl_seconds: int) -> Dict:
+        if p_list_id == caller:
+            if caller not in self.lists:
+                self._create_list(caller, "Shared list", caller)
+        elif (p_list_id, caller) not in self.members:
+            return {"status": "not_found"}
+        code = uuid.uuid4().hex
+        expires_at = (datetime.now(timezone.utc) + timedelta(seconds=p_ttl_seconds)).isoformat()
+        self.invites[code] = {"code": code, "list_id": p_list_id, "created_by": caller, "expires_at": expires_at}
+        return {"status": "created", "code": code, "expires_at": expires_at}
+
+    def _join_shared_list(self, caller: str, p_code: str) -> Dict:
+        invite = self.invites.get(p_code)
+        if invite is None or invite["expires_at"] <= _now():
+            return {"status": "invalid"}
+        list_id = invite["list_id"]
+        self.members.setdefault((list_id, caller), _member(list_id, caller, "member"))
+        return {"status": "joined", "list_id": list_id, "name": self.lists[list_id]["name"]}
+
+    def _remove_list_member(self, caller: str, p_list_id: str, p_user_id: str) -> Dict:
+        mine = self.members.get((p_list_id, caller))
+        if mine is None:
+            return {"status": "not_found"}
+        if (p_user_id != caller and mine["role"] != "owner") or self.lists[p_list_id]["owner_id"] == p_user_id:
+            return {"status": "forbidden"}
+        if self.members.pop((p_list_id, p_user_id), None) is None:
+            return {"status": "not_found"}
+        return {"status": "removed"}
+
+    def _create_list(self, list_id: str, name: str, owner_id: str) -> Dict:
+        row = {"list_id": list_id, "name": name, "owner_id": owner_id, "created_at": _now()}
+        self.lists[list_id] = row
+        self.members[(list_id, owner_id)] = _member(list_id, owner_id, "owner")
+        return row
+
+    def _candidates(self, params) -> List[Dict]:
+        list_filter = params.get("list_id", "")
+        if list_filter.startswith("eq."):
+            return self.rows_by_list.get(list_filter[3:], [])
+        return self.rows
+
+    def _find(self, list_id: str, item_id: str) -> Optional[Dict]:
+        return next((row for row in self.rows_by_list.get(list_id, []) if row["item_id"] == item_id), None)
+
+    def _toggle(self, list_id: str, item_ids: List[str]) -> List[Dict]:
+        updated = []
+        for item_id in item_ids:
+            row = self._find(list_id, item_id)
+            if row:
+                row.update(is_bought=not row["is_bought"], updated_at=_now())
+                self._record_toggle(row)
+                updated.append(row)
+        return updated
+
+    def _move(self, list_id: str, item_id: str, to_list: str, caller: Optional[str]) -> Dict:
+        row = self._find(list_id, item_id)
+        if row is None:
+            return {"status": "not_found"}
+        try:
+            # Re-added as auth.uid(), as the INSERT policy requires
+            new_row = self._insert({
+                "list_id": list_id, "user_id": caller or row["user_id"], "name": row["name"], "list_type": to_list,
+            })
+        except UniqueViolation:
+            return {"status": "conflict", "name": row["name"]}
+        self._delete(row, moved_to=to_list)
+        return {"status": "moved", "item": new_row}
+
+    def _insert(self, values: Dict) -> Dict:
+        now = _now()
+        row = {
+            "item_id": str(uuid.uuid4()),
+            "is_bought": False,
+            "list_type": "to_buy",
+            "created_at": now,
+            "updated_at": now,
+            **values,
+        }
+        # Personal list unless given (the shared_lists.sql backfill)
+        row.setdefault("list_id", row["user_id"])
+        list_rows = self.rows_by_list.setdefault(row["list_id"], [])
+        name = row["name"].lower()
+        if any(other["list_type"] == row["list_type"] and other["name"].lower() == name for other in list_rows):
+            raise UniqueViolation(row["name"])
+        list_rows.append(row)
+        return row
+
+    def _delete(self, row: Dict, moved_to: Optional[str] = None) -> None:
+        self.rows_by_list[row["list_id"]].remove(row)
+        self.tombstones.append({
+            "item_id": row["item_id"],
+            "list_id": row["list_id"],
+            "list_type": row["list_type"],
+            "deleted_at": _now(),
+        })
+        self._record_event(row, "moved" if moved_to else "deleted", to_list=moved_to)
+
+    def _record_toggle(self, row: Dict) -> None:
+        event = self._record_event(row, "bought" if row["is_bought"] else "unbought")
+        if row["list_type"] != "to_buy":
+            return
+        key = (row["list_id"], row["name"].lower())
+        if not row["is_bought"]:
+            # Unticked within the undo window: the purchase didn't happen
+            stats = self.stats.get(key)
+            undo_after = (datetime.now(timezone.utc) - PURCHASE_UNDO_WINDOW).isoformat()
+            if stats and stats["purchase_count"] > 0 and stats["last_bought_at"] > undo_after:
+                last = stats["previous_bought_at"] or stats["last_bought_at"]
+                stats.update(
+                    purchase_count=stats["purchase_count"] - 1,
+                    first_bought_at=stats["first_bought_at"] if stats["purchase_count"] > 1 else None,
+                    last_bought_at=last if stats["purchase_count"] > 1 else None,
+                    previous_bought_at=None,
+                )
+            return
+        stats = self.stats.setdefault(key, {
+            "list_id": row["list_id"],
+            "name_key": key[1],
+            "purchase_count": 0,
+            "first_bought_at": None,
+            "previous_bought_at": None,
+        })
+        stats.update(
+            name=row["name"],
+            purchase_count=stats["purchase_count"] + 1,
+            first_bought_at=stats["first_bought_at"] or event["occurred_at"],
+            previous_bought_at=stats.get("last_bought_at"),
+            last_bought_at=event["occurred_at"],
+        )
+
+    def _record_event(self, row: Dict, event_type: str, to_list: Optional[str] = None) -> Dict:
+        event = {
+            "list_id": row["list_id"],
+            "item_id": row["item_id"],
+            "name": row["name"],
+            "event_type": event_type,
+            "list_type": row["list_type"],
+            "to_list": to_list,
+            "occurred_at": _now(),
+        }
+        self.events.append(event)
+        return event
+
+    def seed(self, user_id: str, list_type: str, count: int) -> None:
+        for i in range(count):
+            self._insert({"user_id": user_id, "name": f"{list_type} item {i}", "list_type": list_type})
+
+
+SHARING_FUNCTIONS = {
+    "get_shared_lists", "create_shared_list", "create_list_invite", "join_shared_list", "remove_list_member",
+}
+
+
+def _caller(request: Request) -> Optional[str]:
+    """auth.uid(): the bearer token's subject, None for the anon key."""
+    token = request.headers.get("authorization", "").removeprefix("Bearer ")
+    try:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=["HS256"], audience=JWT_AUDIENCE)
+    except jwt.PyJWTError:
+        return None
+    return claims.get("sub")
+
+
+def _is_service_role(request: Request) -> bool:
+    token = request.headers.get("authorization", "").removeprefix("Bearer ")
+    try:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=["HS256"], options={"verify_aud": False})
+    except jwt.PyJWTError:
+        return False
+    return claims.get("role") == "service_role"
+
+
+def _member(list_id: str, user_id: str, role: str) -> Dict:
+    return {"list_id": list_id, "user_id": user_id, "role": role, "joined_at": _now()}
+
+
+def _unique_violation(e: UniqueViolation) -> JSONResponse:
+    return JSONResponse({
+        "code": "23505",
+        "message": 'duplicate key value violates unique constraint "idx_grocery_items_list_lower_name"',
+        "details": f"Key already exists: {e}",
+    }, status_code=409)
+
+
+def _rls_violation() -> JSONResponse:
+    return JSONResponse({
+        "code": "42501",
+        "message": 'new row violates row-level security policy for table "grocery_items"',
+    }, status_code=403)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _filters(params) -> List:
+    return [
+        (column, value) for column, value in params.multi_items()
+        if column not in ("select", "order", "limit", "offset")
+    ]
+
+
+COMPARISONS = {
+    "eq": lambda a, b: a == b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def _matches(row: Dict, filters) -> bool:
+    for column, expression in filters:
+        if column == "or":
+            if not any(_matches(row, branch) for branch in _logic_terms(expression[1:-1])):
+                return False
+            continue
+        operator, _, value = expression.partition(".")
+        current = _as_text(row.get(column))
+        if operator == "ilike":
+            if not _ilike(current, value):
+                return False
+        elif operator == "in":
+            if current not in value[1:-1].split(","):
+                return False
+        elif not COMPARISONS[operator](*_comparable(column, current, value)):
+            return False
+    return True
+
+
+def _comparable(column: str, current: str, value: str):
+    if column.endswith("_at"):
+        return datetime.fromisoformat(current), datetime.fromisoformat(value)
+    return current, value
+
+
+def _logic_terms(body: str) -> List[List]:
+    """Split the inside of or=(...) into branches, each a list of filters."""
+    branches, depth, quoted, start = [], 0, False, 0
+    for index, ch in enumerate(body + ","):
+        if ch == '"' and body[index - 1:index] != "\\":
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            branches.append(_logic_term(body[start:index]))
+            start = index + 1
+    return branches
+
+
+def _logic_term(term: str) -> List:
+    if term.startswith("and("):
+        # Conjunction: all of the nested terms' filters must match
+        return [f for branch in _logic_terms(term[4:-1]) for f in branch]
+    column, _, expression = term.partition(".")
+    operator, _, value = expression.partition(".")
+    if value.startswith('"'):
+        value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return [(column, f"{operator}.{value}")]
+
+
+def _select(rows: List[Dict], params) -> List[Dict]:
+    rows = list(rows)
+    for order in reversed(params.get("order", "").split(",")):
+        if order:
+            column, _, direction = order.partition(".")
+            rows.sort(key=lambda row: row[column], reverse=direction.startswith("desc"))
+    if "limit" in params:
+        rows = rows[:int(params["limit"])]
+    return _project(rows, params.get("select", "*"))
+
+
+def _as_text(value) -> str:
+    # PostgREST filter values are text; booleans are spelled true/false
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _ilike(text: str, pattern: str) -> bool:
+    regex = "".join(
+        ".*" if ch in "*%" else "." if ch == "_" else re.escape(ch) for ch in pattern
+    )
+    return re.fullmatch(regex, text, flags=re.IGNORECASE) is not None
+
+
+def _project(rows: List[Dict], select: str) -> List[Dict]:
+    if select == "*":
+        return rows
+    columns = [column.strip() for column in select.split(",")]
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+
+def serve_in_thread(app, port: int) -> uvicorn.Server:
+    """Run an ASGI app with uvicorn on its own thread/event loop."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the fake Supabase server on its own")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args()
+    uvicorn.run(FakeSupabase(args.latency).app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Per-request logging overhead: the old print() statements vs. api/logger.py.
+
+Replays the log output of one POST /api/items request (remote token check +
+create) in three ways and reports the time the request itself spends on it,
+next to a floor with no logging at all:
+
+- prints: the print() calls the handlers used to make (AUTH STEP 1-4,
+  CREATE ITEM ...), written synchronously to stdout
+- logging, sync handler: the same call sites through logging at INFO with
+  a plain StreamHandler (debug calls are filtered, one access line is written)
+- logging, queue handler: the app's setup - the access line is handed to the
+  background writer thread and the request never waits on stdout
+
+stdout is redirected to a pipe drained by a `cat` subprocess, like a
+container's log collector, so write syscalls are part of the cost. With
+--slow-drain the reader falls behind (as collectors do under load): prints
+and the sync handler then block on the full pipe, the queue handler doesn't.
+
+Usage (from the repo root):
+    python bench/logging_overhead.py --requests 20000
+    python bench/logging_overhead.py --requests 20000 --slow-drain
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+import logger as app_logging
+
+TOKEN = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9." + "x" * 200 + ".signature-part-xxxxxxxx"
+USER_ID = str(uuid.uuid4())
+AUTH_URL = "https://project.supabase.co/auth/v1"
+
+
+def request_without_logging() -> dict:
+    """The non-logging work both variants share (floor for the numbers below)."""
+    return {"item_id": str(uuid.uuid4()), "user_id": USER_ID, "name": "Milk", "is_bought": False,
+            "list_type": "to_buy", "created_at": "2025-01-01T12:00:00+00:00"}
+
+
+def request_with_prints():
+    item = request_without_logging()
+    print(f"\n{'='*60}")
+    print(f"[AUTH STEP 1] Token extracted from request")
+    print(f"[AUTH STEP 1] Token length: {len(TOKEN)}")
+    print(f"[AUTH STEP 1] Token prefix: {TOKEN[:20]}...")
+    print(f"[AUTH STEP 1] Token suffix: ...{TOKEN[-20:]}")
+    print(f"\n[AUTH STEP 2] Using shared async HTTP client")
+    print(f"[AUTH STEP 2] USE_AUTHENTICATED_CLIENT: False")
+    print(f"[AUTH STEP 2] Auth URL: {AUTH_URL}")
+    print(f"\n[AUTH STEP 3] Verifying token with Supabase")
+    print(f"[AUTH STEP 3] Response status: 200")
+    print(f"\n[AUTH STEP 4] ✅ User verified successfully")
+    print(f"[AUTH STEP 4] User ID: {USER_ID}")
+    print(f"[AUTH STEP 4] User email: user@example.com")
+    print(f"{'='*60}\n")
+    print(f"\n[CREATE ITEM] Starting")
+    print(f"[CREATE ITEM] Item name: Milk")
+    print(f"[CREATE ITEM] List type: to_buy")
+    print(f"[CREATE ITEM] User ID: {USER_ID}")
+    print(f"[CREATE ITEM] Data to insert: {({k: item[k] for k in ('user_id', 'name', 'list_type', 'is_bought')})}")
+    print(f"[CREATE ITEM] Response data: {[item]}")
+    print(f"[CREATE ITEM] ✅ Item created: {item}")
+
+
+def request_with_logging(log: logging.Logger, access: logging.Logger):
+    item = request_without_logging()
+    token = app_logging.request_id_var.set(uuid.uuid4().hex)
+    start = time.perf_counter()
+    log.debug("Remote token verification: HTTP %d", 200)
+    log.debug("Create item", extra={"user_id": USER_ID, "list_type": "to_buy"})
+    log.debug("Item created", extra={"item_id": item["item_id"]})
+    access.info(
+        "%s %s %s", "POST", "/api/items", 201,
+        extra={"method": "POST", "path": "/api/items", "status": 201,
+               "duration_ms": round((time.perf_counter() - start) * 1000, 2)},
+    )
+    app_logging.request_id_var.reset(token)
+
+
+def measure(label: str, fn, requests: int) -> float:
+    for _ in range(min(requests // 10, 1000)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    elapsed = time.perf_counter() - start
+    per_request_us = elapsed / requests * 1e6
+    print(f"{label:<26} {per_request_us:8.2f} µs/request", file=sys.stderr)
+    return per_request_us
+
+
+def sync_loggers():
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(app_logging.JsonFormatter())
+    handler.addFilter(lambda record: setattr(record, "request_id", app_logging.request_id_var.get()) or True)
+    log = logging.getLogger("bench.sync.main")
+    access = logging.getLogger("bench.sync.access")
+    for logger in (log, access):
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        logger.propagate = False
+    return log, access
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--slow-drain", action="store_true",
+                        help="reader consumes ~4 MB/s instead of as fast as it can")
+    args = parser.parse_args()
+
+    # Point fd 1 at a pipe drained by another process
+    if args.slow_drain:
+        reader = [sys.executable, "-c",
+                  "import sys, time\nwhile sys.stdin.buffer.read1(4096): time.sleep(0.001)"]
+    else:
+        reader = ["cat"]
+    drain = subprocess.Popen(reader, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    sys.stdout.flush()
+    os.dup2(drain.stdin.fileno(), 1)
+
+    print(f"{args.requests} simulated POST /api/items requests, stdout -> "
+          f"{'slow' if args.slow_drain else 'fast'} pipe", file=sys.stderr)
+    floor = measure("no logging", request_without_logging, args.requests)
+    baseline = measure("prints", request_with_prints, args.requests)
+    sys.stdout.flush()
+
+    sync_log, sync_access = sync_loggers()
+    measure("logging, sync handler", lambda: request_with_logging(sync_log, sync_access), args.requests)
+
+    log, access = app_logging.get_logger("main"), app_logging.get_logger("access")
+    queued = measure("logging, queue handler", lambda: request_with_logging(log, access), args.requests)
+
+    print(f"logging overhead: prints {baseline - floor:.2f} µs/request, queue handler "
+          f"{queued - floor:.2f} µs/request ({app_logging.dropped_records()} records dropped)",
+          file=sys.stderr)
+
+    app_logging.shutdown_logging()
+    logging.shutdown()
+    sys.stdout.flush()
+    os.close(1)
+    drain.stdin.close()
+    drain.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Scripted user scenarios against the API and the fake Supabase, reporting
+p50/p95/p99 latency and requests/sec per endpoint.
+
+Scenarios (each runs --users users concurrently, with fresh user ids):
+- shopping: load the shopping list, check off every item one by one, sync changes
+- receipt:  bulk add a scanned receipt (POST /api/items/batch, some names
+            already on the list), then reload both lists
+- tabs:     switch between the two tabs --rounds times (GET /api/items for
+            each list, GET /api/lists with If-None-Match, delta sync)
+- moves:    move every pantry item to the shopping list concurrently, each
+            item twice (the second attempt gets 404 or 409)
+
+The API runs with RATE_LIMIT_ENABLED=false unless the environment sets it:
+the scenarios measure the endpoints, not the limiter. 429 responses are
+counted separately (429 column) from other unexpected statuses (err).
+
+The fake Supabase and the API (uvicorn, --workers processes) run as
+subprocesses on this machine, so nothing leaves it. Save a run with --json
+and compare later runs against it with --compare.
+
+Usage (from the repo root):
+    python bench/scenarios.py --users 20 --items 30 --latency 0.01
+    python bench/scenarios.py --json baseline.json
+    python bench/scenarios.py --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fake_supabase import anon_key, make_token, JWT_SECRET
+
+FAKE_PORT = 54323
+API_PORT = 8104
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.join(BENCH_DIR, "..", "api")
+
+SCENARIOS = ("shopping", "receipt", "tabs", "moves")
+
+
+class Recorder:
+    """Latency samples and unexpected statuses per endpoint label."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.rate_limited: Dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, label: str,
+                      expected=(200,), **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[f"{method} {label}"].append(time.perf_counter() - start)
+        if response.status_code == 429:
+            self.rate_limited[f"{method} {label}"] += 1
+        elif response.status_code not in expected:
+            self.errors[f"{method} {label}"] += 1
+        return response
+
+
+class User:
+    def __init__(self, client: httpx.AsyncClient, supabase_url: str, user_id: str):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {make_token(supabase_url, user_id)}"}
+
+    async def seed(self, names: List[str], list_type: str) -> None:
+        """Create items without recording them (scenario setup)."""
+        for start in range(0, len(names), 200):
+            response = await self.client.post("/api/items/batch", headers=self.headers, json={
+                "items": [{"name": name, "list_type": list_type} for name in names[start:start + 200]]
+            })
+            response.raise_for_status()
+
+    async def item_ids(self, recorder: Recorder, list_type: str) -> List[str]:
+        response = await recorder.request(
+            self.client, "GET", "/api/items", "/api/items",
+            params={"list_type": list_type}, headers=self.headers,
+        )
+        return [item["item_id"] for item in response.json()]
+
+
+# --- Scenarios: setup (not measured) and run (measured) per user ---
+
+async def setup_shopping(user: User, args):
+    await user.seed([f"product {i}" for i in range(args.items)], "to_buy")
+
+
+async def run_shopping(user: User, recorder: Recorder, args):
+    snapshot = await recorder.request(user.client, "GET", "/api/items/changes", "/api/items/changes",
+                                      headers=user.headers)
+    for item_id in await user.item_ids(recorder, "to_buy"):
+        await recorder.request(user.client, "PATCH", f"/api/items/{item_id}/toggle",
+                               "/api/items/{item_id}/toggle", headers=user.headers)
+    await recorder.request(user.client, "GET", "/api/items/changes", "/api/items/changes",
+                           params={"since": snapshot.json()["cursor"]}, headers=user.headers)
+
+
+async def setup_receipt(user: User, args):
+    # A fifth of the receipt is already on the shopping list
+    await user.seed([f"receipt line {i}" for i in range(0, args.items, 5)], "to_buy")
+
+
+async def run_receipt(user: User, recorder: Recorder, args):
+    items = [{"name": f"Receipt Line {i}", "list_type": "to_buy"} for i in range(args.items)]
+    await recorder.request(user.client, "POST", "/api/items/batch", "/api/items/batch",
+                           json={"items": items}, headers=user.headers)
+    await recorder.request(user.client, "GET", "/api/lists", "/api/lists", headers=user.headers)
+
+
+async def setup_tabs(user: User, args):
+    await user.seed([f"to buy {i}" for i in range(args.items // 2)], "to_buy")
+    await user.seed([f"pantry {i}" for i in range(args.items - args.items // 2)], "items")
+
+
+async def run_tabs(user: User, recorder: Recorder, args):
+    etag = None
+    snapshot = await recorder.request(user.client, "GET", "/api/items/changes", "/api/items/changes",
+                                      headers=user.headers)
+    cursor = snapshot.json()["cursor"]
+    for _ in range(args.rounds):
+        for list_type in ("to_buy", "items"):
+            await recorder.request(user.client, "GET", "/api/items", "/api/items",
+                                   params={"list_type": list_type}, headers=user.headers)
+        headers = {**user.headers, **({"If-None-Match": etag} if etag else {})}
+        response = await recorder.request(user.client, "GET", "/api/lists", "/api/lists",
+                                          expected=(200, 304), headers=headers)
+        etag = response.headers.get("etag", etag)
+        response = await recorder.request(user.client, "GET", "/api/items/changes", "/api/items/changes",
+                                          params={"since": cursor}, headers=user.headers)
+        cursor = response.json()["cursor"]
+
+
+async def setup_moves(user: User, args):
+    await user.seed([f"pantry item {i}" for i in range(args.items)], "items")
+
+
+async def run_moves(user: User, recorder: Recorder, args):
+    item_ids = await user.item_ids(recorder, "items")
+    await asyncio.gather(*(
+        recorder.request(user.client, "PATCH", f"/api/items/{item_id}/move", "/api/items/{item_id}/move",
+                         expected=(200, 404, 409), json={"to_list": "to_buy"}, headers=user.headers)
+        for item_id in item_ids * 2
+    ))
+
+
+async def run_scenario(name: str, index: int, args, base_url: str, supabase_url: str) -> Dict:
+    setup, run = globals()[f"setup_{name}"], globals()[f"run_{name}"]
+    limits = httpx.Limits(max_connections=args.users * 4)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        users = [
+            User(client, supabase_url, f"00000000-0000-0000-{index + 1:04d}-{i + 1:012d}")
+            for i in range(args.users)
+        ]
+        await asyncio.gather(*(setup(user, args) for user in users))
+
+        recorder = Recorder()
+        start = time.perf_counter()
+        await asyncio.gather(*(run(user, recorder, args) for user in users))
+        wall = time.perf_counter() - start
+
+    endpoints = {
+        label: {
+            "count": len(samples),
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p95_ms": percentile(samples, 95) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+            "rps": len(samples) / wall,
+            "errors": recorder.errors.get(label, 0),
+            "rate_limited": recorder.rate_limited.get(label, 0),
+        }
+        for label, samples in sorted(recorder.samples.items())
+    }
+    total = sum(endpoint["count"] for endpoint in endpoints.values())
+    return {"wall_s": wall, "requests": total, "rps": total / wall, "endpoints": endpoints}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def print_report(results: Dict, baseline: Optional[Dict]) -> None:
+    for name, result in results["scenarios"].items():
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        print(f"\n{name}: {result['requests']} requests in {result['wall_s']:.2f}s "
+              f"({result['rps']:.0f} req/s{_delta(result['rps'], base and base['rps'])})")
+        print(f"  {'endpoint':<36} {'n':>6} {'p50 ms':>14} {'p95 ms':>14} {'p99 ms':>14} {'req/s':>14} {'err':>4} {'429':>4}")
+        for label, stats in result["endpoints"].items():
+            before = (base or {}).get("endpoints", {}).get(label, {})
+            print(f"  {label:<36} {stats['count']:>6}"
+                  + "".join(f" {_cell(stats[key], before.get(key)):>14}"
+                            for key in ("p50_ms", "p95_ms", "p99_ms", "rps"))
+                  + f" {stats['errors']:>4} {stats.get('rate_limited', 0):>4}")
+
+
+def _cell(value: float, before: Optional[float]) -> str:
+    return f"{value:.1f}{_delta(value, before)}"
+
+
+def _delta(value: float, before: Optional[float]) -> str:
+    if not before:
+        return ""
+    return f" ({(value - before) / before * 100:+.0f}%)"
+
+
+def start_process(command: List[str], cwd: str, env: Dict, health_url: str) -> subprocess.Popen:
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            httpx.get(health_url)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"{' '.join(command)} did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--items", type=int, default=30, help="items per user")
+    parser.add_argument("--rounds", type=int, default=10, help="tab switches per user (tabs)")
+    parser.add_argument("--latency", type=float, default=0.01, help="fake Supabase latency per call (s)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    args = parser.parse_args()
+
+    supabase_url = f"http://127.0.0.1:{FAKE_PORT}"
+    base_url = f"http://127.0.0.1:{API_PORT}"
+    fake = start_process(
+        [sys.executable, "fake_supabase.py", "--port", str(FAKE_PORT), "--latency", str(args.latency)],
+        BENCH_DIR, dict(os.environ), f"{supabase_url}/auth/v1/.well-known/jwks.json",
+    )
+    api_env = {
+        "RATE_LIMIT_ENABLED": "false",
+        **os.environ,
+        "SUPABASE_URL": supabase_url,
+        "SUPABASE_ANON_KEY": anon_key(),
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+    }
+    api = start_process(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(API_PORT),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        API_DIR, api_env, f"{base_url}/api/health",
+    )
+
+    try:
+        results = {
+            "config": {key: getattr(args, key) for key in ("users", "items", "rounds", "latency", "workers")},
+            "scenarios": {},
+        }
+        for index, name in enumerate(args.scenarios.split(",")):
+            results["scenarios"][name] = asyncio.run(run_scenario(name, index, args, base_url, supabase_url))
+    finally:
+        api.terminate()
+        fake.terminate()
+        api.wait()
+        fake.wait()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            print(f"note: baseline config differs: {baseline.get('config')}")
+
+    print(f"config: {results['config']}")
+    print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
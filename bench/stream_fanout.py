@@ -0,0 +1,151 @@
+"""
+SSE fan-out: many idle /api/stream subscribers on one uvicorn worker.
+
+Opens N event streams for one user, reports the worker's memory per idle
+connection, then triggers mutations and measures how long until every
+subscriber has received each event.
+
+Usage (from the repo root):
+    python bench/stream_fanout.py --connections 500 --events 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fake_supabase import FakeSupabase, anon_key, make_token, serve_in_thread, JWT_SECRET
+
+FAKE_PORT = 54322
+API_PORT = 8103
+USER_ID = "00000000-0000-0000-0000-000000000001"
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+
+def start_api(supabase_url: str) -> subprocess.Popen:
+    env = {
+        # 500 streams for one user is far past the per-user burst
+        "RATE_LIMIT_ENABLED": "false",
+        **os.environ,
+        "SUPABASE_URL": supabase_url,
+        "SUPABASE_ANON_KEY": anon_key(),
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(API_PORT), "--log-level", "warning"],
+        cwd=API_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{API_PORT}/api/health")
+            return process
+        except httpx.TransportError:
+            time.sleep(0.05)
+    raise RuntimeError("API server did not start")
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+async def run(args, token: str, api: subprocess.Popen):
+    base_url = f"http://127.0.0.1:{API_PORT}"
+    limits = httpx.Limits(max_connections=args.connections + 10)
+    received = [0] * args.events
+    all_received = [asyncio.Event() for _ in range(args.events)]
+    connected = 0
+    rejected: Dict[int, int] = defaultdict(int)
+    all_connected = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        async def subscriber():
+            nonlocal connected
+            seen = 0  # Events arrive in publish order on each stream
+            async with client.stream("GET", "/api/stream", params={"access_token": token}) as response:
+                if response.status_code != 200:
+                    rejected[response.status_code] += 1
+                else:
+                    connected += 1
+                if connected + sum(rejected.values()) == args.connections:
+                    all_connected.set()
+                if response.status_code != 200:
+                    return
+                async for line in response.aiter_lines():
+                    if line.startswith("event: upsert") and seen < args.events:
+                        received[seen] += 1
+                        if received[seen] == args.connections:
+                            all_received[seen].set()
+                        seen += 1
+
+        baseline_rss = rss_mb(api.pid)
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(subscriber()) for _ in range(args.connections)]
+        await all_connected.wait()
+        connect_time = time.perf_counter() - start
+        if rejected:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            statuses = ", ".join(f"{count} x HTTP {code}" for code, count in sorted(rejected.items()))
+            hint = " (rate limited - run with RATE_LIMIT_ENABLED=false)" if 429 in rejected else ""
+            print(f"{sum(rejected.values())} of {args.connections} subscribers rejected: {statuses}{hint}")
+            return
+        await asyncio.sleep(0.5)
+        idle_rss = rss_mb(api.pid)
+
+        latencies = []
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(args.events):
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/items", json={"name": f"fanout {i}", "list_type": "to_buy"}, headers=headers
+            )
+            if response.status_code == 429:
+                print(f"mutation {i} rate limited (HTTP 429) - run with RATE_LIMIT_ENABLED=false")
+                break
+            response.raise_for_status()
+            await all_received[i].wait()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    per_connection_kb = (idle_rss - baseline_rss) * 1024 / args.connections
+    print(f"{args.connections} idle subscribers connected in {connect_time:.2f}s")
+    print(f"  worker RSS: {baseline_rss:.1f} MB -> {idle_rss:.1f} MB ({per_connection_kb:.1f} KB/connection)")
+    if latencies:
+        print(f"  mutation -> delivered to all {args.connections} subscribers "
+              f"({len(latencies)} events): p50 {statistics.median(latencies):.1f}ms, max {max(latencies):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+
+    fake = FakeSupabase()
+    serve_in_thread(fake.app, FAKE_PORT)
+    supabase_url = f"http://127.0.0.1:{FAKE_PORT}"
+    api = start_api(supabase_url)
+    try:
+        asyncio.run(run(args, make_token(supabase_url, USER_ID), api))
+    finally:
+        api.terminate()
+        api.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+-- Batch item operations (one round trip per batch)
+-- Used by /api/items/batch endpoints (receipt scanning, multi-select actions).
+-- Requires unique_item_names.sql and move_grocery_item.sql.
+
+-- Bulk insert; names already in the target list are skipped via the
+-- unique (user_id, list_type, lower(name)) index. Returns only inserted rows.
+-- p_items: [{"name": "Milk", "list_type": "items"}, ...]
+CREATE OR REPLACE FUNCTION insert_grocery_items(
+    p_user_id UUID,
+    p_items JSONB
+)
+RETURNS SETOF grocery_items
+LANGUAGE sql
+SECURITY INVOKER
+AS $$
+    INSERT INTO grocery_items (user_id, name, list_type, is_bought)
+    SELECT p_user_id, item.name, item.list_type, FALSE
+    FROM jsonb_to_recordset(p_items) AS item(name TEXT, list_type TEXT)
+    ON CONFLICT (user_id, list_type, lower(name)) DO NOTHING
+    RETURNING *;
+$$;
+
+-- Flip is_bought on several items in one statement. Returns updated rows.
+CREATE OR REPLACE FUNCTION toggle_grocery_items(
+    p_user_id UUID,
+    p_item_ids UUID[]
+)
+RETURNS SETOF grocery_items
+LANGUAGE sql
+SECURITY INVOKER
+AS $$
+    UPDATE grocery_items
+    SET is_bought = NOT is_bought
+    WHERE user_id = p_user_id
+      AND item_id = ANY(p_item_ids)
+    RETURNING *;
+$$;
+
+-- Move several items in one transaction. Returns one move_grocery_item()
+-- result per id, in input order, each tagged with its source item_id.
+CREATE OR REPLACE FUNCTION move_grocery_items(
+    p_user_id UUID,
+    p_item_ids UUID[],
+    p_to_list TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+DECLARE
+    v_item_id UUID;
+    v_results JSONB := '[]'::JSONB;
+BEGIN
+    FOREACH v_item_id IN ARRAY p_item_ids LOOP
+        v_results := v_results || jsonb_build_array(
+            move_grocery_item(v_item_id, p_user_id, p_to_list)
+                || jsonb_build_object('item_id', v_item_id)
+        );
+    END LOOP;
+    RETURN v_results;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION insert_grocery_items(UUID, JSONB) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION toggle_grocery_items(UUID, UUID[]) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION move_grocery_items(UUID, UUID[], TEXT) TO anon, authenticated;
@@ -0,0 +1,36 @@
+-- Review and remove case-insensitive duplicate item names
+-- unique_item_names.sql refuses to add its index while duplicates exist.
+-- This is a separate, manual step: nothing is deleted until Step 2 is
+-- uncommented. Back up grocery_items first.
+
+-- Step 1: report. Every row that Step 2 would delete, next to the row kept
+-- in its (user, list, name) group (the oldest).
+SELECT g.user_id,
+       g.list_type,
+       g.item_id   AS remove_item_id,
+       g.name      AS remove_name,
+       g.is_bought AS remove_is_bought,
+       g.created_at AS remove_created_at,
+       keep.item_id AS keep_item_id,
+       keep.name    AS keep_name
+FROM grocery_items g
+JOIN LATERAL (
+    SELECT k.item_id, k.name
+    FROM grocery_items k
+    WHERE k.user_id = g.user_id
+      AND k.list_type = g.list_type
+      AND lower(k.name) = lower(g.name)
+    ORDER BY k.created_at, k.item_id
+    LIMIT 1
+) keep ON keep.item_id <> g.item_id
+ORDER BY g.user_id, g.list_type, lower(g.name), g.created_at;
+
+-- Step 2: delete. Uncomment and run once the report above has been reviewed
+-- (merge anything worth keeping into the kept rows by hand first).
+--
+-- DELETE FROM grocery_items g
+-- USING grocery_items keep
+-- WHERE g.user_id = keep.user_id
+--   AND g.list_type = keep.list_type
+--   AND lower(g.name) = lower(keep.name)
+--   AND (g.created_at, g.item_id) > (keep.created_at, keep.item_id);
@@ -0,0 +1,74 @@
+-- Delta sync support for GET /api/items/changes
+-- Adds updated_at to grocery_items and a tombstone table recording deletes,
+-- so clients can fetch only what changed since their last sync.
+
+-- updated_at: set on insert and every update
+ALTER TABLE grocery_items
+ADD COLUMN updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+
+UPDATE grocery_items
+SET updated_at = COALESCE(created_at, NOW());
+
+-- clock_timestamp() (not NOW()) so long transactions don't stamp rows with
+-- a time far before they become visible
+CREATE OR REPLACE FUNCTION set_grocery_item_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER grocery_items_set_updated_at
+    BEFORE INSERT OR UPDATE ON grocery_items
+    FOR EACH ROW
+    EXECUTE FUNCTION set_grocery_item_updated_at();
+
+-- Changes query: WHERE user_id = ? AND updated_at > ?
+CREATE INDEX idx_grocery_items_user_updated_at ON grocery_items(user_id, updated_at);
+
+-- Tombstones: one row per deleted item (includes the source row of a move)
+CREATE TABLE grocery_item_tombstones (
+    item_id UUID PRIMARY KEY,
+    user_id UUID NOT NULL,
+    list_type TEXT NOT NULL,
+    deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX idx_grocery_item_tombstones_user_deleted_at
+    ON grocery_item_tombstones(user_id, deleted_at);
+
+ALTER TABLE grocery_item_tombstones ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own tombstones"
+    ON grocery_item_tombstones FOR SELECT
+    USING (auth.uid() = user_id);
+
+-- SECURITY DEFINER: written by the trigger only, clients never insert directly
+CREATE OR REPLACE FUNCTION record_grocery_item_tombstone()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO grocery_item_tombstones (item_id, user_id, list_type)
+    VALUES (OLD.item_id, OLD.user_id, OLD.list_type)
+    ON CONFLICT (item_id) DO UPDATE SET deleted_at = clock_timestamp();
+    RETURN OLD;
+END;
+$$;
+
+CREATE TRIGGER grocery_items_record_tombstone
+    AFTER DELETE ON grocery_items
+    FOR EACH ROW
+    EXECUTE FUNCTION record_grocery_item_tombstone();
+
+-- Tombstones only need to outlive the sync retention window (30 days,
+-- TOMBSTONE_RETENTION_DAYS in the API). Clients with older cursors get a
+-- full reload. Prune periodically, e.g. with pg_cron:
+--
+--   SELECT cron.schedule('prune-tombstones', '0 4 * * *',
+--     $$DELETE FROM grocery_item_tombstones WHERE deleted_at < NOW() - INTERVAL '30 days'$$);
@@ -0,0 +1,63 @@
+-- Atomic move between lists (To Buy <-> Items)
+-- Replaces the 4-call select / duplicate check / insert / delete sequence in
+-- PATCH /api/items/{id}/move with a single RPC that runs in one transaction.
+
+-- Returns JSON with a status code:
+--   {"status": "moved", "item": {...new row...}}
+--   {"status": "not_found"}
+--   {"status": "conflict", "name": "Milk"}   -- same name already in target list
+CREATE OR REPLACE FUNCTION move_grocery_item(
+    p_item_id UUID,
+    p_user_id UUID,
+    p_to_list TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER  -- RLS policies still apply to the caller
+AS $$
+DECLARE
+    v_item grocery_items%ROWTYPE;
+    v_new_item grocery_items%ROWTYPE;
+BEGIN
+    -- Lock the source row so concurrent moves of the same item serialize:
+    -- the second caller sees the row gone and gets not_found
+    SELECT * INTO v_item
+    FROM grocery_items
+    WHERE item_id = p_item_id
+      AND user_id = p_user_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'not_found');
+    END IF;
+
+    -- Case-insensitive duplicate check in the target list
+    IF EXISTS (
+        SELECT 1
+        FROM grocery_items
+        WHERE user_id = p_user_id
+          AND list_type = p_to_list
+          AND lower(name) = lower(v_item.name)
+    ) THEN
+        RETURN jsonb_build_object('status', 'conflict', 'name', v_item.name);
+    END IF;
+
+    -- New row in target list with fresh timestamp and is_bought reset.
+    -- With the unique name index (unique_item_names.sql) a concurrent insert
+    -- of the same name surfaces here as unique_violation
+    BEGIN
+        INSERT INTO grocery_items (user_id, name, list_type, is_bought)
+        VALUES (p_user_id, v_item.name, p_to_list, FALSE)
+        RETURNING * INTO v_new_item;
+    EXCEPTION WHEN unique_violation THEN
+        RETURN jsonb_build_object('status', 'conflict', 'name', v_item.name);
+    END;
+
+    DELETE FROM grocery_items
+    WHERE item_id = v_item.item_id;
+
+    RETURN jsonb_build_object('status', 'moved', 'item', to_jsonb(v_new_item));
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION move_grocery_item(UUID, UUID, TEXT) TO anon, authenticated;
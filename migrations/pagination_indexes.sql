@@ -0,0 +1,15 @@
+-- Composite indexes for keyset pagination of GET /api/items
+-- Each index matches one list's ORDER BY (see LIST_ORDER in api/repository.py),
+-- so a page is a range scan starting at the cursor instead of a sort of the
+-- user's whole list.
+
+-- to_buy: ORDER BY is_bought ASC, created_at DESC, item_id DESC
+CREATE INDEX idx_grocery_items_to_buy_page
+    ON grocery_items(user_id, list_type, is_bought, created_at DESC, item_id DESC);
+
+-- items: ORDER BY name ASC, item_id ASC
+CREATE INDEX idx_grocery_items_items_page
+    ON grocery_items(user_id, list_type, name, item_id);
+
+-- (user_id, list_type) is a prefix of both indexes above
+DROP INDEX IF EXISTS idx_grocery_items_user_list;
@@ -0,0 +1,142 @@
+-- Purchase history for GET /api/insights
+-- Moves and deletes remove rows from grocery_items, so what was bought and
+-- how often is lost. This keeps it in two tables written by triggers (every
+-- write path - PostgREST, the RPCs, direct Postgres - records the same way):
+--
+--   grocery_item_events  append-only log: bought / unbought / moved / deleted
+--   grocery_item_stats   one row per user and item name (lower(name)), with
+--                        purchase count, first/last bought time - updated in
+--                        place on each event, never recomputed from the log
+--
+-- Each event costs one insert plus one primary-key upsert, whatever the
+-- size of the history, so toggles stay as fast as before.
+-- Run after delta_sync.sql.
+
+CREATE TABLE grocery_item_events (
+    event_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    user_id UUID NOT NULL,
+    item_id UUID NOT NULL,
+    name TEXT NOT NULL,
+    event_type TEXT NOT NULL CHECK (event_type IN ('bought', 'unbought', 'moved', 'deleted')),
+    list_type TEXT NOT NULL,
+    to_list TEXT,  -- moved: the list the item went to
+    occurred_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX idx_grocery_item_events_user_occurred_at
+    ON grocery_item_events(user_id, occurred_at);
+
+CREATE TABLE grocery_item_stats (
+    user_id UUID NOT NULL,
+    name_key TEXT NOT NULL,  -- lower(name), same key as the unique name index
+    name TEXT NOT NULL,
+    purchase_count INTEGER NOT NULL DEFAULT 0,
+    first_bought_at TIMESTAMP WITH TIME ZONE,
+    last_bought_at TIMESTAMP WITH TIME ZONE,
+    -- Purchase before last_bought_at, so an accidental tick can be undone
+    previous_bought_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (user_id, name_key)
+);
+
+ALTER TABLE grocery_item_events ENABLE ROW LEVEL SECURITY;
+ALTER TABLE grocery_item_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own item events"
+    ON grocery_item_events FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can view own item stats"
+    ON grocery_item_stats FOR SELECT
+    USING (auth.uid() = user_id);
+
+-- A purchase is ticking an item on the shopping list (to_buy). Unticking it
+-- within 10 minutes undoes that purchase (a mis-tap); unticking later just
+-- puts the item back on the list and keeps the purchase counted.
+--
+-- Moves run insert-then-delete in one transaction (move_grocery_item[s]):
+-- a delete whose name was inserted into the other list by the same
+-- transaction (created_at = NOW()) is logged as a move.
+--
+-- SECURITY DEFINER: written by the triggers only, clients never insert directly
+CREATE OR REPLACE FUNCTION record_grocery_item_event()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_to_list TEXT;
+    v_now TIMESTAMP WITH TIME ZONE := clock_timestamp();
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        SELECT list_type INTO v_to_list
+        FROM grocery_items
+        WHERE user_id = OLD.user_id
+          AND list_type <> OLD.list_type
+          AND lower(name) = lower(OLD.name)
+          AND created_at = NOW();
+
+        INSERT INTO grocery_item_events (user_id, item_id, name, event_type, list_type, to_list, occurred_at)
+        VALUES (
+            OLD.user_id, OLD.item_id, OLD.name,
+            CASE WHEN v_to_list IS NULL THEN 'deleted' ELSE 'moved' END,
+            OLD.list_type, v_to_list, v_now
+        );
+        RETURN OLD;
+    END IF;
+
+    INSERT INTO grocery_item_events (user_id, item_id, name, event_type, list_type, occurred_at)
+    VALUES (
+        NEW.user_id, NEW.item_id, NEW.name,
+        CASE WHEN NEW.is_bought THEN 'bought' ELSE 'unbought' END,
+        NEW.list_type, v_now
+    );
+
+    IF NEW.list_type <> 'to_buy' THEN
+        RETURN NEW;
+    END IF;
+
+    IF NEW.is_bought THEN
+        INSERT INTO grocery_item_stats AS s
+            (user_id, name_key, name, purchase_count, first_bought_at, last_bought_at)
+        VALUES (NEW.user_id, lower(NEW.name), NEW.name, 1, v_now, v_now)
+        ON CONFLICT (user_id, name_key) DO UPDATE SET
+            name = EXCLUDED.name,
+            purchase_count = s.purchase_count + 1,
+            first_bought_at = COALESCE(s.first_bought_at, EXCLUDED.first_bought_at),
+            previous_bought_at = s.last_bought_at,
+            last_bought_at = EXCLUDED.last_bought_at;
+    ELSE
+        UPDATE grocery_item_stats SET
+            purchase_count = purchase_count - 1,
+            first_bought_at = CASE WHEN purchase_count = 1 THEN NULL ELSE first_bought_at END,
+            last_bought_at = CASE
+                WHEN purchase_count = 1 THEN NULL
+                ELSE COALESCE(previous_bought_at, last_bought_at)
+            END,
+            previous_bought_at = NULL
+        WHERE user_id = NEW.user_id
+          AND name_key = lower(NEW.name)
+          AND purchase_count > 0
+          AND last_bought_at > v_now - INTERVAL '10 minutes';
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER grocery_items_record_toggle_event
+    AFTER UPDATE OF is_bought ON grocery_items
+    FOR EACH ROW
+    WHEN (OLD.is_bought IS DISTINCT FROM NEW.is_bought)
+    EXECUTE FUNCTION record_grocery_item_event();
+
+CREATE TRIGGER grocery_items_record_delete_event
+    AFTER DELETE ON grocery_items
+    FOR EACH ROW
+    EXECUTE FUNCTION record_grocery_item_event();
+
+-- The event log is only read for ad-hoc analysis (the stats table answers
+-- /api/insights); prune it if it grows too large, e.g. with pg_cron:
+--
+--   SELECT cron.schedule('prune-item-events', '0 4 * * *',
+--     $$DELETE FROM grocery_item_events WHERE occurred_at < NOW() - INTERVAL '2 years'$$);
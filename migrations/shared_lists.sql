@@ -0,0 +1,526 @@
+-- Shared lists: several people (a household) working on one grocery list
+-- without sharing a login.
+--
+-- Items now belong to a list (grocery_items.list_id) instead of a user.
+-- Everyone has a personal list whose list_id is their own user_id, so
+-- existing rows only need list_id = user_id and personal lists need no rows
+-- in the tables below. Sharing a list (personal or a new one) gives it a
+-- `lists` row; everyone with access has a `list_members` row.
+--
+-- grocery_items.user_id stays as the user who added the item (or last
+-- moved it - a move re-adds the row as the mover). The
+-- tombstone, purchase history and stats tables were keyed by user only
+-- because a user had one list: their user_id column becomes list_id (the
+-- values are already right, personal list_id = user_id).
+--
+-- Run after every earlier migration (purchase_history.sql last).
+
+-- ============================================
+-- Lists, members, invites
+-- ============================================
+CREATE TABLE lists (
+    list_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    name TEXT NOT NULL,
+    owner_id UUID NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE list_members (
+    list_id UUID NOT NULL REFERENCES lists(list_id) ON DELETE CASCADE,
+    user_id UUID NOT NULL,
+    role TEXT NOT NULL DEFAULT 'member' CHECK (role IN ('owner', 'member')),
+    joined_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    -- Access check (is this user in this list?) is one probe of this key
+    PRIMARY KEY (list_id, user_id)
+);
+
+-- "Lists I'm in": the RLS policies and GET /api/shared-lists
+CREATE INDEX idx_list_members_user ON list_members(user_id, list_id);
+
+CREATE TABLE list_invites (
+    code TEXT PRIMARY KEY,
+    list_id UUID NOT NULL REFERENCES lists(list_id) ON DELETE CASCADE,
+    created_by UUID NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+ALTER TABLE lists ENABLE ROW LEVEL SECURITY;
+ALTER TABLE list_members ENABLE ROW LEVEL SECURITY;
+-- No policies: invites are only read and written by the functions below
+ALTER TABLE list_invites ENABLE ROW LEVEL SECURITY;
+
+-- Lists the current user can use: their personal list plus every list they
+-- are a member of. SECURITY DEFINER so policies calling it don't recurse
+-- into list_members' own policy. Policies use it as an uncorrelated
+-- `list_id IN (SELECT user_list_ids())`, evaluated once per statement (an
+-- index scan of idx_list_members_user), not once per row.
+CREATE OR REPLACE FUNCTION user_list_ids()
+RETURNS SETOF UUID
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT auth.uid()
+    UNION ALL
+    SELECT list_id FROM list_members WHERE user_id = auth.uid();
+$$;
+
+CREATE POLICY "Members can view their lists"
+    ON lists FOR SELECT
+    USING (list_id IN (SELECT user_list_ids()));
+
+CREATE POLICY "Users can view own memberships"
+    ON list_members FOR SELECT
+    USING (auth.uid() = user_id);
+
+-- ============================================
+-- Items belong to a list
+-- ============================================
+ALTER TABLE grocery_items ADD COLUMN list_id UUID;
+
+UPDATE grocery_items
+SET list_id = user_id;
+
+ALTER TABLE grocery_items ALTER COLUMN list_id SET NOT NULL;
+
+-- Same indexes as before, keyed by list instead of user
+DROP INDEX IF EXISTS idx_grocery_items_user_list_lower_name;
+CREATE UNIQUE INDEX idx_grocery_items_list_lower_name
+    ON grocery_items (list_id, list_type, lower(name));
+
+DROP INDEX IF EXISTS idx_grocery_items_user_updated_at;
+CREATE INDEX idx_grocery_items_list_updated_at ON grocery_items(list_id, updated_at);
+
+DROP INDEX IF EXISTS idx_grocery_items_to_buy_page;
+CREATE INDEX idx_grocery_items_to_buy_page
+    ON grocery_items(list_id, list_type, is_bought, created_at DESC, item_id DESC);
+
+DROP INDEX IF EXISTS idx_grocery_items_items_page;
+CREATE INDEX idx_grocery_items_items_page
+    ON grocery_items(list_id, list_type, name, item_id);
+
+-- RLS (replaces the per-user policies from init.sql): members of a list
+-- can read and change its items; new items are added as yourself
+DROP POLICY IF EXISTS "Users can view own items" ON grocery_items;
+DROP POLICY IF EXISTS "Users can insert own items" ON grocery_items;
+DROP POLICY IF EXISTS "Users can update own items" ON grocery_items;
+DROP POLICY IF EXISTS "Users can delete own items" ON grocery_items;
+
+CREATE POLICY "Members can view list items"
+    ON grocery_items FOR SELECT
+    USING (list_id IN (SELECT user_list_ids()));
+
+CREATE POLICY "Members can add list items"
+    ON grocery_items FOR INSERT
+    WITH CHECK (auth.uid() = user_id AND list_id IN (SELECT user_list_ids()));
+
+CREATE POLICY "Members can update list items"
+    ON grocery_items FOR UPDATE
+    USING (list_id IN (SELECT user_list_ids()));
+
+CREATE POLICY "Members can delete list items"
+    ON grocery_items FOR DELETE
+    USING (list_id IN (SELECT user_list_ids()));
+
+-- ============================================
+-- Tombstones and purchase history are per list
+-- ============================================
+ALTER TABLE grocery_item_tombstones RENAME COLUMN user_id TO list_id;
+ALTER INDEX idx_grocery_item_tombstones_user_deleted_at
+    RENAME TO idx_grocery_item_tombstones_list_deleted_at;
+
+DROP POLICY IF EXISTS "Users can view own tombstones" ON grocery_item_tombstones;
+CREATE POLICY "Members can view list tombstones"
+    ON grocery_item_tombstones FOR SELECT
+    USING (list_id IN (SELECT user_list_ids()));
+
+CREATE OR REPLACE FUNCTION record_grocery_item_tombstone()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    INSERT INTO grocery_item_tombstones (item_id, list_id, list_type)
+    VALUES (OLD.item_id, OLD.list_id, OLD.list_type)
+    ON CONFLICT (item_id) DO UPDATE SET deleted_at = clock_timestamp();
+    RETURN OLD;
+END;
+$$;
+
+ALTER TABLE grocery_item_events RENAME COLUMN user_id TO list_id;
+ALTER INDEX idx_grocery_item_events_user_occurred_at
+    RENAME TO idx_grocery_item_events_list_occurred_at;
+ALTER TABLE grocery_item_stats RENAME COLUMN user_id TO list_id;
+
+DROP POLICY IF EXISTS "Users can view own item events" ON grocery_item_events;
+DROP POLICY IF EXISTS "Users can view own item stats" ON grocery_item_stats;
+
+CREATE POLICY "Members can view list item events"
+    ON grocery_item_events FOR SELECT
+    USING (list_id IN (SELECT user_list_ids()));
+
+CREATE POLICY "Members can view list item stats"
+    ON grocery_item_stats FOR SELECT
+    USING (list_id IN (SELECT user_list_ids()));
+
+-- Same rules as purchase_history.sql, keyed by list
+CREATE OR REPLACE FUNCTION record_grocery_item_event()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_to_list TEXT;
+    v_now TIMESTAMP WITH TIME ZONE := clock_timestamp();
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        SELECT list_type INTO v_to_list
+        FROM grocery_items
+        WHERE list_id = OLD.list_id
+          AND list_type <> OLD.list_type
+          AND lower(name) = lower(OLD.name)
+          AND created_at = NOW();
+
+        INSERT INTO grocery_item_events (list_id, item_id, name, event_type, list_type, to_list, occurred_at)
+        VALUES (
+            OLD.list_id, OLD.item_id, OLD.name,
+            CASE WHEN v_to_list IS NULL THEN 'deleted' ELSE 'moved' END,
+            OLD.list_type, v_to_list, v_now
+        );
+        RETURN OLD;
+    END IF;
+
+    INSERT INTO grocery_item_events (list_id, item_id, name, event_type, list_type, occurred_at)
+    VALUES (
+        NEW.list_id, NEW.item_id, NEW.name,
+        CASE WHEN NEW.is_bought THEN 'bought' ELSE 'unbought' END,
+        NEW.list_type, v_now
+    );
+
+    IF NEW.list_type <> 'to_buy' THEN
+        RETURN NEW;
+    END IF;
+
+    IF NEW.is_bought THEN
+        INSERT INTO grocery_item_stats AS s
+            (list_id, name_key, name, purchase_count, first_bought_at, last_bought_at)
+        VALUES (NEW.list_id, lower(NEW.name), NEW.name, 1, v_now, v_now)
+        ON CONFLICT (list_id, name_key) DO UPDATE SET
+            name = EXCLUDED.name,
+            purchase_count = s.purchase_count + 1,
+            first_bought_at = COALESCE(s.first_bought_at, EXCLUDED.first_bought_at),
+            previous_bought_at = s.last_bought_at,
+            last_bought_at = EXCLUDED.last_bought_at;
+    ELSE
+        UPDATE grocery_item_stats SET
+            purchase_count = purchase_count - 1,
+            first_bought_at = CASE WHEN purchase_count = 1 THEN NULL ELSE first_bought_at END,
+            last_bought_at = CASE
+                WHEN purchase_count = 1 THEN NULL
+                ELSE COALESCE(previous_bought_at, last_bought_at)
+            END,
+            previous_bought_at = NULL
+        WHERE list_id = NEW.list_id
+          AND name_key = lower(NEW.name)
+          AND purchase_count > 0
+          AND last_bought_at > v_now - INTERVAL '10 minutes';
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+-- ============================================
+-- Item functions take the list instead of the user
+-- ============================================
+-- Parameters are renamed, so the old versions have to be dropped first
+DROP FUNCTION IF EXISTS move_grocery_items(UUID, UUID[], TEXT);
+DROP FUNCTION IF EXISTS move_grocery_item(UUID, UUID, TEXT);
+DROP FUNCTION IF EXISTS toggle_grocery_items(UUID, UUID[]);
+DROP FUNCTION IF EXISTS toggle_grocery_item(UUID, UUID);
+DROP FUNCTION IF EXISTS insert_grocery_items(UUID, JSONB);
+
+-- Returns {"status": "moved", "item": {...}}, {"status": "not_found"} or
+-- {"status": "conflict", "name": ...} (see move_grocery_item.sql). The new
+-- row is added as the member moving the item - the INSERT policy only lets
+-- you add rows as yourself.
+CREATE OR REPLACE FUNCTION move_grocery_item(
+    p_item_id UUID,
+    p_list_id UUID,
+    p_to_list TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+DECLARE
+    v_item grocery_items%ROWTYPE;
+    v_new_item grocery_items%ROWTYPE;
+BEGIN
+    SELECT * INTO v_item
+    FROM grocery_items
+    WHERE item_id = p_item_id
+      AND list_id = p_list_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'not_found');
+    END IF;
+
+    IF EXISTS (
+        SELECT 1
+        FROM grocery_items
+        WHERE list_id = p_list_id
+          AND list_type = p_to_list
+          AND lower(name) = lower(v_item.name)
+    ) THEN
+        RETURN jsonb_build_object('status', 'conflict', 'name', v_item.name);
+    END IF;
+
+    BEGIN
+        INSERT INTO grocery_items (list_id, user_id, name, list_type, is_bought)
+        VALUES (p_list_id, auth.uid(), v_item.name, p_to_list, FALSE)
+        RETURNING * INTO v_new_item;
+    EXCEPTION WHEN unique_violation THEN
+        RETURN jsonb_build_object('status', 'conflict', 'name', v_item.name);
+    END;
+
+    DELETE FROM grocery_items
+    WHERE item_id = v_item.item_id;
+
+    RETURN jsonb_build_object('status', 'moved', 'item', to_jsonb(v_new_item));
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION move_grocery_items(
+    p_list_id UUID,
+    p_item_ids UUID[],
+    p_to_list TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY INVOKER
+AS $$
+DECLARE
+    v_item_id UUID;
+    v_results JSONB := '[]'::JSONB;
+BEGIN
+    FOREACH v_item_id IN ARRAY p_item_ids LOOP
+        v_results := v_results || jsonb_build_array(
+            move_grocery_item(v_item_id, p_list_id, p_to_list)
+                || jsonb_build_object('item_id', v_item_id)
+        );
+    END LOOP;
+    RETURN v_results;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION toggle_grocery_item(
+    p_item_id UUID,
+    p_list_id UUID
+)
+RETURNS SETOF grocery_items
+LANGUAGE sql
+SECURITY INVOKER
+AS $$
+    UPDATE grocery_items
+    SET is_bought = NOT is_bought
+    WHERE item_id = p_item_id
+      AND list_id = p_list_id
+    RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION toggle_grocery_items(
+    p_list_id UUID,
+    p_item_ids UUID[]
+)
+RETURNS SETOF grocery_items
+LANGUAGE sql
+SECURITY INVOKER
+AS $$
+    UPDATE grocery_items
+    SET is_bought = NOT is_bought
+    WHERE list_id = p_list_id
+      AND item_id = ANY(p_item_ids)
+    RETURNING *;
+$$;
+
+-- p_user_id: who is adding the items
+CREATE OR REPLACE FUNCTION insert_grocery_items(
+    p_list_id UUID,
+    p_user_id UUID,
+    p_items JSONB
+)
+RETURNS SETOF grocery_items
+LANGUAGE sql
+SECURITY INVOKER
+AS $$
+    INSERT INTO grocery_items (list_id, user_id, name, list_type, is_bought)
+    SELECT p_list_id, p_user_id, item.name, item.list_type, FALSE
+    FROM jsonb_to_recordset(p_items) AS item(name TEXT, list_type TEXT)
+    ON CONFLICT (list_id, list_type, lower(name)) DO NOTHING
+    RETURNING *;
+$$;
+
+GRANT EXECUTE ON FUNCTION move_grocery_item(UUID, UUID, TEXT) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION move_grocery_items(UUID, UUID[], TEXT) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION toggle_grocery_item(UUID, UUID) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION toggle_grocery_items(UUID, UUID[]) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION insert_grocery_items(UUID, UUID, JSONB) TO anon, authenticated;
+
+-- ============================================
+-- Sharing (always called with the user's own token: they act as auth.uid())
+-- ============================================
+-- Lists the current user can use, personal list first
+CREATE OR REPLACE FUNCTION get_shared_lists()
+RETURNS TABLE (list_id UUID, name TEXT, role TEXT, member_count BIGINT, personal BOOLEAN)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT auth.uid(), COALESCE(l.name, 'My list'), 'owner',
+           GREATEST((SELECT COUNT(*) FROM list_members m WHERE m.list_id = auth.uid()), 1),
+           TRUE
+    FROM (SELECT 1) AS one
+    LEFT JOIN lists l ON l.list_id = auth.uid()
+    UNION ALL
+    SELECT l.list_id, l.name, mine.role,
+           (SELECT COUNT(*) FROM list_members m WHERE m.list_id = l.list_id),
+           FALSE
+    FROM list_members mine
+    JOIN lists l ON l.list_id = mine.list_id
+    WHERE mine.user_id = auth.uid()
+      AND l.list_id <> auth.uid();
+$$;
+
+-- New empty list owned by the current user
+CREATE OR REPLACE FUNCTION create_shared_list(p_name TEXT)
+RETURNS SETOF lists
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_list lists%ROWTYPE;
+BEGIN
+    IF auth.uid() IS NULL THEN
+        RAISE EXCEPTION 'not signed in' USING ERRCODE = '28000';
+    END IF;
+    INSERT INTO lists (name, owner_id) VALUES (p_name, auth.uid()) RETURNING * INTO v_list;
+    INSERT INTO list_members (list_id, user_id, role) VALUES (v_list.list_id, auth.uid(), 'owner');
+    RETURN NEXT v_list;
+END;
+$$;
+
+-- Invite code for a list the current user is in. Inviting to your personal
+-- list shares it (creates its lists row on first use).
+-- Returns {"status": "created", "code": ..., "expires_at": ...} or {"status": "not_found"}
+CREATE OR REPLACE FUNCTION create_list_invite(p_list_id UUID, p_ttl_seconds INTEGER)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    -- 122 random bits, URL-safe as is
+    v_code TEXT := replace(gen_random_uuid()::TEXT, '-', '');
+    v_expires_at TIMESTAMP WITH TIME ZONE := NOW() + make_interval(secs => p_ttl_seconds);
+BEGIN
+    IF auth.uid() IS NULL THEN
+        RAISE EXCEPTION 'not signed in' USING ERRCODE = '28000';
+    END IF;
+
+    IF p_list_id = auth.uid() THEN
+        INSERT INTO lists (list_id, name, owner_id) VALUES (p_list_id, 'Shared list', auth.uid())
+        ON CONFLICT (list_id) DO NOTHING;
+        INSERT INTO list_members (list_id, user_id, role) VALUES (p_list_id, auth.uid(), 'owner')
+        ON CONFLICT (list_id, user_id) DO NOTHING;
+    ELSIF NOT EXISTS (
+        SELECT 1 FROM list_members WHERE list_id = p_list_id AND user_id = auth.uid()
+    ) THEN
+        RETURN jsonb_build_object('status', 'not_found');
+    END IF;
+
+    INSERT INTO list_invites (code, list_id, created_by, expires_at)
+    VALUES (v_code, p_list_id, auth.uid(), v_expires_at);
+    DELETE FROM list_invites WHERE expires_at < NOW();
+
+    RETURN jsonb_build_object('status', 'created', 'code', v_code, 'expires_at', v_expires_at);
+END;
+$$;
+
+-- Join the list an invite code belongs to.
+-- Returns {"status": "joined", "list_id": ..., "name": ...} or {"status": "invalid"}
+CREATE OR REPLACE FUNCTION join_shared_list(p_code TEXT)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_list lists%ROWTYPE;
+BEGIN
+    IF auth.uid() IS NULL THEN
+        RAISE EXCEPTION 'not signed in' USING ERRCODE = '28000';
+    END IF;
+
+    SELECT l.* INTO v_list
+    FROM list_invites i
+    JOIN lists l ON l.list_id = i.list_id
+    WHERE i.code = p_code
+      AND i.expires_at > NOW();
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'invalid');
+    END IF;
+
+    INSERT INTO list_members (list_id, user_id, role) VALUES (v_list.list_id, auth.uid(), 'member')
+    ON CONFLICT (list_id, user_id) DO NOTHING;
+
+    RETURN jsonb_build_object('status', 'joined', 'list_id', v_list.list_id, 'name', v_list.name);
+END;
+$$;
+
+-- Leave a list (p_user_id = yourself) or, as its owner, remove someone.
+-- Returns {"status": "removed"}, {"status": "not_found"} or {"status": "forbidden"}
+CREATE OR REPLACE FUNCTION remove_list_member(p_list_id UUID, p_user_id UUID)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_role TEXT;
+BEGIN
+    SELECT role INTO v_role FROM list_members WHERE list_id = p_list_id AND user_id = auth.uid();
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'not_found');
+    END IF;
+    -- The owner's personal list can't be left, and the owner can't be removed
+    IF (p_user_id <> auth.uid() AND v_role <> 'owner')
+       OR EXISTS (SELECT 1 FROM lists WHERE list_id = p_list_id AND owner_id = p_user_id) THEN
+        RETURN jsonb_build_object('status', 'forbidden');
+    END IF;
+
+    DELETE FROM list_members WHERE list_id = p_list_id AND user_id = p_user_id;
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('status', 'not_found');
+    END IF;
+    RETURN jsonb_build_object('status', 'removed');
+END;
+$$;
+
+-- Signed-in users only: these act as auth.uid()
+REVOKE EXECUTE ON FUNCTION get_shared_lists() FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION create_shared_list(TEXT) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION create_list_invite(UUID, INTEGER) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION join_shared_list(TEXT) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION remove_list_member(UUID, UUID) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION get_shared_lists() TO authenticated;
+GRANT EXECUTE ON FUNCTION create_shared_list(TEXT) TO authenticated;
+GRANT EXECUTE ON FUNCTION create_list_invite(UUID, INTEGER) TO authenticated;
+GRANT EXECUTE ON FUNCTION join_shared_list(TEXT) TO authenticated;
+GRANT EXECUTE ON FUNCTION remove_list_member(UUID, UUID) TO authenticated;
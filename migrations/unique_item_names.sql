@@ -0,0 +1,46 @@
+-- Case-insensitive unique item names per list + atomic toggle
+-- Lets POST /api/items insert directly (no ilike pre-check) and
+-- PATCH /api/items/{id}/toggle flip is_bought in one statement.
+
+-- Existing case-insensitive duplicates would make the index fail. They are
+-- not deleted here: review and remove them with dedupe_item_names.sql first.
+DO $$
+DECLARE
+    duplicate_groups INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO duplicate_groups
+    FROM (
+        SELECT 1
+        FROM grocery_items
+        GROUP BY user_id, list_type, lower(name)
+        HAVING COUNT(*) > 1
+    ) duplicates;
+
+    IF duplicate_groups > 0 THEN
+        RAISE EXCEPTION '% duplicate item name group(s) found - review and remove them with migrations/dedupe_item_names.sql, then re-run this migration', duplicate_groups;
+    END IF;
+END $$;
+
+-- Functional unique index: enforces the duplicate rule under concurrent
+-- inserts and serves lower(name) lookups (replaces the unindexable ilike scan)
+CREATE UNIQUE INDEX idx_grocery_items_user_list_lower_name
+    ON grocery_items (user_id, list_type, lower(name));
+
+-- Atomic toggle: no read-before-write, so double taps flip twice instead of
+-- racing to the same value
+CREATE OR REPLACE FUNCTION toggle_grocery_item(
+    p_item_id UUID,
+    p_user_id UUID
+)
+RETURNS SETOF grocery_items
+LANGUAGE sql
+SECURITY INVOKER  -- RLS policies still apply to the caller
+AS $$
+    UPDATE grocery_items
+    SET is_bought = NOT is_bought
+    WHERE item_id = p_item_id
+      AND user_id = p_user_id
+    RETURNING *;
+$$;
+
+GRANT EXECUTE ON FUNCTION toggle_grocery_item(UUID, UUID) TO anon, authenticated;
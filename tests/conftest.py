@@ -0,0 +1,61 @@
+"""
+Shared setup: the API modules read their config from the environment at
+import time, so it's set here (pointing at a fake Supabase) before any test
+imports them. App-level tests get a TestClient against bench/fake_supabase.
+"""
+import os
+import socket
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "api"))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+from fake_supabase import FakeSupabase, JWT_SECRET, anon_key, make_token, serve_in_thread  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+FAKE_URL = f"http://127.0.0.1:{_free_port()}"
+
+os.environ.update(
+    SUPABASE_URL=FAKE_URL,
+    SUPABASE_ANON_KEY=anon_key(),
+    SUPABASE_JWT_SECRET=JWT_SECRET,
+    LOG_LEVEL="WARNING",
+    # Concurrency tests would otherwise hit the per-user mutation cap
+    RATE_LIMIT_ENABLED="false",
+)
+os.environ.pop("DATABASE_URL", None)
+
+
+@pytest.fixture(scope="session")
+def fake():
+    fake = FakeSupabase()
+    server = serve_in_thread(fake.app, int(FAKE_URL.rsplit(":", 1)[1]))
+    yield fake
+    server.should_exit = True
+
+
+@pytest.fixture
+def client(fake):
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def auth_headers():
+    """auth_headers(user_id) -> Authorization header with a token the API accepts."""
+    def build(user_id: str, **headers) -> dict:
+        return {"Authorization": f"Bearer {make_token(FAKE_URL, user_id)}", **headers}
+    return build
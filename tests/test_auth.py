@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from auth import LocalTokenVerifier, SigningKeyUnavailable, TokenVerificationError
+
+ISSUER = "https://project.supabase.co/auth/v1"
+JWKS_URL = f"{ISSUER}/.well-known/jwks.json"
+
+
+def make_key(kid: str):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    return private_key, {**jwk, "kid": kid, "alg": "RS256", "use": "sig"}
+
+
+KEY_A, JWK_A = make_key("key-a")
+KEY_B, JWK_B = make_key("key-b")
+
+
+def make_token(private_key, kid: str, **claims) -> str:
+    payload = {
+        "sub": "user-1",
+        "aud": "authenticated",
+        "iss": ISSUER,
+        "exp": int(time.time()) + 3600,
+        **claims,
+    }
+    return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+class FakeJwks:
+    """Injectable fetch_jwks serving a mutable key set and counting fetches."""
+
+    def __init__(self, *jwks):
+        self.keys = list(jwks)
+        self.fetches = 0
+
+    def __call__(self, url: str):
+        assert url == JWKS_URL
+        self.fetches += 1
+        return {"keys": self.keys}
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_verifier(fetch, clock=None, **kwargs) -> LocalTokenVerifier:
+    return LocalTokenVerifier(issuer=ISSUER, jwks_url=JWKS_URL, fetch_jwks=fetch, clock=clock or Clock(), **kwargs)
+
+
+def test_valid_token():
+    verifier = make_verifier(FakeJwks(JWK_A))
+    claims = asyncio.run(verifier.verify(make_token(KEY_A, "key-a")))
+    assert claims["sub"] == "user-1"
+
+
+def test_valid_token_is_cached():
+    fetch = FakeJwks(JWK_A)
+    verifier = make_verifier(fetch)
+    token = make_token(KEY_A, "key-a")
+    asyncio.run(verifier.verify(token))
+    fetch.keys = []
+    assert asyncio.run(verifier.verify(token))["sub"] == "user-1"
+    assert fetch.fetches == 1
+
+
+def test_expired_token():
+    verifier = make_verifier(FakeJwks(JWK_A))
+    with pytest.raises(TokenVerificationError):
+        asyncio.run(verifier.verify(make_token(KEY_A, "key-a", exp=int(time.time()) - 60)))
+
+
+def test_wrong_audience():
+    verifier = make_verifier(FakeJwks(JWK_A))
+    with pytest.raises(TokenVerificationError):
+        asyncio.run(verifier.verify(make_token(KEY_A, "key-a", aud="service_role")))
+
+
+def test_bad_signature():
+    verifier = make_verifier(FakeJwks(JWK_A))
+    # Signed with B's private key but claiming A's kid
+    with pytest.raises(TokenVerificationError):
+        asyncio.run(verifier.verify(make_token(KEY_B, "key-a")))
+
+
+def test_unknown_kid_refreshes_keys():
+    fetch = FakeJwks(JWK_A)
+    clock = Clock()
+    verifier = make_verifier(fetch, clock)
+    asyncio.run(verifier.prefetch_keys())
+
+    # Key rotation: B published after the last fetch
+    fetch.keys = [JWK_A, JWK_B]
+    clock.now += 60
+    claims = asyncio.run(verifier.verify(make_token(KEY_B, "key-b")))
+    assert claims["sub"] == "user-1"
+    assert fetch.fetches == 2
+
+
+def test_unknown_kid_refresh_is_rate_limited():
+    fetch = FakeJwks(JWK_A)
+    verifier = make_verifier(fetch)
+    asyncio.run(verifier.prefetch_keys())
+
+    with pytest.raises(SigningKeyUnavailable):
+        asyncio.run(verifier.verify(make_token(KEY_B, "key-b")))
+    assert fetch.fetches == 1
+
+
+def test_concurrent_refresh_fetches_once_without_blocking_loop():
+    def slow_fetch(url):
+        time.sleep(0.2)
+        slow_fetch.fetches += 1
+        return {"keys": [JWK_A]}
+    slow_fetch.fetches = 0
+    verifier = make_verifier(slow_fetch)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        tokens = [make_token(KEY_A, "key-a", sub=f"user-{i}") for i in range(5)]
+        results = await asyncio.gather(*(verifier.verify(token) for token in tokens))
+        task.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(run())
+    assert [claims["sub"] for claims in results] == [f"user-{i}" for i in range(5)]
+    assert slow_fetch.fetches == 1
+    assert ticks >= 5
+
+
+def test_hs256_without_secret_needs_remote():
+    verifier = make_verifier(FakeJwks())
+    token = jwt.encode(
+        {"sub": "user-1", "aud": "authenticated", "iss": ISSUER, "exp": int(time.time()) + 60},
+        "secret", algorithm="HS256",
+    )
+    with pytest.raises(SigningKeyUnavailable):
+        asyncio.run(verifier.verify(token))
+
+
+def test_falls_back_to_remote_verification(monkeypatch):
+    import dependencies
+
+    calls = []
+
+    async def remote(token):
+        calls.append(token)
+        return "remote-user"
+
+    monkeypatch.setattr(dependencies, "AUTH_VERIFY_MODE", "local")
+    monkeypatch.setattr(dependencies, "token_verifier", make_verifier(FakeJwks(JWK_A)))
+    monkeypatch.setattr(dependencies, "_verify_token_remote", remote)
+
+    # No local key for this kid: remote check decides
+    token = make_token(KEY_B, "key-b")
+    assert asyncio.run(dependencies._verify_access_token(token)) == "remote-user"
+    assert calls == [token]
+    # A local key that rejects the token never reaches the remote check
+    with pytest.raises(dependencies.HTTPException) as error:
+        asyncio.run(dependencies._verify_access_token(make_token(KEY_B, "key-a")))
+    assert error.value.status_code == 401
+    assert calls == [token]
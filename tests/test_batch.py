@@ -0,0 +1,55 @@
+import uuid
+
+from models import MAX_BATCH_SIZE
+
+
+def statuses(response):
+    assert response.status_code == 200
+    return [result["status"] for result in response.json()["results"]]
+
+
+def test_batch_create_reports_each_item(client, fake, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    client.post("/api/items", headers=headers, json={"name": "Flour", "list_type": "to_buy"})
+
+    before = fake.request_count
+    response = client.post("/api/items/batch", headers=headers, json={"items": [
+        {"name": "Sugar", "list_type": "to_buy"},
+        {"name": "sugar ", "list_type": "to_buy"},
+        {"name": "FLOUR", "list_type": "to_buy"},
+        {"name": "  ", "list_type": "to_buy"},
+        {"name": "Sugar", "list_type": "items"},
+    ]})
+    assert fake.request_count - before == 1
+    assert statuses(response) == ["created", "skipped_duplicate", "skipped_duplicate", "error", "created"]
+
+
+def test_batch_toggle_move_delete_report_each_item(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    created = client.post("/api/items/batch", headers=headers, json={"items": [
+        {"name": name, "list_type": "to_buy"} for name in ("Beans", "Corn", "Peas")
+    ]}).json()["results"]
+    beans, corn, peas = (result["item"]["item_id"] for result in created)
+    client.post("/api/items", headers=headers, json={"name": "corn", "list_type": "items"})
+    missing = str(uuid.uuid4())
+
+    toggled = client.patch("/api/items/batch/toggle", headers=headers, json={"item_ids": [beans, missing, beans]})
+    assert statuses(toggled) == ["toggled", "not_found"]
+    assert toggled.json()["results"][0]["item"]["is_bought"]
+
+    moved = client.patch("/api/items/batch/move", headers=headers, json={"item_ids": [beans, corn, missing], "to_list": "items"})
+    assert statuses(moved) == ["moved", "conflict", "not_found"]
+
+    deleted = client.post("/api/items/batch/delete", headers=headers, json={"item_ids": [peas, beans]})
+    assert statuses(deleted) == ["deleted", "not_found"]
+
+    remaining = client.get("/api/lists", headers=headers).json()
+    assert [item["name"] for item in remaining["to_buy"]] == ["Corn"]
+    assert sorted(item["name"] for item in remaining["items"]) == ["Beans", "corn"]
+
+
+def test_batch_size_is_bounded(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    assert client.post("/api/items/batch", headers=headers, json={"items": []}).status_code == 422
+    too_many = [str(uuid.uuid4()) for _ in range(MAX_BATCH_SIZE + 1)]
+    assert client.post("/api/items/batch/delete", headers=headers, json={"item_ids": too_many}).status_code == 422
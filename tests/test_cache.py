@@ -0,0 +1,71 @@
+import asyncio
+import uuid
+
+from cache import ListCache, MemoryCacheBackend
+
+
+def test_cache_stays_bounded_past_max_entries():
+    backend = MemoryCacheBackend(max_entries=4)
+    cache = ListCache(backend)
+
+    async def fill():
+        for n in range(50):
+            list_id = f"list-{n}"
+            await cache.get_or_load(list_id, "to_buy", lambda: _rows(n))
+            await cache.invalidate(list_id)
+            await cache.get_or_load(list_id, "all", lambda: _rows(n))
+
+    asyncio.run(fill())
+    assert len(backend) == 4
+    assert cache._generations == {} and cache._loads == {}
+
+
+def test_load_overtaken_by_invalidation_is_not_stored():
+    backend = MemoryCacheBackend()
+    cache = ListCache(backend)
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_loader():
+            started.set()
+            await release.wait()
+            return ["stale"]
+
+        load = asyncio.create_task(cache.get_or_load("list", "to_buy", slow_loader))
+        await started.wait()
+        await cache.invalidate("list")
+        release.set()
+        assert await load == ["stale"]
+        return await cache.get_or_load("list", "to_buy", lambda: _rows("fresh"))
+
+    assert asyncio.run(run()) == [{"name": "fresh"}]
+    assert len(backend) == 1 and cache._generations == {}
+
+
+async def _rows(name):
+    return [{"name": name}]
+
+
+def test_reads_hit_cache_until_a_mutation(client, fake, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    params = {"list_type": "to_buy"}
+    client.post("/api/items", headers=headers, json={"name": "Milk", "list_type": "to_buy"})
+
+    client.get("/api/items", params=params, headers=headers)
+    before = fake.request_count
+    cached = client.get("/api/items", params=params, headers=headers).json()
+    assert fake.request_count == before
+    assert [item["name"] for item in cached] == ["Milk"]
+
+    # Every kind of write drops the list's entries
+    item_id = cached[0]["item_id"]
+    for change, expected in (
+        (lambda: client.post("/api/items", headers=headers, json={"name": "Jam", "list_type": "to_buy"}),
+         [("Jam", False), ("Milk", False)]),
+        (lambda: client.patch(f"/api/items/{item_id}/toggle", headers=headers), [("Jam", False), ("Milk", True)]),
+        (lambda: client.delete(f"/api/items/{item_id}", headers=headers), [("Jam", False)]),
+    ):
+        change()
+        listed = client.get("/api/items", params=params, headers=headers).json()
+        assert [(item["name"], item["is_bought"]) for item in listed] == expected
@@ -0,0 +1,40 @@
+import asyncio
+import importlib.util
+
+import pytest
+
+from events import PostgresEventBroker
+
+
+def test_failed_listen_ends_subscription():
+    broker = PostgresEventBroker("postgresql://unused")
+
+    async def refuse():
+        raise OSError("connection refused")
+
+    broker._get_connection = refuse
+
+    async def run():
+        subscription = broker.subscribe("list", "user")
+        event = await asyncio.wait_for(subscription.get(), timeout=1)
+        subscription.close()
+        return event
+
+    assert asyncio.run(run()) == {"type": "reconnect"}
+    assert broker._listen_tasks == set()
+
+
+@pytest.mark.skipif(importlib.util.find_spec("asyncpg") is not None, reason="asyncpg is installed")
+def test_postgres_backends_fail_fast_without_asyncpg(monkeypatch):
+    import dependencies
+    import events
+
+    monkeypatch.setattr(events, "EVENTS_BACKEND", "postgres")
+    monkeypatch.setattr(events, "DATABASE_URL", "postgresql://unused")
+    with pytest.raises(ImportError, match="pip install asyncpg"):
+        events.build_event_broker()
+
+    monkeypatch.setattr(dependencies, "STORAGE_BACKEND", "postgres")
+    monkeypatch.setattr(dependencies, "DATABASE_URL", "postgresql://unused")
+    with pytest.raises(ImportError, match="pip install asyncpg"):
+        dependencies.build_postgres_repository()
@@ -0,0 +1,59 @@
+import gzip
+import uuid
+
+from conftest import FAKE_URL
+from frontend import CONFIG_PLACEHOLDER, FrontendPage
+
+
+def test_page_has_config_inlined(client):
+    page = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert page.status_code == 200
+    assert "content-encoding" not in page.headers
+    assert CONFIG_PLACEHOLDER not in page.text
+    assert f'"supabase_url": "{FAKE_URL}"' in page.text
+    assert page.headers["cache-control"] == "no-cache"
+
+
+def test_page_precompressed_with_etag_per_encoding(client):
+    plain = client.get("/", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/", headers={"Accept-Encoding": "br;q=0, gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["vary"] == "Accept-Encoding"
+    assert zipped.text == plain.text  # decoded by the client
+    assert zipped.headers["etag"] != plain.headers["etag"]
+
+    revisit = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["etag"]})
+    assert revisit.status_code == 304
+    assert revisit.content == b""
+    weak = client.get("/", headers={"Accept-Encoding": "identity", "If-None-Match": "W/" + plain.headers["etag"]})
+    assert weak.status_code == 304
+
+
+def test_service_worker_served_as_javascript(client):
+    worker = client.get("/sw.js")
+    assert worker.status_code == 200
+    assert worker.headers["content-type"].startswith("text/javascript")
+    assert client.get("/sw.js", headers={"If-None-Match": worker.headers["etag"]}).status_code == 304
+
+
+def test_inlined_config_cannot_close_the_script(tmp_path):
+    template = tmp_path / "index.html"
+    template.write_text(f"<head>{CONFIG_PLACEHOLDER}</head>")
+    page = FrontendPage.load(str(template), {
+        "supabase_url": "https://x.supabase.co",
+        "supabase_anon_key": "</script><script>alert(1)</script>",
+    })
+    html = page.variants["identity"][0].decode()
+    assert html.count("</script>") == 1
+    assert gzip.decompress(page.variants["gzip"][0]).decode() == html
+
+
+def test_large_api_responses_are_gzipped(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    client.post("/api/items/batch", headers=headers, json={"items": [
+        {"name": f"Item {n}", "list_type": "items"} for n in range(30)
+    ]})
+    large = client.get("/api/lists", headers={**headers, "Accept-Encoding": "gzip"})
+    assert large.headers.get("content-encoding") == "gzip"
+    small = client.get("/api/live", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
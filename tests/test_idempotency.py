@@ -0,0 +1,94 @@
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from cache import MemoryCacheBackend
+from idempotency import IdempotencyMiddleware
+
+
+def create(client, headers, key, name="Cheese"):
+    return client.post(
+        "/api/items", json={"name": name, "list_type": "to_buy"}, headers={**headers, "Idempotency-Key": key},
+    )
+
+
+def test_retry_replays_the_stored_response(client, fake, auth_headers):
+    user_id = str(uuid.uuid4())
+    headers = auth_headers(user_id)
+    key = str(uuid.uuid4())
+
+    first = create(client, headers, key)
+    before = fake.request_count
+    retry = create(client, headers, key)
+
+    assert (first.status_code, retry.status_code) == (201, 201)
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert fake.request_count == before
+    assert len(fake.rows_by_list[user_id]) == 1
+
+
+def test_concurrent_retries_are_coalesced(client, fake, auth_headers):
+    user_id = str(uuid.uuid4())
+    headers = auth_headers(user_id)
+    key = str(uuid.uuid4())
+
+    fake.latency = 0.05
+    try:
+        with ThreadPoolExecutor(6) as pool:
+            responses = list(pool.map(lambda _: create(client, headers, key), range(6)))
+    finally:
+        fake.latency = 0
+
+    assert [response.status_code for response in responses] == [201] * 6
+    assert len({response.json()["item_id"] for response in responses}) == 1
+    assert sum("idempotent-replayed" in response.headers for response in responses) == 5
+    assert len(fake.rows_by_list[user_id]) == 1
+
+
+def test_key_reuse_for_another_request_is_rejected(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    key = str(uuid.uuid4())
+    assert create(client, headers, key, "Cheese").status_code == 201
+    reused = create(client, headers, key, "Crackers")
+    assert reused.status_code == 422
+    # Another list (X-List-Id) makes it another request too
+    other_list = create(client, {**headers, "X-List-Id": str(uuid.uuid4())}, key, "Cheese")
+    assert other_list.status_code == 422
+    assert create(client, headers, "has spaces").status_code == 400
+
+
+def test_keys_are_scoped_per_user(client, auth_headers):
+    key = str(uuid.uuid4())
+    first = create(client, auth_headers(str(uuid.uuid4())), key)
+    second = create(client, auth_headers(str(uuid.uuid4())), key)
+    assert (first.status_code, second.status_code) == (201, 201)
+    assert "idempotent-replayed" not in second.headers
+    assert first.json()["item_id"] != second.json()["item_id"]
+
+
+def test_server_errors_are_not_stored():
+    calls = []
+
+    async def flaky_app(scope, receive, send):
+        calls.append(scope["path"])
+        status = 503 if len(calls) == 1 else 200
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def resolve_user(scope, token):
+        return "user-1"
+
+    middleware = IdempotencyMiddleware(flaky_app, MemoryCacheBackend(), resolve_user)
+
+    async def run():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Authorization": "Bearer token", "Idempotency-Key": "k1"}
+            return [(await client.post("/api/items", headers=headers, content=b"{}")).status_code for _ in range(3)]
+
+    assert asyncio.run(run()) == [503, 200, 200]
+    assert len(calls) == 2
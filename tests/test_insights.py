@@ -0,0 +1,57 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+
+def insights(client, headers):
+    response = client.get("/api/insights", headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_purchases_counted_on_tick_and_undone_on_quick_untick(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    item = client.post("/api/items", headers=headers, json={"name": "Coffee", "list_type": "to_buy"}).json()
+    toggle = f"/api/items/{item['item_id']}/toggle"
+
+    client.patch(toggle, headers=headers)
+    [coffee] = insights(client, headers)["items"]
+    assert (coffee["name"], coffee["purchase_count"], coffee["average_interval_days"]) == ("Coffee", 1, None)
+
+    # Unticked within the undo window: it wasn't bought after all
+    client.patch(toggle, headers=headers)
+    assert insights(client, headers)["items"] == []
+
+    # Counts survive moving and deleting the item
+    client.patch(toggle, headers=headers)
+    moved = client.patch(f"/api/items/{item['item_id']}/move", headers=headers, json={"to_list": "items"}).json()
+    client.delete(f"/api/items/{moved['item_id']}", headers=headers)
+    assert [row["purchase_count"] for row in insights(client, headers)["items"]] == [1]
+
+
+def test_buy_again_is_due_and_not_already_on_the_list(client, fake, auth_headers):
+    user_id = str(uuid.uuid4())
+    headers = auth_headers(user_id)
+    now = datetime.now(timezone.utc)
+
+    def seed(name, count, first_days_ago, last_days_ago):
+        fake.stats[(user_id, name.lower())] = {
+            "list_id": user_id, "name": name, "name_key": name.lower(), "purchase_count": count,
+            "first_bought_at": (now - timedelta(days=first_days_ago)).isoformat(),
+            "last_bought_at": (now - timedelta(days=last_days_ago)).isoformat(),
+            "previous_bought_at": None,
+        }
+
+    seed("Eggs", 3, 20, 10)     # every 5 days, due 5 days ago
+    seed("Rice", 2, 30, 2)      # every 28 days, not due
+    seed("Milk", 5, 12, 4)      # every 2 days, due - but already on the list
+    seed("Bread", 2, 9, 5)      # every 4 days, due a day ago
+    client.post("/api/items", headers=headers, json={"name": "milk", "list_type": "to_buy"})
+
+    result = insights(client, headers)
+    assert [row["name"] for row in result["items"]] == ["Milk", "Eggs", "Rice", "Bread"]
+    eggs = result["items"][1]
+    assert eggs["average_interval_days"] == 5.0
+    assert [row["name"] for row in result["buy_again"]] == ["Eggs", "Bread"]
+
+    limited = client.get("/api/insights", params={"limit": 1}, headers=headers).json()
+    assert (len(limited["items"]), len(limited["buy_again"])) == (1, 1)
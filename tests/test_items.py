@@ -0,0 +1,82 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_concurrent_duplicate_creates_make_one_row(client, fake, auth_headers):
+    user_id = str(uuid.uuid4())
+    headers = auth_headers(user_id)
+    names = ["Milk", "milk", "MILK", "mIlK", "Milk", "milk", "MILK", "milK"]
+
+    # Latency in the fake lets every request reach it before any insert lands
+    fake.latency = 0.05
+    try:
+        with ThreadPoolExecutor(len(names)) as pool:
+            responses = list(pool.map(
+                lambda name: client.post("/api/items", headers=headers, json={"name": name, "list_type": "to_buy"}),
+                names,
+            ))
+    finally:
+        fake.latency = 0
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [201] + [409] * (len(names) - 1)
+    rows = [row for row in fake.rows_by_list.get(user_id, []) if row["name"].lower() == "milk"]
+    assert len(rows) == 1
+
+    listed = client.get("/api/items", params={"list_type": "to_buy"}, headers=headers).json()
+    assert [item["name"].lower() for item in listed] == ["milk"]
+
+
+def test_same_name_allowed_in_other_list(client, fake, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    first = client.post("/api/items", headers=headers, json={"name": "Eggs", "list_type": "to_buy"})
+    second = client.post("/api/items", headers=headers, json={"name": "eggs", "list_type": "items"})
+    assert (first.status_code, second.status_code) == (201, 201)
+
+
+def test_create_trims_name_like_batch_and_suggest(client, fake, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    created = client.post("/api/items", headers=headers, json={"name": "  Milk ", "list_type": "to_buy"})
+    assert created.status_code == 201
+    assert created.json()["name"] == "Milk"
+
+    assert client.post("/api/items", headers=headers, json={"name": "milk", "list_type": "to_buy"}).status_code == 409
+    batch = client.post("/api/items/batch", headers=headers, json={"items": [{"name": " MILK", "list_type": "to_buy"}]})
+    assert [result["status"] for result in batch.json()["results"]] == ["skipped_duplicate"]
+    suggestions = client.get("/api/items/suggest", params={"q": "mi"}, headers=headers).json()["suggestions"]
+    assert [suggestion["name"] for suggestion in suggestions] == ["Milk"]
+
+    blank = client.post("/api/items", headers=headers, json={"name": "   ", "list_type": "to_buy"})
+    assert blank.status_code == 400
+
+
+def test_move_is_one_round_trip(client, fake, auth_headers):
+    user_id = str(uuid.uuid4())
+    headers = auth_headers(user_id)
+    item = client.post("/api/items", headers=headers, json={"name": "Oil", "list_type": "to_buy"}).json()
+    client.patch(f"/api/items/{item['item_id']}/toggle", headers=headers)
+
+    before = fake.request_count
+    moved = client.patch(f"/api/items/{item['item_id']}/move", headers=headers, json={"to_list": "items"})
+    assert fake.request_count - before == 1
+
+    assert moved.status_code == 200
+    new_item = moved.json()
+    assert (new_item["list_type"], new_item["is_bought"]) == ("items", False)
+    assert new_item["item_id"] != item["item_id"]
+    assert [row["item_id"] for row in fake.rows_by_list[user_id]] == [new_item["item_id"]]
+
+    missing = client.patch(f"/api/items/{item['item_id']}/move", headers=headers, json={"to_list": "to_buy"})
+    assert missing.status_code == 404
+
+
+def test_move_conflicts_with_same_name_in_target(client, fake, auth_headers):
+    user_id = str(uuid.uuid4())
+    headers = auth_headers(user_id)
+    item = client.post("/api/items", headers=headers, json={"name": "Salt", "list_type": "to_buy"}).json()
+    client.post("/api/items", headers=headers, json={"name": "SALT", "list_type": "items"})
+
+    conflict = client.patch(f"/api/items/{item['item_id']}/move", headers=headers, json={"to_list": "items"})
+    assert conflict.status_code == 409
+    # Nothing moved
+    assert sorted(row["list_type"] for row in fake.rows_by_list[user_id]) == ["items", "to_buy"]
@@ -0,0 +1,63 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import lifecycle
+import main
+
+
+@pytest.fixture
+def new_worker(fake, monkeypatch):
+    """Lifecycle state of a worker that hasn't started or drained yet (it's per process)."""
+    monkeypatch.setattr(lifecycle, "_ready", False)
+    monkeypatch.setattr(lifecycle, "_draining", False)
+    monkeypatch.setattr(lifecycle, "_drain_callbacks", [])
+
+
+@pytest.fixture
+def worker(new_worker):
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_ready_after_warm_up(worker):
+    assert worker.get("/api/live").status_code == 200
+    ready = worker.get("/api/ready")
+    assert ready.status_code == 200
+    assert ready.json() == {"status": "ready", "backends": {"supabase": "ok"}}
+    assert database._http_client is not None
+
+
+def test_unreachable_backend_is_not_ready(worker, monkeypatch):
+    async def down():
+        raise ConnectionError("refused")
+
+    monkeypatch.setattr(main, "backend_check", lifecycle.BackendCheck({"supabase": down}))
+    ready = worker.get("/api/ready")
+    assert ready.status_code == 503
+    assert ready.json() == {"status": "unavailable", "backends": {"supabase": "ConnectionError"}}
+    assert worker.get("/api/live").status_code == 200
+
+
+def test_drain_ends_streams_and_stops_reporting_ready(worker, auth_headers):
+    user_id = "00000000-0000-4000-8000-000000000001"
+    subscription = main.event_broker.subscribe(user_id, user_id)
+    try:
+        lifecycle.start_draining()
+        assert subscription.ended == "reconnect"
+        assert worker.get("/api/ready").json() == {"status": "draining"}
+        assert worker.get("/api/ready").status_code == 503
+        assert worker.get("/api/live").status_code == 200
+
+        token = auth_headers(user_id)["Authorization"].split()[1]
+        stream = worker.get("/api/stream", params={"access_token": token})
+        assert stream.status_code == 503
+    finally:
+        subscription.close()
+
+
+def test_shutdown_drains_and_closes_the_pool(new_worker):
+    with TestClient(main.app) as client:
+        assert client.get("/api/ready").status_code == 200
+    assert lifecycle.is_draining()
+    assert database._http_client is None
@@ -0,0 +1,69 @@
+import uuid
+
+import pytest
+
+import dependencies
+from repository import ItemRepository
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_lists_etag_304_without_fetching_rows(client, auth_headers, monkeypatch, cached):
+    if not cached:
+        monkeypatch.setattr(dependencies, "list_cache", None)
+    headers = auth_headers(str(uuid.uuid4()))
+    client.post("/api/items", headers=headers, json={"name": "Bread", "list_type": "to_buy"})
+
+    first = client.get("/api/lists", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    fetched = []
+    list_all_items = ItemRepository.list_all_items
+
+    async def counting(self, list_id):
+        fetched.append(list_id)
+        return await list_all_items(self, list_id)
+
+    monkeypatch.setattr(ItemRepository, "list_all_items", counting)
+    unchanged = client.get("/api/lists", headers={**headers, "If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert fetched == []
+
+    # Every kind of change moves the ETag
+    item_id = first.json()["to_buy"][0]["item_id"]
+    for change in (
+        lambda: client.patch(f"/api/items/{item_id}/toggle", headers=headers),
+        lambda: client.post("/api/items", headers=headers, json={"name": "Jam", "list_type": "to_buy"}),
+        lambda: client.delete(f"/api/items/{item_id}", headers=headers),
+    ):
+        assert change().status_code < 300
+        changed = client.get("/api/lists", headers={**headers, "If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        etag = changed.headers["etag"]
+
+
+def test_lists_split_and_sorted_like_get_items(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    for name in ("Apples", "Bananas", "Cherries"):
+        client.post("/api/items", headers=headers, json={"name": name, "list_type": "to_buy"})
+    for name in ("Rice", "Pasta"):
+        client.post("/api/items", headers=headers, json={"name": name, "list_type": "items"})
+    bought = client.get("/api/items", params={"list_type": "to_buy"}, headers=headers).json()[0]
+    client.patch(f"/api/items/{bought['item_id']}/toggle", headers=headers)
+
+    lists = client.get("/api/lists", headers=headers).json()
+    assert [item["name"] for item in lists["to_buy"]] == ["Bananas", "Apples", "Cherries"]
+    assert [item["name"] for item in lists["items"]] == ["Pasta", "Rice"]
+    assert lists["counts"] == {"to_buy": 3, "items": 2}
+    for list_type in ("to_buy", "items"):
+        single = client.get("/api/items", params={"list_type": list_type}, headers=headers).json()
+        assert [item["item_id"] for item in single] == [item["item_id"] for item in lists[list_type]]
+
+
+def test_lists_if_none_match_forms(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    etag = client.get("/api/lists", headers=headers).headers["etag"]
+    for value in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        assert client.get("/api/lists", headers={**headers, "If-None-Match": value}).status_code == 304
+    assert client.get("/api/lists", headers={**headers, "If-None-Match": '"other"'}).status_code == 200
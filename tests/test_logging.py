@@ -0,0 +1,23 @@
+import io
+import logging
+
+from fastapi.testclient import TestClient
+
+import logger
+import main
+
+
+def test_records_after_shutdown_are_written():
+    with TestClient(main.app):
+        pass
+    # The lifespan stopped the writer thread; the app logger writes directly now
+    app_logger = logging.getLogger(logger.ROOT_LOGGER)
+    outputs = [h for h in app_logger.handlers if type(h) is logging.StreamHandler]
+    assert outputs
+    buffer = io.StringIO()
+    previous = outputs[0].setStream(buffer)
+    try:
+        logger.get_logger("test").warning("Stream disconnected late")
+    finally:
+        outputs[0].setStream(previous)
+    assert "Stream disconnected late" in buffer.getvalue()
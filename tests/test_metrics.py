@@ -0,0 +1,55 @@
+import asyncio
+import time
+import uuid
+
+from metrics import _server_timing, _timings, auth_duration, track_upstream
+
+
+def auth_observations() -> int:
+    return sum(int(totals[1]) for _, totals in auth_duration._series.values())
+
+
+def test_token_verified_once_per_request(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    before = auth_observations()
+
+    client.get("/api/items", params={"list_type": "to_buy"}, headers=headers)
+    # Idempotency middleware and the endpoint both need the user
+    created = client.post(
+        "/api/items",
+        json={"name": "Bread", "list_type": "to_buy"},
+        headers={**headers, "Idempotency-Key": str(uuid.uuid4())},
+    )
+    rejected = client.post(
+        "/api/items",
+        json={"name": "Bread", "list_type": "to_buy"},
+        headers={"Authorization": "Bearer not-a-token", "Idempotency-Key": str(uuid.uuid4())},
+    )
+
+    assert (created.status_code, rejected.status_code) == (201, 401)
+    assert auth_observations() - before == 3
+    assert created.headers["server-timing"].count("auth;") == 1
+
+
+def test_server_timing_counts_overlapping_db_calls_once():
+    async def handler():
+        async def query():
+            with track_upstream("postgrest", "GET grocery_items", timing="db"):
+                await asyncio.sleep(0.05)
+
+        start = time.perf_counter()
+        timings = {}
+        token = _timings.set(timings)
+        try:
+            await asyncio.gather(query(), query())
+        finally:
+            _timings.reset(token)
+        return _server_timing(timings, start)
+
+    phases = dict(
+        (name, float(duration.removeprefix("dur=")))
+        for name, duration in (part.split(";") for part in asyncio.run(handler()).split(", "))
+    )
+    assert 50 <= phases["db"] < 90
+    assert phases["db"] <= phases["total"]
+    assert phases["app"] < 40
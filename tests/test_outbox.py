@@ -0,0 +1,43 @@
+import uuid
+
+
+def send(client, headers, requests):
+    return [
+        client.request(method, path, json=body, headers={**headers, "Idempotency-Key": key})
+        for method, path, body, key in requests
+    ]
+
+
+def test_interrupted_flush_resent_unchanged_is_applied_once(client, fake, auth_headers):
+    # The page freezes each outbox flush with its requests and
+    # Idempotency-Keys, and after a failure re-sends the same requests
+    user_id = str(uuid.uuid4())
+    headers = auth_headers(user_id)
+    existing = client.post("/api/items/batch", headers=headers, json={"items": [
+        {"name": name, "list_type": "to_buy"} for name in ("Soup", "Nuts", "Figs")
+    ]}).json()["results"]
+    soup, nuts, figs = (result["item"]["item_id"] for result in existing)
+
+    flush_key = str(uuid.uuid4())
+    flush = [
+        ("POST", "/api/items/batch", {"items": [{"name": "Plums", "list_type": "to_buy"}]}, f"{flush_key}-0"),
+        ("PATCH", "/api/items/batch/move", {"item_ids": [nuts], "to_list": "items"}, f"{flush_key}-1"),
+        ("PATCH", "/api/items/batch/toggle", {"item_ids": [soup]}, f"{flush_key}-2"),
+        ("POST", "/api/items/batch/delete", {"item_ids": [figs]}, f"{flush_key}-3"),
+    ]
+
+    # Connection lost after the first two requests got through
+    first = send(client, headers, flush[:2])
+    retried = send(client, headers, flush)
+
+    assert [response.json() for response in retried[:2]] == [response.json() for response in first]
+    assert [response.headers.get("idempotent-replayed") for response in retried] == ["true", "true", None, None]
+    assert [response.json()["results"][0]["status"] for response in retried] == ["created", "moved", "toggled", "deleted"]
+
+    # Sending the whole flush once more changes nothing
+    again = send(client, headers, flush)
+    assert all(response.headers.get("idempotent-replayed") == "true" for response in again)
+
+    lists = client.get("/api/lists", headers=headers).json()
+    assert [(item["name"], item["is_bought"]) for item in lists["to_buy"]] == [("Plums", False), ("Soup", True)]
+    assert [item["name"] for item in lists["items"]] == ["Nuts"]
@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+
+
+def walk(client, headers, list_type, limit, **params):
+    """Every page of a list, following X-Next-Cursor; returns (items, page count)."""
+    items, pages, cursor = [], 0, None
+    while True:
+        query = {"list_type": list_type, "limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/items", params=query, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        items += page
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return items, pages
+
+
+@pytest.fixture
+def stocked(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    names = ["Kale", "apple", "Dates", "Basil", "Eggs", "Chives", "Garlic"]
+    client.post("/api/items/batch", headers=headers, json={"items": [
+        {"name": name, "list_type": list_type} for name in names for list_type in ("to_buy", "items")
+    ]})
+    to_buy = client.get("/api/items", params={"list_type": "to_buy"}, headers=headers).json()
+    for item in to_buy[1::3]:
+        client.patch(f"/api/items/{item['item_id']}/toggle", headers=headers)
+    return headers
+
+
+@pytest.mark.parametrize("list_type", ["to_buy", "items"])
+def test_pages_concatenate_to_the_full_list(client, stocked, list_type):
+    full = client.get("/api/items", params={"list_type": list_type}, headers=stocked).json()
+    paged, pages = walk(client, stocked, list_type, limit=3)
+    assert [item["item_id"] for item in paged] == [item["item_id"] for item in full]
+    assert pages == 3
+
+
+def test_fields_projection(client, stocked):
+    full = client.get("/api/items", params={"list_type": "to_buy", "fields": "name,is_bought"}, headers=stocked).json()
+    assert all(set(item) == {"name", "is_bought"} for item in full)
+
+    # The cursor still works although its sort keys aren't in the projection
+    paged, _ = walk(client, stocked, "to_buy", limit=2, fields="name")
+    assert paged == [{"name": item["name"]} for item in full]
+
+
+def test_bad_page_parameters(client, stocked):
+    def get(**params):
+        return client.get("/api/items", params={"list_type": "to_buy", **params}, headers=stocked).status_code
+
+    assert get(fields="name,password") == 400
+    assert get(cursor="not-a-cursor") == 400
+    assert get(limit=0) == 422
+    assert get(limit=10_000) == 422
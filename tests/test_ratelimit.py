@@ -0,0 +1,42 @@
+import asyncio
+import uuid
+
+import httpx
+
+from ratelimit import RATE_LIMIT_IP_BURST, RATE_LIMIT_USER_BURST, MemoryRateLimitStore, RateLimitMiddleware
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def statuses(middleware, tokens):
+    async def run():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [
+                (await client.get("/api/items", headers={"Authorization": f"Bearer {token}"})).status_code
+                for token in tokens
+            ]
+    return asyncio.run(run())
+
+
+def test_unverified_tokens_share_the_ip_bucket():
+    # Remote verification: tokens are only hashed, so a new one per request
+    # must not get a new full bucket every time
+    middleware = RateLimitMiddleware(ok_app, MemoryRateLimitStore(), resolve_user=None)
+    tokens = [str(uuid.uuid4()) for _ in range(int(RATE_LIMIT_IP_BURST) + 5)]
+    result = statuses(middleware, tokens)
+    assert result.count(200) == RATE_LIMIT_IP_BURST
+    assert result[-1] == 429
+
+
+def test_verified_user_gets_the_user_bucket():
+    async def resolve_user(scope, token):
+        return "user-1"
+
+    middleware = RateLimitMiddleware(ok_app, MemoryRateLimitStore(), resolve_user=resolve_user)
+    result = statuses(middleware, ["token"] * (int(RATE_LIMIT_USER_BURST) + 1))
+    assert result.count(200) == RATE_LIMIT_USER_BURST
+    assert result[-1] == 429
@@ -0,0 +1,50 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from conftest import FAKE_URL
+from fake_supabase import anon_key
+from repository import ItemRepository
+
+
+def test_repository_round_trip(fake):
+    list_id = str(uuid.uuid4())
+
+    async def run():
+        async with httpx.AsyncClient() as http:
+            repo = ItemRepository(lambda: http, f"{FAKE_URL}/rest/v1", anon_key())
+            created = await repo.insert_item({"list_id": list_id, "user_id": list_id, "name": "Tea", "list_type": "to_buy"})
+            toggled = await repo.toggle_item(list_id, created["item_id"])
+            listed = await repo.list_items(list_id, "to_buy")
+            deleted = await repo.delete_item(list_id, created["item_id"])
+            return created, toggled, listed, deleted, await repo.list_items(list_id, "to_buy")
+
+    created, toggled, listed, deleted, after = asyncio.run(run())
+    assert created["name"] == "Tea" and not created["is_bought"]
+    assert toggled["is_bought"]
+    assert [item["item_id"] for item in listed] == [created["item_id"]]
+    assert deleted["item_id"] == created["item_id"]
+    assert after == []
+
+
+def test_requests_overlap_on_one_worker(client, fake, auth_headers):
+    # Handlers await the database instead of blocking the event loop, so
+    # requests waiting on it overlap rather than queue behind each other
+    users = [str(uuid.uuid4()) for _ in range(8)]
+    fake.latency = 0.2
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(len(users)) as pool:
+            responses = list(pool.map(
+                lambda user_id: client.get("/api/items", params={"list_type": "to_buy"}, headers=auth_headers(user_id)),
+                users,
+            ))
+        elapsed = time.perf_counter() - start
+    finally:
+        fake.latency = 0
+
+    assert [response.status_code for response in responses] == [200] * len(users)
+    assert elapsed < 0.2 * len(users) / 2
@@ -0,0 +1,113 @@
+import asyncio
+import uuid
+
+import httpx
+
+from conftest import FAKE_URL
+from fake_supabase import anon_key, service_role_key
+from repository import ItemRepository
+
+
+def share_list(client, auth_headers, owner_id: str, member_id: str) -> str:
+    """Owner creates a list and member joins it; returns the list id."""
+    created = client.post("/api/shared-lists", json={"name": "House"}, headers=auth_headers(owner_id))
+    list_id = created.json()["list_id"]
+    invite = client.post(f"/api/shared-lists/{list_id}/invites", headers=auth_headers(owner_id)).json()
+    joined = client.post("/api/shared-lists/join", json={"code": invite["code"]}, headers=auth_headers(member_id))
+    assert joined.status_code == 200
+    return list_id
+
+
+def test_list_role_is_the_users_own(client, auth_headers):
+    owner_id, member_id = str(uuid.uuid4()), str(uuid.uuid4())
+    list_id = share_list(client, auth_headers, owner_id, member_id)
+
+    async def roles():
+        # service_role sees every member row, so the query itself must pick the user's
+        async with httpx.AsyncClient() as http:
+            repo = ItemRepository(lambda: http, f"{FAKE_URL}/rest/v1", anon_key(), access_token=service_role_key())
+            return (
+                await repo.get_list_role(owner_id, list_id),
+                await repo.get_list_role(member_id, list_id),
+                await repo.get_list_role(str(uuid.uuid4()), list_id),
+            )
+
+    assert asyncio.run(roles()) == ("owner", "member", None)
+
+
+def test_member_can_use_shared_list(client, auth_headers):
+    owner_id, member_id = str(uuid.uuid4()), str(uuid.uuid4())
+    list_id = share_list(client, auth_headers, owner_id, member_id)
+
+    added = client.post(
+        "/api/items", json={"name": "Soap", "list_type": "to_buy"},
+        headers=auth_headers(member_id, **{"X-List-Id": list_id}),
+    )
+    assert added.status_code == 201
+    listed = client.get(
+        "/api/items", params={"list_type": "to_buy"},
+        headers=auth_headers(owner_id, **{"X-List-Id": list_id}),
+    )
+    assert [item["name"] for item in listed.json()] == ["Soap"]
+
+    outsider = client.get(
+        "/api/items", params={"list_type": "to_buy"},
+        headers=auth_headers(str(uuid.uuid4()), **{"X-List-Id": list_id}),
+    )
+    assert outsider.status_code == 404
+
+
+def test_member_can_move_item_another_member_added(client, auth_headers, monkeypatch):
+    import dependencies
+
+    # RLS mode: the move's new row must pass the INSERT policy as the mover
+    monkeypatch.setattr(dependencies, "USE_AUTHENTICATED_CLIENT", True)
+    owner_id, member_id = str(uuid.uuid4()), str(uuid.uuid4())
+    list_id = share_list(client, auth_headers, owner_id, member_id)
+    first = client.post(
+        "/api/items", json={"name": "Eggs", "list_type": "to_buy"},
+        headers=auth_headers(owner_id, **{"X-List-Id": list_id}),
+    ).json()
+    second = client.post(
+        "/api/items", json={"name": "Rice", "list_type": "to_buy"},
+        headers=auth_headers(owner_id, **{"X-List-Id": list_id}),
+    ).json()
+
+    moved = client.patch(
+        f"/api/items/{first['item_id']}/move", json={"to_list": "items"},
+        headers=auth_headers(member_id, **{"X-List-Id": list_id}),
+    )
+    assert moved.status_code == 200
+    assert moved.json()["user_id"] == member_id
+
+    batch = client.patch(
+        "/api/items/batch/move", json={"item_ids": [second["item_id"]], "to_list": "items"},
+        headers=auth_headers(member_id, **{"X-List-Id": list_id}),
+    )
+    assert batch.status_code == 200
+    assert [result["status"] for result in batch.json()["results"]] == ["moved"]
+
+
+def test_removing_member_ends_their_stream(client, auth_headers):
+    import main
+    from dependencies import list_access, still_list_member
+
+    owner_id, member_id = str(uuid.uuid4()), str(uuid.uuid4())
+    list_id = share_list(client, auth_headers, owner_id, member_id)
+    member_stream = main.event_broker.subscribe(list_id, member_id)
+    owner_stream = main.event_broker.subscribe(list_id, owner_id)
+    member_token = auth_headers(member_id)["Authorization"].split()[1]
+    try:
+        assert client.portal.call(still_list_member, list_id, member_id, member_token)
+
+        removed = client.delete(f"/api/shared-lists/{list_id}/members/{member_id}", headers=auth_headers(owner_id))
+        assert removed.status_code == 204
+        assert member_stream.ended == "removed"
+        assert not owner_stream.ended
+
+        # Another worker's keepalive check, once its cached membership expires
+        list_access.forget(member_id, list_id)
+        assert not client.portal.call(still_list_member, list_id, member_id, member_token)
+    finally:
+        member_stream.close()
+        owner_stream.close()
@@ -0,0 +1,47 @@
+import uuid
+
+import main
+from suggest import NameIndex
+
+
+def rows(*names_and_lists):
+    return [
+        {"name": name, "list_type": list_type, "item_id": f"{list_type}-{name}"}
+        for name, list_type in names_and_lists
+    ]
+
+
+def test_whole_name_matches_rank_before_word_matches():
+    index = NameIndex(rows(
+        ("Oat milk", "to_buy"), ("Mint", "items"), ("Milk", "to_buy"),
+        ("Minced beef", "items"), ("Almond milk", "items"), ("Bread", "items"),
+    ))
+    assert [entry["name"] for entry in index.search("mi")] == ["Milk", "Mint", "Minced beef", "Oat milk", "Almond milk"]
+    assert [entry["name"] for entry in index.search("  OAT   m ")] == ["Oat milk"]
+    assert [entry["name"] for entry in index.search("mi", limit=2)] == ["Milk", "Mint"]
+    assert index.search("x") == [] and index.search("   ") == []
+
+
+def test_one_entry_per_name_across_lists():
+    index = NameIndex(rows(("milk", "to_buy"), ("Milk", "items")))
+    assert index.search("MILK") == [{"name": "Milk", "lists": {"to_buy": "to_buy-milk", "items": "items-Milk"}}]
+
+
+def test_suggest_endpoint_rebuilds_only_after_a_change(client, auth_headers):
+    headers = auth_headers(str(uuid.uuid4()))
+    created = client.post("/api/items", headers=headers, json={"name": "Cocoa", "list_type": "items"}).json()
+
+    def suggest(q):
+        response = client.get("/api/items/suggest", params={"q": q}, headers=headers)
+        assert response.status_code == 200
+        return response.json()["suggestions"]
+
+    assert suggest("co") == [{"name": "Cocoa", "lists": {"items": created["item_id"]}}]
+    builds = main.suggest_indexes.builds
+    suggest("coc")
+    assert main.suggest_indexes.builds == builds
+
+    client.post("/api/items", headers=headers, json={"name": "Coffee", "list_type": "to_buy"})
+    assert [entry["name"] for entry in suggest("co")] == ["Cocoa", "Coffee"]
+    assert main.suggest_indexes.builds == builds + 1
+    assert client.get("/api/items/suggest", params={"q": ""}, headers=headers).status_code == 422